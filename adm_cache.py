@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import array
+import pickle
+import shutil
+import hashlib
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # no locking between processes on platforms without fcntl
+
+DEFAULT_CACHE_SIZE = 10 << 30
+COPY_CHUNK_SIZE = 1 << 20
+OFFSET_FLUSH_INTERVAL = 1 << 16
+
+# hash of the options that determine the records and of the files that generate them (i.e. the version of the generator and the schema)
+def cache_key(options: dict, filenames: list) -> str:
+    digest = hashlib.sha256(json.dumps(options, sort_keys = True, default = str).encode("utf-8"))
+    for filename in filenames:
+        with open(filename, "rb") as source_file:
+            digest.update(hashlib.sha256(source_file.read()).digest())
+
+    return digest.hexdigest()
+
+# replaces a file atomically, so that an interrupted run never leaves a half written file behind
+def write_atomically(filename: str, data: bytes):
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "wb") as temporary_file:
+        temporary_file.write(data)
+    os.replace(temporary_filename, filename)
+
+class CacheEntry:
+    # a cached dataset: the records (KEY.adm), the offset after every record (KEY.idx), the state of the random number generators
+    # after the last record (KEY.state, only for the sequential stream), and the metadata (KEY.json)
+    # the metadata is written last, so the files may be longer than the metadata says if a run was interrupted
+    def __init__(self, directory: str, key: str):
+        self.key = key
+        self.path = os.path.join(directory, key)
+        self.records = 0
+        self.bytes = 0
+        self.has_state = False
+        self.last_used = 0.0
+
+        if os.path.exists(self.path + ".json"):
+            with open(self.path + ".json") as meta_file:
+                meta = json.load(meta_file)
+            self.records = meta["records"]
+            self.bytes = meta["bytes"]
+            self.has_state = meta["has_state"]
+            self.last_used = meta["last_used"]
+
+    def write_meta(self):
+        write_atomically(self.path + ".json", json.dumps({"records": self.records, "bytes": self.bytes, "has_state": self.has_state, "last_used": self.last_used}).encode("utf-8"))
+
+    def touch(self):
+        self.last_used = time.time()
+        self.write_meta()
+
+    # number of bytes of the first num_records records
+    def offset(self, num_records: int) -> int:
+        if num_records == 0:
+            return 0
+        with open(self.path + ".idx", "rb") as index_file:
+            index_file.seek(8 * (num_records - 1))
+            offsets = array.array("Q")
+            offsets.frombytes(index_file.read(8))
+
+        return offsets[0]
+
+    # writes the first num_records records to a BufferedRecordWriter
+    def copy_to(self, output, num_records: int):
+        remaining = self.offset(num_records)
+        if remaining == 0:
+            return
+        with open(self.path + ".adm", "rb") as data_file:
+            while remaining > 0:
+                data = data_file.read(min(COPY_CHUNK_SIZE, remaining))
+                remaining -= len(data)
+                output.write_encoded(data, num_records if remaining == 0 else 0)
+
+    # whether the whole data file can be copied as it is
+    def is_complete_file(self) -> bool:
+        return os.path.getsize(self.path + ".adm") == self.bytes
+
+    def copy_file(self, filename: str):
+        shutil.copyfile(self.path + ".adm", filename)
+
+    def load_state(self):
+        with open(self.path + ".state", "rb") as state_file:
+            return pickle.load(state_file)
+
+    # starts appending records after the last one, returns a CacheEntryWriter
+    def append(self):
+        return CacheEntryWriter(self)
+
+    def commit(self, records: int, num_bytes: int, state = None):
+        if state is not None:
+            write_atomically(self.path + ".state", pickle.dumps(state))
+        self.records = records
+        self.bytes = num_bytes
+        self.has_state = state is not None
+        self.touch()
+
+    def reset(self):
+        self.records = 0
+        self.bytes = 0
+        self.has_state = False
+
+    def size_on_disk(self) -> int:
+        return sum(os.path.getsize(self.path + extension) for extension in (".adm", ".idx", ".state", ".json") if os.path.exists(self.path + extension))
+
+    def remove(self):
+        for extension in (".json", ".adm", ".idx", ".state", ".lock"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path + extension)
+
+class CacheEntryWriter:
+    # appends records to a cache entry, cutting off whatever an interrupted run left behind after the committed records
+    def __init__(self, entry: CacheEntry):
+        self.entry = entry
+        self.records = entry.records
+        self.bytes = entry.bytes
+        self.offsets = array.array("Q")
+
+        self.data_file = open(entry.path + ".adm", "ab")
+        self.data_file.truncate(entry.bytes)
+        self.index_file = open(entry.path + ".idx", "ab")
+        self.index_file.truncate(8 * entry.records)
+
+    def write_record(self, id: int, record: str):
+        data = record.encode("utf-8")
+        self.data_file.write(data)
+        self.bytes += len(data)
+        self.records += 1
+        self.offsets.append(self.bytes)
+
+        if len(self.offsets) >= OFFSET_FLUSH_INTERVAL:
+            self.flush_offsets()
+
+    def write_records(self, first_id: int, records: list):
+        for id, record in enumerate(records, first_id):
+            self.write_record(id, record)
+
+    def flush_offsets(self):
+        self.offsets.tofile(self.index_file)
+        self.offsets = array.array("Q")
+
+    def commit(self, state = None):
+        self.close()
+        self.entry.commit(self.records, self.bytes, state)
+
+    def close(self):
+        if not self.data_file.closed:
+            self.flush_offsets()
+            self.data_file.close()
+            self.index_file.close()
+
+class TeeRecordWriter:
+    # writes the records to the output and to a cache entry
+    def __init__(self, output, cache_writer: CacheEntryWriter):
+        self.output = output
+        self.cache_writer = cache_writer
+
+    def write_record(self, id: int, record: str):
+        self.cache_writer.write_record(id, record)
+        return self.output.write_record(id, record)
+
+    def write_records(self, first_id: int, records: list):
+        self.cache_writer.write_records(first_id, records)
+        return self.output.write_records(first_id, records)
+
+class DatasetCache:
+    # directory of cached datasets that are identified by a key (see cache_key)
+    # once the entries take more than max_bytes, the least recently used ones are removed
+    def __init__(self, directory: str, max_bytes = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok = True)
+
+    def entry(self, key: str) -> CacheEntry:
+        return CacheEntry(self.directory, key)
+
+    # serializes the runs that use the same entry, e.g. parallel CI jobs
+    @contextlib.contextmanager
+    def lock(self, key: str):
+        with open(os.path.join(self.directory, key + ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def entries(self) -> list:
+        return [self.entry(filename[:-len(".json")]) for filename in os.listdir(self.directory) if filename.endswith(".json")]
+
+    # removes the least recently used entries until all entries fit into max_bytes (keep is only removed if it does not fit on its own)
+    def evict(self, keep = None):
+        entries = sorted(self.entries(), key = lambda entry: (entry.key == keep, entry.last_used))
+        sizes = {entry.key: entry.size_on_disk() for entry in entries}
+        total_bytes = sum(sizes.values())
+
+        for entry in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if entry.key == keep:
+                entry.remove() # the caller holds its lock
+            elif not self.try_remove(entry):
+                continue # in use by another process
+            total_bytes -= sizes[entry.key]
+
+    def try_remove(self, entry: CacheEntry) -> bool:
+        with open(entry.path + ".lock", "w") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            entry.remove()
+
+        return True
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import math
+import asyncio
+import argparse
+import threading
+import contextlib
+import adm_output
+import adm_stats
+
+DEFAULT_BATCH_BYTES = 1 << 16
+DEFAULT_MAX_PENDING_BATCHES = 16
+BATCHES_PER_SECOND = 100 # with a rate, a batch holds about 10 ms worth of records so that the schedule stays smooth
+
+class SocketFeedWriter:
+    # streams records over one or more TCP connections, e.g. to the socket adapter of an AsterixDB feed
+    # the connections are served by an asyncio event loop in a separate thread, the calling thread generates the records and hands
+    # them over in batches through a bounded queue: if the receiver is slower than the generator, drain() waits, the queue fills up,
+    # and write() blocks the generator, so the event loop itself never waits for records to be generated
+    # with a rate, the batches are sent on a fixed schedule (records/s over all connections) and the lag behind the schedule is measured
+    def __init__(self, address: str, connections = 1, rate = None, batch_bytes = DEFAULT_BATCH_BYTES, max_pending_batches = DEFAULT_MAX_PENDING_BATCHES):
+        if connections < 1:
+            raise adm_output.ADMOutputException("the number of connections must be at least 1")
+        if rate is not None and rate <= 0:
+            raise adm_output.ADMOutputException("the rate must be positive")
+
+        self.host, self.port = adm_output.parse_address(address)
+        self.connections = connections
+        self.rate = rate
+        self.batch_bytes = batch_bytes
+        self.batch_records = max(1, int(rate / BATCHES_PER_SECOND)) if rate else None
+        self.max_pending_batches = max_pending_batches
+
+        self.batch = []
+        self.batched_records = 0
+        self.batched_bytes = 0
+
+        # uncompressed sizes of the records handed to the writer
+        self.records_written = 0
+        self.bytes_written = 0
+
+        # set by the event loop
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.scheduled_records = 0
+        self.lags = [] # seconds that every batch was sent behind its schedule
+        self.connection_records = [0] * connections
+        self.connection_bytes = [0] * connections
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target = self.loop.run_forever, name = "adm-feed", daemon = True)
+        self.thread.start()
+
+        try:
+            self.senders = self.call(self.connect())
+        except BaseException:
+            self.stop_loop()
+            raise
+
+    # runs a coroutine in the event loop and waits for its result
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def connect(self):
+        self.queue = asyncio.Queue(self.max_pending_batches)
+
+        streams = []
+        try:
+            for _ in range(self.connections):
+                streams.append(await asyncio.open_connection(self.host, self.port))
+        except OSError as e:
+            for _, stream_writer in streams:
+                stream_writer.close()
+            raise adm_output.ADMOutputException("cannot connect to {host}:{port}: {error}".format(host = self.host, port = self.port, error = e)) from e
+
+        return [asyncio.ensure_future(self.send(index, stream_writer)) for index, (_, stream_writer) in enumerate(streams)]
+
+    async def send(self, index: int, stream_writer):
+        try:
+            while True:
+                batch = await self.queue.get()
+                if batch is None:
+                    return
+                if self.error is not None:
+                    continue # keep taking batches so that the generator does not block forever
+
+                data, num_records = batch
+                try:
+                    now = time.monotonic()
+                    if self.start_time is None:
+                        self.start_time = now
+
+                    if self.rate:
+                        due = self.start_time + self.scheduled_records / self.rate
+                        self.scheduled_records += num_records
+                        if due > now:
+                            await asyncio.sleep(due - now)
+                        self.lags.append(max(0.0, time.monotonic() - due))
+
+                    stream_writer.write(data)
+                    await stream_writer.drain()
+                    self.end_time = time.monotonic()
+                    self.connection_records[index] += num_records
+                    self.connection_bytes[index] += len(data)
+                except OSError as e:
+                    self.error = e
+        finally:
+            stream_writer.close()
+            with contextlib.suppress(OSError):
+                await stream_writer.wait_closed()
+
+    def check_error(self):
+        if self.error is not None:
+            raise adm_output.ADMOutputException("sending to {host}:{port} failed: {error}".format(host = self.host, port = self.port, error = self.error)) from self.error
+
+    def write(self, records: str, num_records = 1):
+        num_bytes = adm_output.encoded_length(records)
+        self.batch.append(records)
+        self.batched_records += num_records
+        self.batched_bytes += num_bytes
+        self.records_written += num_records
+        self.bytes_written += num_bytes
+
+        if self.batched_records >= self.batch_records if self.batch_records else self.batched_bytes >= self.batch_bytes:
+            self.flush_batch()
+
+        return num_bytes
+
+    def write_record(self, id: int, record: str):
+        return self.write(record)
+
+    def write_records(self, first_id: int, records: list):
+        # with a rate, chunks are split into batches as well so that the schedule stays smooth
+        batch_records = self.batch_records or max(1, len(records))
+        for i in range(0, len(records), batch_records):
+            self.write("".join(records[i:i + batch_records]), len(records[i:i + batch_records]))
+
+    def flush_batch(self):
+        if not self.batch:
+            return
+
+        batch = ("".join(self.batch).encode("utf-8"), self.batched_records)
+        self.batch = []
+        self.batched_records = 0
+        self.batched_bytes = 0
+
+        self.check_error()
+        self.call(self.queue.put(batch)) # blocks while the queue is full
+
+    def stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def close(self):
+        try:
+            self.flush_batch()
+        finally:
+            for _ in self.senders:
+                self.call(self.queue.put(None))
+            self.call(asyncio.wait(self.senders))
+            self.stop_loop()
+
+        self.check_error()
+
+    def summary(self) -> dict:
+        elapsed = (self.end_time - self.start_time) if self.start_time is not None and self.end_time is not None else 0.0
+        records = sum(self.connection_records)
+        lags = sorted(self.lags)
+        mean_lag = sum(lags) / len(lags) if lags else 0.0
+
+        summary = {
+                "address": "{host}:{port}".format(host = self.host, port = self.port),
+                "records": records,
+                "bytes": sum(self.connection_bytes),
+                "seconds": elapsed,
+                "records_per_second": records / elapsed if elapsed > 0 else None,
+                "bytes_per_second": sum(self.connection_bytes) / elapsed if elapsed > 0 else None,
+                "connection_records": self.connection_records
+            }
+        if self.rate:
+            summary["target_records_per_second"] = self.rate
+            # how late the batches were sent compared to the schedule, in milliseconds
+            summary["lag_ms"] = {
+                    "mean": 1000 * mean_lag,
+                    "stddev": 1000 * math.sqrt(sum((lag - mean_lag) ** 2 for lag in lags) / len(lags)) if lags else 0.0,
+                    "p50": 1000 * adm_stats.percentile(lags, 0.5),
+                    "p99": 1000 * adm_stats.percentile(lags, 0.99),
+                    "max": 1000 * (lags[-1] if lags else 0.0)
+                }
+
+        return summary
+
+    def report(self, stream = sys.stderr):
+        summary = self.summary()
+        line = "sent {records} records ({mb:.2f} MB) to {address} over {connections} connection(s) in {seconds:.2f} s | {records_per_second:.0f} records/s | {mb_per_second:.2f} MB/s".format(records = summary["records"], mb = summary["bytes"] / 1e6, address = summary["address"], connections = self.connections, seconds = summary["seconds"], records_per_second = summary["records_per_second"] or 0.0, mb_per_second = (summary["bytes_per_second"] or 0.0) / 1e6)
+        if self.rate:
+            line += " (target {rate:.0f} records/s) | lag mean {mean:.2f} ms, stddev {stddev:.2f} ms, p99 {p99:.2f} ms, max {max:.2f} ms".format(rate = self.rate, **summary["lag_ms"])
+
+        print(line, file = stream, flush = True)
+
+@contextlib.contextmanager
+def open_feed(address: str, connections = 1, rate = None, batch_bytes = DEFAULT_BATCH_BYTES, report_stream = sys.stderr):
+    writer = SocketFeedWriter(address, connections, rate, batch_bytes)
+    try:
+        yield writer
+    finally:
+        writer.close()
+    if report_stream is not None:
+        writer.report(report_stream)
+
+# a minimal receiver for testing feeds: accepts connections and counts the received bytes and lines
+async def listen(host: str, port: int, output = None, stream = sys.stderr):
+    async def receive(stream_reader, stream_writer):
+        peer = stream_writer.get_extra_info("peername")
+        start = time.monotonic()
+        num_bytes = 0
+        num_lines = 0
+        incomplete = b"" # only complete lines are written, so that concurrent connections do not mix up their records
+
+        while True:
+            data = await stream_reader.read(1 << 16)
+            if not data:
+                break
+            num_bytes += len(data)
+            num_lines += data.count(b"\n")
+            if output is not None:
+                data = incomplete + data
+                end = data.rfind(b"\n") + 1
+                output.write(data[:end])
+                incomplete = data[end:]
+
+        if output is not None:
+            output.write(incomplete)
+
+        elapsed = time.monotonic() - start
+        print("{peer}: received {lines} lines ({mb:.2f} MB) in {seconds:.2f} s | {mb_per_second:.2f} MB/s".format(peer = "{0}:{1}".format(*peer[:2]), lines = num_lines, mb = num_bytes / 1e6, seconds = elapsed, mb_per_second = num_bytes / elapsed / 1e6 if elapsed > 0 else 0.0), file = stream, flush = True)
+        stream_writer.close()
+
+    server = await asyncio.start_server(receive, host, port)
+    print("listening on {host}:{port}".format(host = host, port = port), file = stream, flush = True)
+    async with server:
+        await server.serve_forever()
+
+
+
+argparser = argparse.ArgumentParser(description = "receives records sent with generator.py --socket, e.g. to test feeds locally")
+argparser.add_argument("-l", "--listen", help = "address to listen on", metavar = "HOST:PORT", type = str, default = "localhost:10001")
+argparser.add_argument("-o", "--output", help = "also write the received data to this file", type = str, default = None)
+
+def main():
+    args = argparser.parse_args()
+    host, port = adm_output.parse_address(args.listen)
+
+    output = open(args.output, "wb") if args.output else None
+    try:
+        asyncio.run(listen(host, port, output))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output is not None:
+            output.close()
+
+if __name__ == "__main__":
+    main()
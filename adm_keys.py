@@ -0,0 +1,294 @@
+import os
+import math
+import random
+import tempfile
+import adm_types
+
+# primary keys of the records (--primary-key NAME:TYPE) that are unique over the whole dataset
+# every key is a number (an array of 64 bit words, the most significant one first) that is turned into the value of the key, e.g. a string
+# "permutation" keys are a bijective permutation of the id, so they are unique without keeping track of anything and can be generated
+# in any order and process, "random" keys are drawn at random and dropped if they were already drawn (see UniqueKeyTracker)
+# both are generated in batches of KEY_BATCH_SIZE keys with numpy
+
+KEY_METHODS = ["random", "permutation"]
+KEY_BATCH_SIZE = 1024
+DEFAULT_KEY_MEMORY = 256 << 20
+DEFAULT_BLOOM_CAPACITY = 1 << 20
+BLOOM_BITS_PER_KEY = 10
+FEISTEL_ROUNDS = 4
+STRING_KEY_LENGTH = 14 # 26 ** 14 > 2 ** 64, so every 64 bit number has a string of its own
+MASK_32 = (1 << 32) - 1
+MASK_64 = (1 << 64) - 1
+
+class ADMKeyException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+# turn an array of numbers (one row of words per key) into the values of the keys
+def bigint_keys(numbers) -> list:
+    return [adm_types.ADMBigInt(number - adm_types.ADMBigInt.max_val) for number in numbers[:, 0].tolist()]
+
+def string_keys(numbers) -> list:
+    numpy = adm_types.load_numpy()
+    remaining = numbers[:, 0].copy()
+    letters = numpy.empty((len(numbers), STRING_KEY_LENGTH), dtype = numpy.uint8)
+    for i in range(STRING_KEY_LENGTH):
+        letters[:, i] = remaining % numpy.uint64(26) + numpy.uint64(ord("a"))
+        remaining //= numpy.uint64(26)
+    text = letters.tobytes().decode("ascii")
+
+    return [adm_types.ADMString(text[i:i + STRING_KEY_LENGTH]) for i in range(0, len(text), STRING_KEY_LENGTH)]
+
+def uuid_keys(numbers) -> list:
+    # same as str(uuid.UUID(int = ...)) for every row but without going through the UUID class
+    digits = numbers.astype(">u8").tobytes().hex()
+
+    return [adm_types.ADMUUID("{a}-{b}-{c}-{d}-{e}".format(a = digits[i:i + 8], b = digits[i + 8:i + 12], c = digits[i + 12:i + 16], d = digits[i + 16:i + 20], e = digits[i + 20:i + 32])) for i in range(0, len(digits), 32)]
+
+# key type -> (number of 64 bit words, largest value of the most significant word, conversion of the numbers into the values)
+# the bigints leave out the smallest one, which AsterixDB does not accept when loading a file (see ADMBigInt)
+KEY_TYPES = {
+        "bigint": (1, MASK_64 - 1, bigint_keys),
+        "int64": (1, MASK_64 - 1, bigint_keys),
+        "string": (1, MASK_64, string_keys),
+        "uuid": (2, MASK_64, uuid_keys)
+    }
+
+# parses NAME:TYPE, e.g. pk:uuid
+def parse_primary_key(text: str) -> tuple:
+    name, _, key_type = text.rpartition(":")
+    if not name or key_type.lower() not in KEY_TYPES:
+        raise ADMKeyException("invalid primary key '{text}' (NAME:TYPE with one of the types {types})".format(text = text, types = ", ".join(KEY_TYPES)))
+
+    return name, key_type.lower()
+
+# finalizer of splitmix64 on an array of 64 bit words, spreads every bit of the input over the whole output
+def mix64(x):
+    numpy = adm_types.load_numpy()
+    x = x + numpy.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+
+    return x ^ (x >> numpy.uint64(31))
+
+class FeistelPermutation:
+    # bijective permutation of the numbers with the given number of words whose most significant word is at most limit, determined by the seed
+    # a Feistel network is a bijection of all numbers whatever its round function is, and the numbers above the limit are permuted again
+    # until they are not (cycle walking), which stays a bijection of the numbers up to the limit
+    def __init__(self, words: int, seed: int, limit = MASK_64, rounds = FEISTEL_ROUNDS):
+        rng = random.Random(seed)
+        self.words = words
+        self.limit = limit
+        self.round_keys = [rng.getrandbits(64) for _ in range(rounds)]
+
+    def encrypt(self, numbers):
+        numpy = adm_types.load_numpy()
+        if self.words == 2:
+            left, right = numbers[:, 0], numbers[:, 1]
+        else:
+            left, right = numbers[:, 0] >> numpy.uint64(32), numbers[:, 0] & numpy.uint64(MASK_32)
+
+        for round_key in self.round_keys:
+            mixed = mix64(right ^ numpy.uint64(round_key))
+            if self.words == 1:
+                mixed &= numpy.uint64(MASK_32)
+            left, right = right, left ^ mixed
+
+        if self.words == 2:
+            return numpy.stack((left, right), axis = 1)
+        return ((left << numpy.uint64(32)) | right).reshape(-1, 1)
+
+    def permute(self, numbers):
+        permuted = self.encrypt(numbers)
+        outside = permuted[:, 0] > self.limit
+        while outside.any():
+            permuted[outside] = self.encrypt(permuted[outside])
+            outside = permuted[:, 0] > self.limit
+
+        return permuted
+
+class BloomFilter:
+    # set of 64 bit numbers (given by their mix64 hashes) that can answer "maybe" for numbers that were never added, for about 1% of them
+    # at capacity and for more beyond it
+    def __init__(self, capacity: int, bits_per_key = BLOOM_BITS_PER_KEY):
+        numpy = adm_types.load_numpy()
+        num_bits = 1 << max(6, math.ceil(math.log2(capacity * bits_per_key)))
+        self.capacity = capacity
+        self.count = 0
+        self.mask = numpy.uint64(num_bits - 1)
+        self.num_hashes = max(1, round(bits_per_key * math.log(2)))
+        self.bits = numpy.zeros(num_bits >> 3, dtype = numpy.uint8)
+
+    # bit positions of the hashes, double hashing with an odd step, so that the positions do not repeat before they have gone through all bits
+    def positions(self, hashes):
+        numpy = adm_types.load_numpy()
+        position = hashes & numpy.uint64(MASK_32)
+        step = (hashes >> numpy.uint64(32)) | numpy.uint64(1)
+        for _ in range(self.num_hashes):
+            yield position & self.mask
+            position = position + step
+
+    def contains(self, hashes):
+        numpy = adm_types.load_numpy()
+        present = numpy.ones(len(hashes), dtype = bool)
+        for position in self.positions(hashes):
+            present &= (self.bits[position >> numpy.uint64(3)] >> (position & numpy.uint64(7)).astype(numpy.uint8)) & numpy.uint8(1) == 1
+
+        return present
+
+    def add(self, hashes):
+        numpy = adm_types.load_numpy()
+        for position in self.positions(hashes):
+            numpy.bitwise_or.at(self.bits, position >> numpy.uint64(3), numpy.left_shift(numpy.uint8(1), (position & numpy.uint64(7)).astype(numpy.uint8)))
+        self.count += len(hashes)
+
+class CompactKeySet:
+    # exact set of 64 bit numbers that needs 8 bytes per number: every batch of numbers is sorted into a numpy array (a run), and runs of
+    # similar sizes are merged, so there are only logarithmically many of them
+    # once the runs take more than max_memory bytes, they are merged into a file in a temporary directory that is memory mapped,
+    # i.e. only the pages that the binary searches touch are read
+    def __init__(self, max_memory = DEFAULT_KEY_MEMORY):
+        self.max_memory = max_memory
+        self.runs = [] # sorted arrays, the larger ones first
+        self.spilled = [] # memory mapped sorted arrays
+        self.directory = None
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def contains(self, numbers):
+        numpy = adm_types.load_numpy()
+        found = numpy.zeros(len(numbers), dtype = bool)
+        for run in self.runs + self.spilled:
+            indexes = numpy.minimum(run.searchsorted(numbers), len(run) - 1)
+            found |= run[indexes] == numbers
+
+        return found
+
+    # the numbers must not be in the set yet
+    def add(self, numbers):
+        if len(numbers) == 0:
+            return # an empty run would break the binary searches of contains
+        run = numpy_sorted(numbers)
+        self.count += len(run)
+
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = merge_runs(self.runs.pop(), run)
+        self.runs.append(run)
+
+        if sum(run.nbytes for run in self.runs) > self.max_memory:
+            self.spill()
+
+    def spill(self):
+        run = self.runs[0]
+        for other in self.runs[1:]:
+            run = merge_runs(run, other)
+        self.runs = []
+
+        if self.directory is None:
+            self.directory = tempfile.TemporaryDirectory(prefix = "adm-keys-") # removed together with this set
+        filename = os.path.join(self.directory.name, "run-{index}.u64".format(index = len(self.spilled)))
+        run.tofile(filename)
+        self.spilled.append(adm_types.load_numpy().memmap(filename, dtype = run.dtype, mode = "r"))
+
+def numpy_sorted(numbers):
+    run = numbers.copy()
+    run.sort()
+
+    return run
+
+def merge_runs(first, second):
+    merged = adm_types.load_numpy().concatenate((first, second))
+    merged.sort(kind = "stable") # finds the two sorted runs and merges them
+
+    return merged
+
+class UniqueKeyTracker:
+    # the 64 bit numbers that were drawn so far, a Bloom filter answers most lookups of new numbers without looking at the exact set
+    # the Bloom filter starts with room for capacity numbers (at most DEFAULT_BLOOM_CAPACITY, so that a large expected number of keys does
+    # not allocate it all up front) and adds a filter with twice the room whenever the last one is full
+    def __init__(self, capacity = None, max_memory = DEFAULT_KEY_MEMORY):
+        self.filters = [BloomFilter(min(capacity or DEFAULT_BLOOM_CAPACITY, DEFAULT_BLOOM_CAPACITY))]
+        self.keys = CompactKeySet(max_memory)
+        self.lookups = 0 # numbers that were looked up in the exact set, i.e. the Bloom filter said maybe
+        self.duplicates = 0
+
+    # adds a batch of numbers and returns which ones are new (of several equal numbers in the batch, only the first one)
+    def add(self, numbers):
+        numpy = adm_types.load_numpy()
+        hashes = mix64(numbers)
+        maybe_present = numpy.zeros(len(numbers), dtype = bool)
+        for bloom_filter in self.filters:
+            maybe_present |= bloom_filter.contains(hashes)
+
+        new = numpy.zeros(len(numbers), dtype = bool)
+        new[numpy.unique(numbers, return_index = True)[1]] = True
+        lookups = new & maybe_present
+        if lookups.any():
+            new[lookups] = ~self.keys.contains(numbers[lookups])
+        self.lookups += int(lookups.sum())
+        self.duplicates += len(numbers) - int(new.sum())
+
+        last_filter = self.filters[-1]
+        last_filter.add(hashes[new])
+        self.keys.add(numbers[new])
+        if last_filter.count >= last_filter.capacity:
+            self.filters.append(BloomFilter(2 * last_filter.capacity))
+
+        return new
+
+class PrimaryKeyGenerator:
+    # generates the value of the key of the record with the given id
+    # the random keys come from their own random number generator, so that the records are the same as without the key apart from the
+    # key itself, but they depend on the keys of all the records before them (i.e. they need a sequential run)
+    # the uniqueness of uuids is tracked by their upper 64 bits, i.e. a uuid is dropped if its upper half was already drawn
+    def __init__(self, name: str, key_type: str, method: str, seed: int, capacity = None, max_memory = DEFAULT_KEY_MEMORY):
+        if key_type not in KEY_TYPES:
+            raise ADMKeyException("unknown primary key type '{key_type}' (supported: {supported})".format(key_type = key_type, supported = ", ".join(KEY_TYPES)))
+        if method not in KEY_METHODS:
+            raise ADMKeyException("unknown primary key method '{method}' (supported: {supported})".format(method = method, supported = ", ".join(KEY_METHODS)))
+
+        self.name = name
+        self.words, self.limit, self.to_values = KEY_TYPES[key_type]
+        self.values = []
+        self.first_id = 0 # of the values of the permutation
+        self.position = 0 # of the next random value
+        self.permutation = None
+        self.rng = None
+        self.tracker = None
+        if method == "permutation":
+            self.permutation = FeistelPermutation(self.words, seed, self.limit)
+        else:
+            self.rng = adm_types.load_numpy().random.default_rng(seed)
+            self.tracker = UniqueKeyTracker(capacity, max_memory)
+
+    def generate(self, id: int):
+        if self.permutation is not None:
+            if not self.first_id <= id < self.first_id + len(self.values):
+                # batches are aligned to id 1, like the chunks of --workers
+                self.first_id = id - (id - 1) % KEY_BATCH_SIZE
+                self.values = self.permute_batch(self.first_id, KEY_BATCH_SIZE)
+            return self.values[id - self.first_id]
+
+        while self.position == len(self.values):
+            self.values = self.draw_batch(KEY_BATCH_SIZE)
+            self.position = 0
+        self.position += 1
+
+        return self.values[self.position - 1]
+
+    def permute_batch(self, first_id: int, n: int) -> list:
+        numpy = adm_types.load_numpy()
+        numbers = numpy.zeros((n, self.words), dtype = numpy.uint64)
+        numbers[:, -1] = numpy.arange(first_id, first_id + n, dtype = numpy.uint64)
+
+        return self.to_values(self.permutation.permute(numbers))
+
+    def draw_batch(self, n: int) -> list:
+        numpy = adm_types.load_numpy()
+        numbers = self.rng.integers(0, MASK_64, endpoint = True, size = (n, self.words), dtype = numpy.uint64)
+        numbers = numbers[numbers[:, 0] <= self.limit]
+
+        return self.to_values(numbers[self.tracker.add(numbers[:, 0])])
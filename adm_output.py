@@ -0,0 +1,333 @@
+import sys
+import json
+import os
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+import contextlib
+
+COMPRESSIONS = ["none", "gzip", "bz2", "xz"]
+COMPRESSION_EXTENSIONS = {
+        ".gz": "gzip",
+        ".bz2": "bz2",
+        ".xz": "xz"
+    }
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+class ADMOutputException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+# picks the compression based on the extension of the output file if it is not explicitly specified
+def resolve_compression(filename = None, compression = None) -> str:
+    if compression:
+        if compression not in COMPRESSIONS:
+            raise ADMOutputException("unknown compression '{compression}' (supported: {supported})".format(compression = compression, supported = ", ".join(COMPRESSIONS)))
+        return compression
+
+    if filename:
+        return COMPRESSION_EXTENSIONS.get(os.path.splitext(filename)[1], "none")
+
+    return "none"
+
+def open_compressed(raw, compression: str):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj = raw, mode = "wb")
+    elif compression == "bz2":
+        return bz2.BZ2File(raw, mode = "wb")
+    elif compression == "xz":
+        return lzma.LZMAFile(raw, mode = "wb")
+    else:
+        return raw
+
+# number of bytes of the UTF-8 encoding of a string, without encoding it in the common (ASCII) case
+def encoded_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+class BufferedRecordWriter:
+    # collects records in memory and encodes them in bulk once buffer_size bytes have been collected
+    # the encoded buffers are compressed and written by a separate thread (zlib, bz2, and lzma release the GIL while compressing)
+    # so that generating the next records overlaps with compression and I/O
+    def __init__(self, raw, compression = "none", buffer_size = DEFAULT_BUFFER_SIZE, threaded = True, max_pending_buffers = 4):
+        self.raw = raw
+        self.sink = open_compressed(raw, compression)
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered_bytes = 0
+
+        # uncompressed sizes
+        self.records_written = 0
+        self.bytes_written = 0
+
+        self.error = None
+        self.thread = None
+        if threaded:
+            # bounded so that memory usage stays bounded if writing is slower than generating
+            self.queue = queue.Queue(max_pending_buffers)
+            self.thread = threading.Thread(target = self.write_buffers, name = "adm-output-writer", daemon = True)
+            self.thread.start()
+
+    # writes one record (or several records that are already joined into one string, e.g. a chunk)
+    def write(self, records: str, num_records = 1):
+        num_bytes = encoded_length(records)
+        self.buffer.append(records)
+        self.buffered_bytes += num_bytes
+        self.records_written += num_records
+        self.bytes_written += num_bytes
+
+        if self.buffered_bytes >= self.buffer_size:
+            self.flush_buffer()
+
+        return num_bytes
+
+    def write_record(self, id: int, record: str):
+        return self.write(record)
+
+    def write_records(self, first_id: int, records: list):
+        return self.write("".join(records), len(records))
+
+    # writes records that are already encoded, e.g. from a cached dataset
+    def write_encoded(self, data: bytes, num_records: int):
+        self.flush_buffer()
+        self.records_written += num_records
+        self.bytes_written += len(data)
+
+        if self.thread:
+            self.check_error()
+            self.queue.put(data)
+        else:
+            self.sink.write(data)
+
+    def flush_buffer(self):
+        if not self.buffer:
+            return
+
+        data = "".join(self.buffer).encode("utf-8")
+        self.buffer = []
+        self.buffered_bytes = 0
+
+        if self.thread:
+            self.check_error()
+            self.queue.put(data)
+        else:
+            self.sink.write(data)
+
+    def write_buffers(self):
+        while True:
+            data = self.queue.get()
+            try:
+                if data is None:
+                    return
+                if self.error is None:
+                    self.sink.write(data)
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def check_error(self):
+        if self.error is not None:
+            raise ADMOutputException("writing the output failed: {error}".format(error = self.error)) from self.error
+
+    # writes all buffered records to the underlying file (for compressed output, the compressor may still hold back some data)
+    def flush(self):
+        self.flush_buffer()
+        if self.thread:
+            self.queue.join()
+        self.check_error()
+        self.sink.flush()
+
+    # flushes the records and waits until they are on disk, e.g. before a checkpoint refers to them
+    def sync(self):
+        self.flush()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+
+    def close(self):
+        try:
+            self.flush_buffer()
+        finally:
+            if self.thread:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+
+        self.check_error()
+        if self.sink is not self.raw:
+            self.sink.close() # writes the trailer of the compressed stream but does not close raw
+        self.raw.flush()
+
+@contextlib.contextmanager
+def open_output(filename = None, compression = None, buffer_size = DEFAULT_BUFFER_SIZE, threaded = True, offset = None):
+    # stdout if no filename is given, see https://stackoverflow.com/a/17603000
+    # with an offset, the file is cut off after its first offset bytes and continued instead of being overwritten (e.g. by --resume)
+    compression = resolve_compression(filename, compression)
+    if offset is not None:
+        raw = open(filename, "r+b")
+        raw.truncate(offset)
+        raw.seek(offset)
+    else:
+        raw = open(filename, "wb") if filename else sys.stdout.buffer
+
+    try:
+        writer = BufferedRecordWriter(raw, compression, buffer_size, threaded)
+        try:
+            yield writer
+        finally:
+            writer.close()
+    finally:
+        if raw is not sys.stdout.buffer:
+            raw.close()
+
+def parse_address(address: str) -> tuple:
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ADMOutputException("invalid address '{address}' (expected HOST:PORT)".format(address = address))
+
+    return host or "localhost", int(port)
+
+PARTITIONINGS = ["hash", "round-robin"]
+
+# mixes the bits of the id (splitmix64 finalizer) so that hash partitioning is balanced for any id range and number of partitions
+def hash_id(id: int) -> int:
+    x = (id + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+# inserts a suffix before the extension of a file name, e.g. ("data.adm.gz", ".p0") -> "data.p0.adm.gz"
+def add_filename_suffix(filename: str, suffix: str) -> str:
+    directory, basename = os.path.split(filename)
+    stem, dot, extensions = basename.partition(".")
+
+    return os.path.join(directory, stem + suffix + dot + extensions)
+
+def localfs_path(filename: str, host = "localhost") -> str:
+    return "{host}://{path}".format(host = host, path = os.path.abspath(filename))
+
+class PartitionedRecordWriter:
+    # distributes the records over one file per partition (by the hash of the id or round robin), optionally starting a new file for
+    # a partition once it would exceed max_file_bytes, and writes a manifest of the files that can be used to LOAD the dataset
+    def __init__(self, filename: str, partitions = 1, partition_by = "hash", max_file_bytes = None, compression = None, buffer_size = DEFAULT_BUFFER_SIZE, manifest_filename = None, dataset = "Dataset"):
+        if partitions < 1:
+            raise ADMOutputException("the number of partitions must be at least 1")
+        if partition_by not in PARTITIONINGS:
+            raise ADMOutputException("unknown partitioning '{partition_by}' (supported: {supported})".format(partition_by = partition_by, supported = ", ".join(PARTITIONINGS)))
+
+        self.filename = filename
+        self.partitions = partitions
+        self.partition_by = partition_by
+        self.max_file_bytes = max_file_bytes
+        self.compression = resolve_compression(filename, compression)
+        self.buffer_size = buffer_size
+        self.manifest_filename = manifest_filename or filename + ".manifest.json"
+        self.dataset = dataset
+
+        self.generation = None # set by the generator once all records are written, see generator.generation_info
+        self.next_partition = 0
+        self.files = [] # manifest entries of all files, including the ones that have been rotated
+        self.current = [None] * partitions # (raw file, BufferedRecordWriter, manifest entry) per partition
+
+    def partition_filename(self, partition: int, file_index: int) -> str:
+        suffix = ""
+        if self.partitions > 1:
+            suffix += ".p{partition}".format(partition = partition)
+        if self.max_file_bytes:
+            suffix += ".{file_index}".format(file_index = file_index)
+
+        return add_filename_suffix(self.filename, suffix)
+
+    def open_file(self, partition: int):
+        file_index = sum(1 for entry in self.files if entry["partition"] == partition)
+        filename = self.partition_filename(partition, file_index)
+        raw = open(filename, "wb")
+        entry = {"path": filename, "partition": partition, "records": 0, "bytes": 0}
+        self.files.append(entry)
+        self.current[partition] = (raw, BufferedRecordWriter(raw, self.compression, self.buffer_size), entry)
+
+    def close_file(self, partition: int):
+        raw, writer, entry = self.current[partition]
+        self.current[partition] = None
+        try:
+            writer.close()
+        finally:
+            raw.close()
+        entry["file_bytes"] = os.path.getsize(entry["path"])
+
+    def choose_partition(self, id: int) -> int:
+        if self.partitions == 1:
+            return 0
+        elif self.partition_by == "hash":
+            return hash_id(id) % self.partitions
+        else:
+            partition = self.next_partition
+            self.next_partition = (partition + 1) % self.partitions
+            return partition
+
+    def write_record(self, id: int, record: str):
+        partition = self.choose_partition(id)
+        num_bytes = encoded_length(record)
+
+        if self.current[partition] is None:
+            self.open_file(partition)
+        elif self.max_file_bytes and self.current[partition][2]["records"] > 0 and self.current[partition][2]["bytes"] + num_bytes > self.max_file_bytes:
+            self.close_file(partition)
+            self.open_file(partition)
+
+        _, writer, entry = self.current[partition]
+        writer.write(record)
+        entry["records"] += 1
+        entry["bytes"] += num_bytes
+
+        return num_bytes
+
+    def write_records(self, first_id: int, records: list):
+        for id, record in enumerate(records, first_id):
+            self.write_record(id, record)
+
+    @property
+    def records_written(self) -> int:
+        return sum(entry["records"] for entry in self.files)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(entry["bytes"] for entry in self.files)
+
+    def manifest(self) -> dict:
+        files = sorted(self.files, key = lambda entry: entry["partition"]) # stable, so the files of a partition stay in order
+        load_path = ",".join(localfs_path(entry["path"]) for entry in files)
+
+        manifest = {
+                "files": files,
+                "records": self.records_written,
+                "bytes": self.bytes_written,
+                "compression": self.compression,
+                "load_path": load_path,
+                "load_statement": "LOAD DATASET {dataset} USING localfs ((\"path\"=\"{path}\"), (\"format\"=\"adm\"));".format(dataset = self.dataset, path = load_path)
+            }
+        if self.generation is not None:
+            manifest["generation"] = self.generation
+
+        return manifest
+
+    def close(self):
+        try:
+            for partition in range(self.partitions):
+                if self.current[partition] is not None:
+                    self.close_file(partition)
+        finally:
+            with open(self.manifest_filename, "w") as manifest_file:
+                json.dump(self.manifest(), manifest_file, indent = 4)
+                manifest_file.write("\n")
+
+@contextlib.contextmanager
+def open_partitioned_output(filename: str, partitions = 1, partition_by = "hash", max_file_bytes = None, compression = None, buffer_size = DEFAULT_BUFFER_SIZE, manifest_filename = None, dataset = "Dataset"):
+    writer = PartitionedRecordWriter(filename, partitions, partition_by, max_file_bytes, compression, buffer_size, manifest_filename, dataset)
+    try:
+        yield writer
+    finally:
+        writer.close()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import contextlib
+import urllib.parse
+import adm_output
+import adm_stats
+
+# the http modules are only imported by the functions that need them, so that generator.py can import this module without paying for them
+
+STATEMENTS = ["insert", "upsert", "delete"]
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_QUERY_SERVICE_TIMEOUT = 300.0
+
+# wraps records (including their trailing newlines) into one INSERT/UPSERT statement
+def format_statement(statement: str, dataset: str, records: list) -> str:
+    return "{statement} INTO {dataset} ([\n{records}\n]);\n".format(statement = statement.upper(), dataset = dataset, records = ",\n".join(record.rstrip("\n") for record in records))
+
+# deletes the records with the given values of the key field in one statement
+def format_delete_statement(dataset: str, key: str, ids: list) -> str:
+    return "DELETE FROM {dataset} AS d WHERE d.`{key}` IN [{ids}];\n".format(dataset = dataset, key = key, ids = ", ".join(str(id) for id in ids))
+
+class StatementWriter:
+    # collects records into INSERT/UPSERT statements of batch_size records each and writes the statements to the output
+    # (a BufferedRecordWriter or a QueryServiceWriter), DELETE statements only need the ids of the records (the values of the field key)
+    def __init__(self, output, statement = "insert", dataset = "Dataset", batch_size = DEFAULT_BATCH_SIZE, key = None):
+        if statement not in STATEMENTS:
+            raise adm_output.ADMOutputException("unknown statement '{statement}' (supported: {supported})".format(statement = statement, supported = ", ".join(STATEMENTS)))
+        if batch_size < 1:
+            raise adm_output.ADMOutputException("the batch size must be at least 1")
+        if statement == "delete" and not key:
+            raise adm_output.ADMOutputException("delete statements need the name of the key field")
+
+        self.output = output
+        self.statement = statement
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.key = key
+        self.batch = []
+        self.ids = []
+
+    def write_record(self, id: int, record: str):
+        if self.statement != "delete":
+            self.batch.append(record)
+        self.ids.append(id)
+        if len(self.ids) >= self.batch_size:
+            self.flush_batch()
+
+        return adm_output.encoded_length(record)
+
+    # adds the id of a record to the DELETE statements without its record, returns the length of the id in the statement
+    def write_id(self, id: int):
+        self.ids.append(id)
+        if len(self.ids) >= self.batch_size:
+            self.flush_batch()
+
+        return len(str(id))
+
+    def write_records(self, first_id: int, records: list):
+        for id, record in enumerate(records, first_id):
+            self.write_record(id, record)
+
+    def flush_batch(self):
+        if self.ids:
+            if self.statement == "delete":
+                self.output.write(format_delete_statement(self.dataset, self.key, self.ids), len(self.ids))
+            else:
+                self.output.write(format_statement(self.statement, self.dataset, self.batch), len(self.batch))
+            self.batch = []
+            self.ids = []
+
+    def close(self):
+        self.flush_batch()
+
+@contextlib.contextmanager
+def open_statements(output, statement = "insert", dataset = "Dataset", batch_size = DEFAULT_BATCH_SIZE, key = None):
+    writer = StatementWriter(output, statement, dataset, batch_size, key)
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+class QueryServiceWriter:
+    # posts statements to a query service endpoint (e.g. http://localhost:19002/query/service) from a pool of threads
+    # every thread keeps one persistent connection, so there are at most `connections` requests in flight
+    # the statements wait in a bounded queue, so a slow server throttles the generator
+    def __init__(self, url: str, connections = 1, timeout = DEFAULT_QUERY_SERVICE_TIMEOUT):
+        parsed_url = urllib.parse.urlsplit(url)
+        if parsed_url.scheme not in ("http", "https") or not parsed_url.hostname:
+            raise adm_output.ADMOutputException("invalid query service URL '{url}'".format(url = url))
+        if connections < 1:
+            raise adm_output.ADMOutputException("the number of connections must be at least 1")
+
+        import http.client
+        self.url = url
+        self.connection_class = http.client.HTTPSConnection if parsed_url.scheme == "https" else http.client.HTTPConnection
+        self.reconnect_errors = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+        self.host = parsed_url.hostname
+        self.port = parsed_url.port
+        self.path = parsed_url.path or "/query/service"
+        self.timeout = timeout
+
+        # records and (uncompressed) bytes of the statements handed to the writer
+        self.records_written = 0
+        self.bytes_written = 0
+
+        # updated by the threads
+        self.lock = threading.Lock()
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.statements_sent = 0
+        self.records_sent = 0
+        self.bytes_sent = 0
+        self.latencies = [] # seconds per request
+
+        self.queue = queue.Queue(2 * connections)
+        self.threads = [threading.Thread(target = self.send_statements, name = "adm-query-{index}".format(index = index), daemon = True) for index in range(connections)]
+        for thread in self.threads:
+            thread.start()
+
+    def write(self, statement: str, num_records = 1):
+        self.check_error()
+        num_bytes = adm_output.encoded_length(statement)
+        self.records_written += num_records
+        self.bytes_written += num_bytes
+        self.queue.put((statement, num_records)) # blocks while all connections are busy and the queue is full
+
+        return num_bytes
+
+    # sends one statement and returns the response, reconnecting once if the server closed the persistent connection
+    def post(self, connection, body: bytes):
+        headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
+        for attempt in range(2):
+            try:
+                connection.request("POST", self.path, body, headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except self.reconnect_errors:
+                connection.close()
+                if attempt == 1:
+                    raise
+
+    def send_statements(self):
+        connection = self.connection_class(self.host, self.port, timeout = self.timeout)
+        try:
+            while True:
+                item = self.queue.get()
+                try:
+                    if item is None:
+                        return
+                    if self.error is not None:
+                        continue # keep taking statements so that the generator does not block forever
+
+                    statement, num_records = item
+                    body = urllib.parse.urlencode({"statement": statement}).encode("utf-8")
+
+                    start = time.monotonic()
+                    with self.lock:
+                        if self.start_time is None:
+                            self.start_time = start
+                    status, response = self.post(connection, body)
+                    end = time.monotonic()
+
+                    if status != 200:
+                        raise adm_output.ADMOutputException("HTTP {status}: {response}".format(status = status, response = response[:1000].decode("utf-8", "replace")))
+
+                    with self.lock:
+                        self.end_time = end
+                        self.statements_sent += 1
+                        self.records_sent += num_records
+                        self.bytes_sent += len(body)
+                        self.latencies.append(end - start)
+                except Exception as e:
+                    self.error = e
+                finally:
+                    self.queue.task_done()
+        finally:
+            connection.close()
+
+    def check_error(self):
+        if self.error is not None:
+            raise adm_output.ADMOutputException("posting to {url} failed: {error}".format(url = self.url, error = self.error)) from self.error
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        self.check_error()
+
+    def summary(self) -> dict:
+        elapsed = self.end_time - self.start_time if self.start_time is not None and self.end_time is not None else 0.0
+        latencies = sorted(self.latencies)
+
+        return {
+                "url": self.url,
+                "connections": len(self.threads),
+                "statements": self.statements_sent,
+                "records": self.records_sent,
+                "bytes": self.bytes_sent,
+                "seconds": elapsed,
+                "records_per_second": self.records_sent / elapsed if elapsed > 0 else None,
+                "statements_per_second": self.statements_sent / elapsed if elapsed > 0 else None,
+                # time from sending a request until its response has been read, in milliseconds
+                "latency_ms": {
+                        "mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+                        "p50": 1000 * adm_stats.percentile(latencies, 0.5),
+                        "p99": 1000 * adm_stats.percentile(latencies, 0.99),
+                        "max": 1000 * (latencies[-1] if latencies else 0.0)
+                    }
+            }
+
+    def report(self, stream = sys.stderr):
+        summary = self.summary()
+        latency = summary["latency_ms"]
+        print("posted {statements} statements with {records} records to {url} over {connections} connection(s) in {seconds:.2f} s | {records_per_second:.0f} records/s | {statements_per_second:.1f} statements/s | latency mean {mean:.1f} ms, p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {max:.1f} ms".format(statements = summary["statements"], records = summary["records"], url = self.url, connections = summary["connections"], seconds = summary["seconds"], records_per_second = summary["records_per_second"] or 0.0, statements_per_second = summary["statements_per_second"] or 0.0, mean = latency["mean"], p50 = latency["p50"], p99 = latency["p99"], max = latency["max"]), file = stream, flush = True)
+
+@contextlib.contextmanager
+def open_query_service(url: str, connections = 1, timeout = DEFAULT_QUERY_SERVICE_TIMEOUT, report_stream = sys.stderr):
+    writer = QueryServiceWriter(url, connections, timeout)
+    try:
+        yield writer
+    finally:
+        writer.close()
+    if report_stream is not None:
+        writer.report(report_stream)
+
+def serve_stub(host: str, port: int, stream = sys.stderr):
+    import http.server
+
+    # a stub of the query service for testing: accepts every statement and counts them
+    class StubQueryServiceHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # persistent connections
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            statement = urllib.parse.parse_qs(body.decode("utf-8")).get("statement", [""])[0]
+            with self.server.lock:
+                self.server.statements += 1
+                self.server.statement_bytes += len(statement)
+
+            response = json.dumps({"status": "success", "metrics": {"statements": self.server.statements}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), StubQueryServiceHandler)
+    server.lock = threading.Lock()
+    server.statements = 0
+    server.statement_bytes = 0
+
+    print("stub query service listening on http://{host}:{port}/query/service".format(host = host, port = port), file = stream, flush = True)
+    try:
+        server.serve_forever()
+    finally:
+        print("received {statements} statements ({mb:.2f} MB)".format(statements = server.statements, mb = server.statement_bytes / 1e6), file = stream, flush = True)
+        server.server_close()
+
+
+
+argparser = argparse.ArgumentParser(description = "stub query service that accepts the statements posted by generator.py --http, e.g. to measure the client side locally")
+argparser.add_argument("-l", "--listen", help = "address to listen on", metavar = "HOST:PORT", type = str, default = "localhost:19002")
+
+def main():
+    args = argparser.parse_args()
+    host, port = adm_output.parse_address(args.listen)
+
+    try:
+        serve_stub(host, port)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import re
+import json
+import random
+import datetime
+import adm_types
+
+# generates records that match a declared type, e.g. from
+#   CREATE TYPE T AS { id: int64, name: string, tags: {{string}}, loc: point? };
+# or an equivalent JSON (or YAML) spec that can additionally restrict the values of the fields:
+#   {"root": "T", "types": {"T": {"open": false, "fields": {
+#       "id": {"type": "int64", "min": 1, "max": 1000000},
+#       "name": {"type": "string", "min_length": 3, "max_length": 8},
+#       "tags": {"type": "{{string}}", "max_items": 3},
+#       "loc": {"type": "point", "optional": true, "presence": 0.8}}}}}
+# the type is compiled once into nested generator functions, so generating a record does not need to look at the schema again
+
+PRIMITIVE_TYPES = {
+        "boolean": adm_types.ADMBoolean,
+        "string": adm_types.ADMString,
+        "tinyint": adm_types.ADMTinyInt,
+        "int8": adm_types.ADMTinyInt,
+        "smallint": adm_types.ADMSmallInt,
+        "int16": adm_types.ADMSmallInt,
+        "integer": adm_types.ADMInt,
+        "int": adm_types.ADMInt,
+        "int32": adm_types.ADMInt,
+        "bigint": adm_types.ADMBigInt,
+        "int64": adm_types.ADMBigInt,
+        "float": adm_types.ADMFloat,
+        "double": adm_types.ADMDouble,
+        "binary": adm_types.ADMBinary,
+        "point": adm_types.ADMPoint,
+        "line": adm_types.ADMLine,
+        "rectangle": adm_types.ADMRectangle,
+        "circle": adm_types.ADMCircle,
+        "polygon": adm_types.ADMPolygon,
+        "date": adm_types.ADMDate,
+        "time": adm_types.ADMTime,
+        "datetime": adm_types.ADMDateTime,
+        "duration": adm_types.ADMDuration,
+        "year_month_duration": adm_types.ADMYearMonthDuration,
+        "day_time_duration": adm_types.ADMDayTimeDuration,
+        "interval": adm_types.ADMInterval,
+        "uuid": adm_types.ADMUUID
+    }
+
+DEFAULT_MIN_ITEMS = 0
+DEFAULT_MAX_ITEMS = 7
+DEFAULT_PRESENCE = 0.5
+
+class ADMSchemaException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+# type nodes of a parsed schema
+# every node carries the options of the field it belongs to (ranges, optional, ...)
+class TypeReference:
+    def __init__(self, name: str, options = None):
+        self.name = name
+        self.options = options or {}
+
+class ListType:
+    def __init__(self, item, is_multiset: bool, options = None):
+        self.item = item
+        self.is_multiset = is_multiset
+        self.options = options or {}
+
+class RecordType:
+    def __init__(self, fields: list, is_open = True, options = None):
+        self.fields = fields # list of (name, type node, optional)
+        self.is_open = is_open
+        self.options = options or {}
+
+TOKEN_REGEX = re.compile(r"\s*(?:(--[^\n]*|//[^\n]*|/\*.*?\*/)|(`[^`]*`|\"[^\"]*\"|[A-Za-z_][A-Za-z0-9_.-]*)|([{}\[\]:,?;()]))", re.S)
+
+def tokenize(text: str) -> list:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+
+    while position < len(text):
+        match = TOKEN_REGEX.match(text, position)
+        if not match:
+            raise ADMSchemaException("unexpected character '{character}' at offset {offset}".format(character = text[position:].lstrip()[:1], offset = position))
+        position = match.end()
+
+        if match.group(2):
+            tokens.append(match.group(2).strip("`\""))
+        elif match.group(3):
+            tokens.append(match.group(3))
+
+    return tokens
+
+class DDLParser:
+    # recursive descent parser for the type definitions of CREATE TYPE statements (and type expressions on their own)
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self, offset = 0):
+        position = self.position + offset
+        return self.tokens[position] if position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise ADMSchemaException("unexpected end of type definition")
+        self.position += 1
+        return token
+
+    def expect(self, expected: str):
+        token = self.next()
+        if token != expected and token.lower() != expected:
+            raise ADMSchemaException("expected '{expected}' but found '{token}'".format(expected = expected, token = token))
+
+    def accept(self, keyword: str) -> bool:
+        token = self.peek()
+        if token is not None and token.lower() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def parse_statements(self) -> dict:
+        types = {}
+        while self.peek() is not None:
+            if self.accept(";"):
+                continue
+            self.expect("create")
+            self.expect("type")
+            name = self.next()
+            if self.accept("if"):
+                self.expect("not")
+                self.expect("exists")
+            self.expect("as")
+            types[name] = self.parse_type()
+
+        return types
+
+    def parse_type(self):
+        if self.accept("open"):
+            return self.parse_record(True)
+        elif self.accept("closed"):
+            return self.parse_record(False)
+        elif self.peek() == "{" and self.peek(1) == "{":
+            self.expect("{")
+            self.expect("{")
+            item = self.parse_type()
+            self.expect("}")
+            self.expect("}")
+            return ListType(item, True)
+        elif self.peek() == "{":
+            return self.parse_record(True)
+        elif self.accept("["):
+            item = self.parse_type()
+            self.expect("]")
+            return ListType(item, False)
+        else:
+            return TypeReference(self.next())
+
+    def parse_record(self, is_open: bool) -> RecordType:
+        self.expect("{")
+        fields = []
+        while self.peek() != "}":
+            if fields:
+                self.expect(",")
+            name = self.next()
+            self.expect(":")
+            field_type = self.parse_type()
+            fields.append((name, field_type, self.accept("?")))
+        self.expect("}")
+
+        return RecordType(fields, is_open)
+
+def parse_ddl(text: str) -> dict:
+    return DDLParser(text).parse_statements()
+
+def parse_type_expression(text: str):
+    parser = DDLParser(text)
+    type_node = parser.parse_type()
+    if parser.peek() is not None:
+        raise ADMSchemaException("unexpected '{token}' after type '{text}'".format(token = parser.peek(), text = text))
+    return type_node
+
+FIELD_OPTIONS = ["min", "max", "min_length", "max_length", "min_year", "max_year", "min_items", "max_items", "presence"]
+
+# converts a JSON/YAML field or type spec into a type node, returns (type node, optional)
+def parse_spec(spec):
+    if isinstance(spec, str):
+        return parse_type_expression(spec), False
+    if not isinstance(spec, dict):
+        raise ADMSchemaException("invalid type spec '{spec}'".format(spec = spec))
+
+    if "fields" in spec:
+        fields = []
+        for name, field_spec in spec["fields"].items():
+            field_type, optional = parse_spec(field_spec)
+            fields.append((name, field_type, optional))
+        type_node = RecordType(fields, spec.get("open", True))
+    elif "array" in spec or "multiset" in spec:
+        type_node = ListType(parse_spec(spec.get("array", spec.get("multiset")))[0], "multiset" in spec)
+    elif "type" in spec:
+        type_node = parse_spec(spec["type"])[0]
+    else:
+        raise ADMSchemaException("type spec '{spec}' has neither 'type', 'fields', 'array', nor 'multiset'".format(spec = spec))
+
+    type_node.options.update({option: spec[option] for option in FIELD_OPTIONS if option in spec})
+
+    return type_node, bool(spec.get("optional", False))
+
+def parse_json_spec(spec: dict) -> tuple:
+    if "types" not in spec:
+        raise ADMSchemaException("the spec needs a 'types' object")
+
+    types = {name: parse_spec(type_spec)[0] for name, type_spec in spec["types"].items()}
+    return types, spec.get("root")
+
+# loads a schema file (JSON, YAML, or CREATE TYPE statements, chosen by the extension) and returns (types, root type name)
+def load_schema(filename: str) -> tuple:
+    with open(filename) as schema_file:
+        text = schema_file.read()
+
+    if filename.endswith(".json"):
+        return parse_json_spec(json.loads(text))
+    elif filename.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ADMSchemaException("YAML schemas require PyYAML (https://pypi.org/project/PyYAML/)")
+        return parse_json_spec(yaml.safe_load(text))
+    else:
+        return parse_ddl(text), None
+
+# the bounds of a range of values, lengths, or years of a type must be in order and within [minimum, maximum] (if given)
+def check_range(low, high, name: str, minimum = None, maximum = None):
+    if low > high or (minimum is not None and low < minimum) or (maximum is not None and high > maximum):
+        raise ADMSchemaException("invalid range [{low}, {high}] for type '{name}'".format(low = low, high = high, name = name))
+
+class SchemaCompiler:
+    def __init__(self, types: dict, open_fields = 0):
+        self.types = types
+        self.open_fields = open_fields
+        self.resolving = []
+
+    def compile(self, type_node):
+        if isinstance(type_node, TypeReference):
+            return self.compile_reference(type_node)
+        elif isinstance(type_node, ListType):
+            return self.compile_list(type_node)
+        else:
+            return self.compile_record(type_node)
+
+    def compile_reference(self, type_node: TypeReference):
+        name = type_node.name
+        options = type_node.options
+
+        if name in self.types:
+            if name in self.resolving:
+                raise ADMSchemaException("type '{name}' is recursive".format(name = name))
+            self.resolving.append(name)
+            generate = self.compile(self.types[name])
+            self.resolving.pop()
+            return generate
+
+        adm_type = PRIMITIVE_TYPES.get(name.lower())
+        if adm_type is None:
+            raise ADMSchemaException("unknown type '{name}'".format(name = name))
+
+        if issubclass(adm_type, adm_types.AbstractADMFloatingPointBaseType):
+            low = options.get("min", float(adm_types.ADMFloat.min_val))
+            high = options.get("max", float(adm_types.ADMFloat.max_val))
+            check_range(low, high, name)
+            return lambda: adm_type(random.uniform(low, high))
+        elif issubclass(adm_type, adm_types.AbstractADMNumberBaseType):
+            low = options.get("min", adm_type.min_val)
+            high = options.get("max", adm_type.max_val)
+            check_range(low, high, name, adm_type.min_val, adm_type.max_val)
+            return lambda: adm_type(random.randint(low, high))
+        elif adm_type is adm_types.ADMString:
+            min_length = options.get("min_length", 5)
+            max_length = options.get("max_length", 10)
+            check_range(min_length, max_length, name, 0)
+            return lambda: adm_types.ADMString(adm_types.ADMString.generate_random_string(min_length, max_length))
+        elif adm_type in (adm_types.ADMDate, adm_types.ADMDateTime):
+            min_year = options.get("min_year")
+            max_year = options.get("max_year")
+            check_range(min_year or datetime.MINYEAR, max_year or datetime.MAXYEAR, name, datetime.MINYEAR, datetime.MAXYEAR)
+            return lambda: adm_type.generate_rand(min_year, max_year)
+        else:
+            return adm_type.generate_rand
+
+    def compile_list(self, type_node: ListType):
+        generate_item = self.compile(type_node.item)
+        adm_type = adm_types.ADMMultiset if type_node.is_multiset else adm_types.ADMArray
+        min_items = type_node.options.get("min_items", DEFAULT_MIN_ITEMS)
+        max_items = type_node.options.get("max_items", DEFAULT_MAX_ITEMS)
+        check_range(min_items, max_items, "multiset" if type_node.is_multiset else "array", 0)
+
+        return lambda: adm_type([generate_item() for _ in range(random.randint(min_items, max_items))])
+
+    def compile_record(self, type_node: RecordType):
+        # (name, generator, probability that the field exists or None if it always exists)
+        fields = []
+        for name, field_type, optional in type_node.fields:
+            presence = field_type.options.get("presence", DEFAULT_PRESENCE) if optional else None
+            fields.append((name, self.compile(field_type), presence))
+
+        names = set(name for name, _, _ in fields)
+        open_fields = self.open_fields if type_node.is_open else 0
+
+        def generate():
+            val = {}
+            for name, generate_field, presence in fields:
+                if presence is None or random.random() < presence:
+                    val[name] = generate_field()
+
+            # open types may have additional fields that are not declared
+            for i in range(random.randint(0, open_fields) if open_fields else 0):
+                key = adm_types.RandomDerivedTypeGenerator.generate_key(val, i)
+                if key not in names:
+                    val[key] = adm_types.RandomDerivedTypeGenerator.generate_rand_derived_type_member(0, 3, 1)
+
+            return adm_types.ADMObject(val)
+
+        return generate
+
+# compiles the root type of a schema into a function that generates a record (or any other value) of that type
+def compile_schema(types: dict, root = None, open_fields = 0):
+    if not types:
+        raise ADMSchemaException("the schema does not declare any types")
+    if root is None:
+        root = list(types)[-1] # the last type can use all the other ones
+    if root not in types:
+        raise ADMSchemaException("the schema does not declare the type '{root}'".format(root = root))
+
+    return SchemaCompiler(types, open_fields).compile(TypeReference(root))
@@ -0,0 +1,143 @@
+import sys
+import json
+import time
+import datetime
+import collections
+import adm_types
+
+DEFAULT_SAMPLE_INTERVAL = 100
+DEFAULT_PROGRESS_INTERVAL = 5.0
+
+# returns the nesting depth of a generated value (0 for primitive and incomplete information types)
+def value_depth(adm) -> int:
+    if isinstance(adm, adm_types.ADMObject):
+        children = adm.val.values()
+    elif isinstance(adm, (adm_types.ADMArray, adm_types.ADMMultiset)):
+        children = adm.val
+    else:
+        return 0
+
+    return 1 + max((value_depth(child) for child in children), default = 0)
+
+# returns the value at the given fraction (0 to 1) of the sorted values
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def format_duration(seconds: float) -> str:
+    return str(datetime.timedelta(seconds = round(seconds)))
+
+class GenerationStats:
+    # collects throughput statistics while generating records
+    # sizes are counted for every record, everything that needs timing or walking the value tree is only done for every
+    # sample_interval-th record and scaled up in the summary, so that the overhead stays low enough to always leave it on
+    # the progress is relative to total_records or, if that is unknown, to total_bytes
+    def __init__(self, total_records = None, sample_interval = DEFAULT_SAMPLE_INTERVAL, progress_interval = None, progress_stream = sys.stderr, total_bytes = None):
+        self.total_records = total_records
+        self.total_bytes = total_bytes
+        self.sample_interval = sample_interval
+        self.progress_interval = progress_interval
+        self.progress_stream = progress_stream
+
+        self.start_time = time.monotonic()
+        self.next_progress_time = self.start_time + progress_interval if progress_interval else None
+
+        self.records = 0
+        self.bytes = 0
+        self.size_histogram = collections.Counter() # power of two buckets: bucket b contains sizes in [2^(b-1), 2^b)
+
+        self.sampled_records = 0
+        self.type_counts = collections.Counter()
+        self.generation_seconds = collections.Counter() # by type, excluding the members of derived types
+        self.formatting_seconds = collections.Counter() # by type, excluding the members of derived types
+        self.depth_histogram = collections.Counter()
+
+    def should_sample(self) -> bool:
+        return self.records % self.sample_interval == 0
+
+    def add_record(self, num_bytes: int):
+        self.records += 1
+        self.bytes += num_bytes
+        self.size_histogram[num_bytes.bit_length()] += 1
+
+        if self.next_progress_time is not None and time.monotonic() >= self.next_progress_time:
+            self.report_progress()
+            self.next_progress_time = time.monotonic() + self.progress_interval
+
+    # record_val is the value of a sampled record before the id and primary key are added to it, generation_seconds the time
+    # it took to generate it by type, returns the time spent formatting its primitives for add_formatting_time
+    def add_sample(self, record_val, generation_seconds: dict) -> float:
+        self.sampled_records += 1
+        self.generation_seconds.update(generation_seconds)
+        self.depth_histogram[value_depth(record_val)] += 1
+
+        # time the primitives separately, the rest of the formatting time is spent on the structure of the derived types
+        primitive_seconds = 0.0
+        stack = [record_val]
+        while stack:
+            adm = stack.pop()
+            type_name = type(adm).__name__
+            self.type_counts[type_name] += 1
+
+            if isinstance(adm, adm_types.ADMObject):
+                stack.extend(adm.val.values())
+            elif isinstance(adm, (adm_types.ADMArray, adm_types.ADMMultiset)):
+                stack.extend(adm.val)
+            elif hasattr(adm, "toADMString"):
+                start = time.perf_counter()
+                adm.toADMString()
+                elapsed = time.perf_counter() - start
+                self.formatting_seconds[type_name] += elapsed
+                primitive_seconds += elapsed
+
+        return primitive_seconds
+
+    # formatting_seconds is the time it took to format the whole sampled record
+    def add_formatting_time(self, formatting_seconds: float, primitive_seconds: float):
+        self.formatting_seconds["derived type structure"] += max(0.0, formatting_seconds - primitive_seconds)
+
+    def report_progress(self):
+        elapsed = time.monotonic() - self.start_time
+        records_per_second = self.records / elapsed if elapsed > 0 else 0.0
+        line = "{records} records | {records_per_second:.0f} records/s | {mb_per_second:.2f} MB/s".format(records = self.records, records_per_second = records_per_second, mb_per_second = self.bytes / elapsed / 1e6 if elapsed > 0 else 0.0)
+
+        if self.total_records:
+            line += " | {percent:.1f}%".format(percent = 100 * self.records / self.total_records)
+            if records_per_second > 0:
+                line += " | ETA {eta}".format(eta = format_duration((self.total_records - self.records) / records_per_second))
+        elif self.total_bytes:
+            line += " | {percent:.1f}%".format(percent = 100 * min(self.bytes, self.total_bytes) / self.total_bytes)
+            if self.bytes > 0:
+                line += " | ETA {eta}".format(eta = format_duration(max(0, self.total_bytes - self.bytes) * elapsed / self.bytes))
+
+        print(line, file = self.progress_stream, flush = True)
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.start_time
+        scale = self.records / self.sampled_records if self.sampled_records else 0.0
+
+        return {
+                "records": self.records,
+                "bytes": self.bytes,
+                "seconds": elapsed,
+                "records_per_second": self.records / elapsed if elapsed > 0 else None,
+                "bytes_per_second": self.bytes / elapsed if elapsed > 0 else None,
+                "sample_interval": self.sample_interval,
+                "sampled_records": self.sampled_records,
+                # estimates for all records, extrapolated from the sampled records
+                "estimated_type_counts": {name: round(count * scale) for name, count in self.type_counts.most_common()},
+                "estimated_generation_seconds": {name: seconds * scale for name, seconds in self.generation_seconds.most_common()},
+                "estimated_formatting_seconds": {name: seconds * scale for name, seconds in self.formatting_seconds.most_common()},
+                "sampled_depth_histogram": {str(depth): count for depth, count in sorted(self.depth_histogram.items())},
+                "record_size_histogram": {"<{limit}".format(limit = 1 << bucket): count for bucket, count in sorted(self.size_histogram.items())}
+            }
+
+    def write_summary(self, filename = None):
+        if filename:
+            with open(filename, "w") as summary_file:
+                json.dump(self.summary(), summary_file, indent = 4)
+                summary_file.write("\n")
+        else:
+            json.dump(self.summary(), sys.stderr, indent = 4)
+            sys.stderr.write("\n")
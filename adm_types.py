@@ -1,12 +1,16 @@
+from __future__ import annotations # the annotations refer to numpy, which is only imported when needed
+
 import random
 import re
 import json
-import numpy
+import json.encoder
+import sys
 import math
 import string
 import datetime
 import calendar
 import uuid
+import time
 
 REMOVE_QUOTE_ESCAPE_MARKER = '😃'
 SET_QUOTE_ESCAPE_MARKER = '♡'
@@ -22,6 +26,182 @@ class Settings:
     def set_for_file_load(for_file_load: bool):
         Settings.FOR_FILE_LOAD = for_file_load
 
+# importing numpy takes longer than generating a small dataset, so it is only imported once floats, batches, or pools are needed
+numpy = None
+pending_numpy_seed = None # seed for numpy's global random state that is applied once numpy is needed
+
+def load_numpy():
+    global numpy
+    if numpy is None:
+        import numpy as numpy_module
+        numpy = numpy_module
+
+    return numpy
+
+def seed_numpy(seed: int):
+    global pending_numpy_seed
+    if numpy is None:
+        pending_numpy_seed = seed
+    else:
+        numpy.random.seed(seed) # TODO: legacy (see https://numpy.org/doc/stable/reference/random/generated/numpy.random.seed.html)
+        pending_numpy_seed = None
+
+# numpy's global random state (legacy), seeded with the pending seed if there is one
+def numpy_random():
+    global pending_numpy_seed
+    load_numpy()
+    if pending_numpy_seed is not None:
+        numpy.random.seed(pending_numpy_seed)
+        pending_numpy_seed = None
+
+    return numpy.random
+
+# state of all random number generators (random, numpy's global state, the pools, and the draws from the vocabularies and of the types), e.g.
+# to continue a dataset later, apart from the pools and the drawn types, only picklable builtins and numpy arrays
+def get_random_state():
+    if numpy is None or pending_numpy_seed is not None:
+        numpy_state = ("seed", pending_numpy_seed)
+    else:
+        numpy_state = ("state", numpy.random.get_state())
+    pools = (RandomPrimitiveTypeGenerator.pool_rng, RandomPrimitiveTypeGenerator.pool_size, RandomPrimitiveTypeGenerator.pools)
+    vocabulary_draws = (Vocabularies.draw_seed, Vocabularies.draw_rng, Vocabularies.batches)
+    type_draws = (TypeWeights.draw_seed, TypeWeights.draw_rng, TypeWeights.batches)
+
+    return random.getstate(), numpy_state, pools, vocabulary_draws, type_draws
+
+def set_random_state(state):
+    global pending_numpy_seed
+    random_state, (numpy_state_kind, numpy_state), (pool_rng, pool_size, pools) = state[:3]
+
+    random.setstate(random_state)
+    if numpy_state_kind == "seed":
+        if numpy_state is not None:
+            seed_numpy(numpy_state)
+    else:
+        load_numpy().random.set_state(numpy_state)
+        pending_numpy_seed = None
+
+    RandomPrimitiveTypeGenerator.use_pools(pool_rng, pool_size)
+    RandomPrimitiveTypeGenerator.pools = pools
+    if len(state) > 3: # states saved before there were vocabularies do not have their draws
+        Vocabularies.draw_seed, Vocabularies.draw_rng, Vocabularies.batches = state[3]
+    if len(state) > 4: # nor the types drawn with weights
+        TypeWeights.draw_seed, TypeWeights.draw_rng, TypeWeights.batches = state[4]
+
+# same escaping that json.dumps(..., ensure_ascii = False) applies to strings (including the surrounding quotes)
+encode_json_string = json.encoder.encode_basestring
+
+# random.randint(a, b) is a + randbelow(b - a + 1) and random.randrange(n) is randbelow(n), i.e. they draw the same random bits, but
+# randbelow skips their argument checks, which take most of their time (used by the generate_text methods)
+randbelow = random._inst._randbelow
+
+# formats a plain Python value (e.g. the numerical id that is added to records) the same way json.dumps would
+def format_json_value(val) -> str:
+    if isinstance(val, str):
+        return encode_json_string(val)
+    elif val is None:
+        return "null"
+    elif val is True:
+        return "true"
+    elif val is False:
+        return "false"
+    elif isinstance(val, int):
+        return int.__repr__(val)
+    elif isinstance(val, float):
+        if math.isnan(val):
+            return "NaN"
+        elif math.isinf(val):
+            return "Infinity" if val > 0 else "-Infinity"
+        return float.__repr__(val)
+    else:
+        raise ADMArgumentException("cannot format value of type {type}".format(type = type(val).__name__))
+
+# draws n random strings at once, see ADMString.generate_random_string for the parameters
+def generate_random_strings(rng: numpy.random.Generator, n: int, min_length = 5, max_length = 10, alphabet = list(string.ascii_lowercase)) -> list:
+    load_numpy()
+    lengths = rng.integers(min_length, max_length, endpoint = True, size = n).tolist()
+    symbols = numpy.array(alphabet)
+    choices = symbols[rng.integers(0, len(alphabet), size = sum(lengths))]
+
+    if symbols.dtype == numpy.dtype("U1") and len(choices) > 0:
+        # single character symbols: reinterpret the whole array as one long string and slice it
+        choices = str(choices.view("U{length}".format(length = len(choices)))[0])
+        join = str
+    else:
+        choices = choices.tolist()
+        join = "".join
+
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(join(choices[start:start + length]))
+        start += length
+
+    return strings
+
+SECONDS_PER_DAY = 24 * 60 * 60
+DATETIME_EPOCH = datetime.datetime(datetime.MINYEAR, 1, 1)
+
+# the dates, datetimes, and intervals of batches are drawn as days or seconds since 0001-01-01 (the epoch) between two dates (inclusive,
+# default: the whole range of datetime.date), returns the first and the last day
+def epoch_day_range(min_date = None, max_date = None) -> tuple:
+    first_day = (min_date or datetime.date.min).toordinal() - 1
+    last_day = (max_date or datetime.date.max).toordinal() - 1
+    if first_day > last_day:
+        raise ADMArgumentException("the minimum date {min_date} is after the maximum date {max_date}".format(min_date = min_date, max_date = max_date))
+
+    return first_day, last_day
+
+class TemporalTexts:
+    # lookup tables that the temporal values of batches are formatted with instead of going through datetime and format, e.g.
+    # years[1970] == "1970", month_days[32 * 11 + 30] == "-12-31", hour_minutes[60 * 23 + 59] == "23:59:", and numbers[42] == "42"
+    years = None
+    month_days = None
+    hour_minutes = None
+    seconds = None
+    numbers = None
+
+    @staticmethod
+    def load():
+        if TemporalTexts.years is None:
+            TemporalTexts.years = ["{year:04d}".format(year = year) for year in range(datetime.MAXYEAR + 1)]
+            TemporalTexts.month_days = ["-{month:02d}-{day:02d}".format(month = month, day = day) for month in range(1, 13) for day in range(1, 33)]
+            TemporalTexts.hour_minutes = ["{hour:02d}:{minute:02d}:".format(hour = hour, minute = minute) for hour in range(24) for minute in range(60)]
+            TemporalTexts.seconds = ["{second:02d}".format(second = second) for second in range(60)]
+            TemporalTexts.numbers = [str(number) for number in range(10000)]
+
+        return TemporalTexts
+
+# splits an array of days since the epoch into the years and the indices of month_days (32 * (month - 1) + day - 1)
+def split_epoch_days(days) -> tuple:
+    load_numpy()
+    dates = numpy.datetime64("0001-01-01", "D") + days
+    months = dates.astype("M8[M]")
+    years = dates.astype("M8[Y]").astype(numpy.int64) + 1970
+
+    return years, months.astype(numpy.int64) % 12 * 32 + (dates - months).astype(numpy.int64)
+
+# formats an array of days since the epoch as prefix + "YYYY-MM-DD" + suffix
+def format_epoch_days(days, prefix = "", suffix = "") -> list:
+    texts = TemporalTexts.load()
+    years, month_days = split_epoch_days(days)
+
+    return [prefix + texts.years[year] + texts.month_days[month_day] + suffix for year, month_day in zip(years.tolist(), month_days.tolist())]
+
+# formats an array of seconds of the day as prefix + "HH:MM:SS" + suffix
+def format_day_seconds(seconds, prefix = "", suffix = "") -> list:
+    texts = TemporalTexts.load()
+
+    return [prefix + texts.hour_minutes[hour_minute] + texts.seconds[second] + suffix for hour_minute, second in zip((seconds // 60).tolist(), (seconds % 60).tolist())]
+
+# formats an array of seconds since the epoch as prefix + "YYYY-MM-DDTHH:MM:SS" + suffix
+def format_epoch_seconds(seconds, prefix = "", suffix = "") -> list:
+    texts = TemporalTexts.load()
+    days, seconds = load_numpy().divmod(seconds, SECONDS_PER_DAY)
+    years, month_days = split_epoch_days(days)
+
+    return [prefix + texts.years[year] + texts.month_days[month_day] + "T" + texts.hour_minutes[hour_minute] + texts.seconds[second] + suffix for year, month_day, hour_minute, second in zip(years.tolist(), month_days.tolist(), (seconds // 60).tolist(), (seconds % 60).tolist())]
+
 class ADMJSONEncoder(json.JSONEncoder):
     def default(self, o):
         if getattr(o, "__module__") == __name__:
@@ -30,8 +210,49 @@ class ADMJSONEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, o)
 
 # formats an ADM instance into a string that represents it
+# walks the value tree once and emits the final ADM text directly (see ADMWriter)
+# level is the indentation level the value starts at when pretty printing, e.g. 1 if it is the value of a top level object's member
+def format(adm: object, pretty_print = False, level = 0) -> str:
+    return ADMWriter.get(pretty_print).format(adm, level)
+
+# formats a whole record (including the trailing newline) in one pass
+# if key is given, the value is wrapped into an object with the given key (and the optional (key, value) pairs id_field and key_field as its
+# first members, the value of key_field is a primitive ADM instance, e.g. a primary key)
+def format_record(adm: object, pretty_print = False, key = None, id_field = None, key_field = None) -> str:
+    parts = []
+    writer = ADMWriter.get(pretty_print)
+
+    if key is None:
+        writer.write(adm, parts)
+    else:
+        record = {id_field[0]: id_field[1]} if id_field else {}
+        if key_field:
+            record[key_field[0]] = key_field[1]
+        record[key] = adm
+        writer.write_members(record, parts, 0)
+    parts.append("\n")
+
+    return "".join(parts)
+
+# same as format_record for a value that is already formatted (at level 1 if it is wrapped into an object with the given key)
+def format_record_text(text: str, pretty_print = False, key = None, id_field = None, key_field = None) -> str:
+    if key is None:
+        return text + "\n"
+
+    members = [encode_json_string(id_field[0]) + ": " + format_json_value(id_field[1])] if id_field and id_field[0] != key else []
+    if key_field and key_field[0] != key:
+        members.append(encode_json_string(key_field[0]) + ": " + key_field[1].toADMString())
+    members.append(encode_json_string(key) + ": " + text)
+    if pretty_print:
+        writer = ADMWriter.get(pretty_print)
+        return "{" + writer.newline(1) + ("," + writer.newline(1)).join(members) + writer.newline(0) + "}\n"
+
+    return "{" + ", ".join(members) + "}\n"
+
+# legacy formatter that goes through json.dumps and fixes up the escape markers with regex afterwards
+# kept as a reference for the output of ADMWriter (and for benchmarks/bench_format.py)
 # kind of a hack, probably breaks if you look at it the wrong way
-def format(adm: object, pretty_print = False) -> str:
+def format_with_json_encoder(adm: object, pretty_print = False) -> str:
     adm_string = json.dumps(adm, cls = ADMJSONEncoder, indent = Settings.ADM_INDENTATION if pretty_print else None, ensure_ascii = False)
 
     # replace e.g. "tiny(42)" with tiny("42") through the use of our escape markers that we previously inserted into the strings
@@ -69,6 +290,7 @@ class ADMEscapeMarkerException(ADMArgumentException):
 
 
 class ADMBoolean:
+    __slots__ = ("val",)
     val: bool
 
     def __init__(self, val: bool):
@@ -77,12 +299,25 @@ class ADMBoolean:
     def toADM(self) -> bool:
         return self.val
 
+    def toADMString(self) -> str:
+        return "true" if self.val else "false"
+
     @staticmethod
     def generate_rand():
         # https://stackoverflow.com/a/6824868
         return ADMBoolean(bool(random.getrandbits(1)))
 
+    # the generate_text methods draw the same random numbers as generate_rand and return the toADMString() of its value
+    @staticmethod
+    def generate_text() -> str:
+        return "true" if random.getrandbits(1) else "false"
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMBoolean(val) for val in (rng.random(size = n) < 0.5).tolist()]
+
 class ADMString:
+    __slots__ = ("val",)
     val: str
 
     def __init__(self, val: str):
@@ -91,6 +326,9 @@ class ADMString:
     def toADM(self) -> str:
         return self.val
 
+    def toADMString(self) -> str:
+        return encode_json_string(self.val)
+
     @staticmethod
     def generate_random_string(min_length = 5, max_length = 10, alphabet = list(string.ascii_lowercase)):
         rand_string = ""
@@ -105,7 +343,24 @@ class ADMString:
 
         return ADMString(ADMString.generate_random_string(min_length, max_length, alphabet))
 
+    @staticmethod
+    def generate_random_string_fast(min_length = 5, max_length = 10, alphabet = list(string.ascii_lowercase)):
+        return "".join([str(alphabet[randbelow(len(alphabet))]) for _ in range(min_length + randbelow(max_length - min_length + 1))])
+
+    @staticmethod
+    def generate_text(min_length = 5, max_length = 10, alphabet = list(string.ascii_lowercase)) -> str:
+        ADMEscapeMarkerException.check_alphabet(alphabet)
+
+        return encode_json_string(ADMString.generate_random_string_fast(min_length, max_length, alphabet))
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, min_length = 5, max_length = 10, alphabet = list(string.ascii_lowercase)) -> list:
+        ADMEscapeMarkerException.check_alphabet(alphabet)
+
+        return [ADMString(val) for val in generate_random_strings(rng, n, min_length, max_length, alphabet)]
+
 class AbstractADMNumberBaseType:
+    __slots__ = ("val",)
     min_val = 0
     max_val = 0
     type_specifier = None
@@ -118,13 +373,29 @@ class AbstractADMNumberBaseType:
         if val < self.min_val or val > self.max_val:
             raise ADMArgumentException("{val} is too large for this data type (min: {min_val}, max: {max_val})".format(val = val, min_val = self.min_val, max_val = self.max_val))
 
+    @classmethod
+    def generate_batch(cls, rng: numpy.random.Generator, n: int) -> list:
+        return [cls(val) for val in rng.integers(cls.min_val, cls.max_val, endpoint = True, size = n, dtype = load_numpy().int64).tolist()]
+
+    @classmethod
+    def generate_text(cls) -> str:
+        return cls.type_specifier + "(\"" + str(cls.min_val + randbelow(cls.max_val - cls.min_val + 1)) + "\")"
+
     def toADM(self):
         if self.type_specifier:
             return "{remq}{type_specifier}({setq}{val}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, type_specifier = self.type_specifier, val = self.val)
         else:
             return self.val
 
+    def toADMString(self) -> str:
+        if self.type_specifier:
+            return "{type_specifier}(\"{val}\")".format(type_specifier = self.type_specifier, val = self.val)
+        else:
+            return format_json_value(self.val)
+
 class ADMTinyInt(AbstractADMNumberBaseType):
+    __slots__ = ()
+
     # There is an overflow bug in ADMDataParser::parseIntx where the lowest possible value for the data type is not accepted when loading ADM from a file
     # min_val = -128
     min_val = -127
@@ -140,6 +411,8 @@ class ADMTinyInt(AbstractADMNumberBaseType):
         return ADMTinyInt(random.randint(ADMTinyInt.min_val, ADMTinyInt.max_val))
 
 class ADMSmallInt(AbstractADMNumberBaseType):
+    __slots__ = ()
+
     # There is an overflow bug in ADMDataParser::parseIntx where the lowest possible value for the data type is not accepted when loading ADM from a file
     # min_val = -32768
     min_val = -32767
@@ -155,6 +428,8 @@ class ADMSmallInt(AbstractADMNumberBaseType):
         return ADMSmallInt(random.randint(ADMSmallInt.min_val, ADMSmallInt.max_val))
 
 class ADMInt(AbstractADMNumberBaseType):
+    __slots__ = ()
+
     # There is an overflow bug in ADMDataParser::parseIntx where the lowest possible value for the data type is not accepted when loading ADM from a file
     #min_val = -2147483648
     min_val = -2147483647
@@ -171,6 +446,8 @@ class ADMInt(AbstractADMNumberBaseType):
         return ADMInt(random.randint(ADMInt.min_val, ADMInt.max_val))
 
 class ADMBigInt(AbstractADMNumberBaseType):
+    __slots__ = ()
+
     # There is an overflow bug in ADMDataParser::parseIntx where the lowest possible value for the data type is not accepted when loading ADM from a file
     #min_val = -9223372036854775808
     min_val = -9223372036854775807
@@ -186,14 +463,16 @@ class ADMBigInt(AbstractADMNumberBaseType):
         return ADMBigInt(random.randint(ADMBigInt.min_val, ADMBigInt.max_val))
 
 class AbstractADMFloatingPointBaseType(AbstractADMNumberBaseType):
+    __slots__ = ()
     special_values = [math.nan, math.inf, -math.inf]
 
     def check_range(self, val):
-        if val not in self.special_values:
+        if math.isfinite(val):
             super().check_range(val)
 
     def toADM(self):
-        if self.val not in self.special_values:
+        # not by identity with the special values, values can also come from e.g. a pickled random state
+        if math.isfinite(self.val):
             value = self.val
         elif math.isnan(self.val):
             value = "NaN"
@@ -203,18 +482,56 @@ class AbstractADMFloatingPointBaseType(AbstractADMNumberBaseType):
 
         return "{remq}{type_specifier}({setq}{val}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, type_specifier = self.type_specifier, val = value)
 
+    def toADMString(self) -> str:
+        if math.isfinite(self.val):
+            value = self.val
+        elif math.isnan(self.val):
+            value = "NaN"
+        else:
+            # inf or -inf
+            value = str(self.val).upper()
+
+        return "{type_specifier}(\"{val}\")".format(type_specifier = self.type_specifier, val = value)
+
     @staticmethod
     def generate_rand_special_value() -> float:
         return AbstractADMFloatingPointBaseType.special_values[random.randrange(0, len(AbstractADMFloatingPointBaseType.special_values))]
 
+    special_value_texts = ["NaN", "INF", "-INF"]
+
+    @classmethod
+    def generate_text(cls, special_value_chance = 0.05) -> str:
+        # random.random() is the same number as random.uniform(0, 1)
+        if special_value_chance > 0 and random.random() <= special_value_chance:
+            value = AbstractADMFloatingPointBaseType.special_value_texts[randbelow(len(AbstractADMFloatingPointBaseType.special_values))]
+        else:
+            value = ADMFloat.random_float()
+
+        return "{type_specifier}(\"{val}\")".format(type_specifier = cls.type_specifier, val = value)
+
+    @classmethod
+    def generate_batch(cls, rng: numpy.random.Generator, n: int, special_value_chance = 0.05) -> list:
+        # like ADMDouble.random_double, we only draw from the float range for both floats and doubles
+        values = rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = n).tolist()
+        special_values = AbstractADMFloatingPointBaseType.special_values
+
+        if special_value_chance > 0:
+            special_value_choices = rng.integers(0, len(special_values), size = n).tolist()
+            for i in load_numpy().flatnonzero(rng.random(size = n) <= special_value_chance).tolist():
+                values[i] = special_values[special_value_choices[i]]
+
+        return [cls(val) for val in values]
+
 class ADMFloat(AbstractADMFloatingPointBaseType):
-    min_val = numpy.finfo(numpy.float32).min
-    max_val = numpy.finfo(numpy.float32).max
+    __slots__ = ()
+    # numpy.finfo(numpy.float32).min and max
+    min_val = -3.4028234663852886e+38
+    max_val = 3.4028234663852886e+38
     type_specifier = "float"
 
     @staticmethod
     def random_float():
-        return numpy.random.uniform(ADMFloat.min_val, ADMFloat.max_val)
+        return numpy_random().uniform(ADMFloat.min_val, ADMFloat.max_val)
 
     @staticmethod
     def generate_rand(special_value_chance = 0.05):
@@ -226,8 +543,9 @@ class ADMFloat(AbstractADMFloatingPointBaseType):
             return ADMFloat(ADMFloat.random_float())
 
 class ADMDouble(AbstractADMFloatingPointBaseType):
-    min_val = numpy.finfo(numpy.float64).min
-    max_val = numpy.finfo(numpy.float64).max
+    __slots__ = ()
+    min_val = -sys.float_info.max
+    max_val = sys.float_info.max
     type_specifier = "double"
 
     @staticmethod
@@ -245,6 +563,7 @@ class ADMDouble(AbstractADMFloatingPointBaseType):
             return ADMDouble(ADMDouble.random_double())
 
 class ADMBinary:
+    __slots__ = ("val", "is_hex")
     hex_digits = list("0123456789ABCDEF")
     val: str
     is_hex: bool
@@ -256,6 +575,9 @@ class ADMBinary:
     def toADM(self):
         return "{remq}{type}({setq}{val}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, type = "hex" if self.is_hex else "base64", val = self.val)
 
+    def toADMString(self) -> str:
+        return "{type}(\"{val}\")".format(type = "hex" if self.is_hex else "base64", val = self.val)
+
     @staticmethod
     def generate_rand(num_bytes = 20):
         value = ""
@@ -264,7 +586,19 @@ class ADMBinary:
 
         return ADMBinary(value)
 
+    @staticmethod
+    def generate_text(num_bytes = 20) -> str:
+        return "hex(\"" + "".join([ADMBinary.hex_digits[randbelow(len(ADMBinary.hex_digits))] for _ in range(num_bytes * 2)]) + "\")"
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, num_bytes = 20) -> list:
+        digits = rng.bytes(num_bytes * n).hex().upper()
+        step = num_bytes * 2 # 2 digits per byte
+
+        return [ADMBinary(digits[start:start + step]) for start in range(0, len(digits), step)]
+
 class ADMPoint:
+    __slots__ = ("x", "y")
     x: float
     y: float
 
@@ -275,11 +609,23 @@ class ADMPoint:
     def toADM(self) -> str:
         return "{remq}point({setq}{x}, {y}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, x = self.x, y = self.y)
 
+    def toADMString(self) -> str:
+        return "point(\"{x}, {y}\")".format(x = self.x, y = self.y)
+
     @staticmethod
     def generate_rand():
         return ADMPoint(ADMDouble.random_double(), ADMDouble.random_double())
 
+    @staticmethod
+    def generate_text() -> str:
+        return "point(\"{x}, {y}\")".format(x = ADMDouble.random_double(), y = ADMDouble.random_double())
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMPoint(x, y) for x, y in rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = (n, 2)).tolist()]
+
 class ADMLine:
+    __slots__ = ("x1", "y1", "x2", "y2")
     x1: float
     y1: float
     x2: float
@@ -294,11 +640,23 @@ class ADMLine:
     def toADM(self) -> str:
         return "{remq}line({setq}{x1},{y1} {x2},{y2}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, x1 = self.x1, y1 = self.y1, x2 = self.x2, y2 = self.y2)
 
+    def toADMString(self) -> str:
+        return "line(\"{x1},{y1} {x2},{y2}\")".format(x1 = self.x1, y1 = self.y1, x2 = self.x2, y2 = self.y2)
+
     @staticmethod
     def generate_rand():
         return ADMLine(ADMDouble.random_double(), ADMDouble.random_double(), ADMDouble.random_double(), ADMDouble.random_double())
 
+    @staticmethod
+    def generate_text() -> str:
+        return "line(\"{x1},{y1} {x2},{y2}\")".format(x1 = ADMDouble.random_double(), y1 = ADMDouble.random_double(), x2 = ADMDouble.random_double(), y2 = ADMDouble.random_double())
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMLine(x1, y1, x2, y2) for x1, y1, x2, y2 in rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = (n, 4)).tolist()]
+
 class ADMRectangle:
+    __slots__ = ("x1", "y1", "x2", "y2")
     x1: float
     y1: float
     x2: float
@@ -313,11 +671,24 @@ class ADMRectangle:
     def toADM(self) -> str:
         return "{remq}rectangle({setq}{x1},{y1} {x2},{y2}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, x1 = self.x1, y1 = self.y1, x2 = self.x2, y2 = self.y2)
 
+    def toADMString(self) -> str:
+        return "rectangle(\"{x1},{y1} {x2},{y2}\")".format(x1 = self.x1, y1 = self.y1, x2 = self.x2, y2 = self.y2)
+
     @staticmethod
     def generate_rand():
         return ADMLine(ADMDouble.random_double(), ADMDouble.random_double(), ADMDouble.random_double(), ADMDouble.random_double())
 
+    # a line, like generate_rand
+    @staticmethod
+    def generate_text() -> str:
+        return "line(\"{x1},{y1} {x2},{y2}\")".format(x1 = ADMDouble.random_double(), y1 = ADMDouble.random_double(), x2 = ADMDouble.random_double(), y2 = ADMDouble.random_double())
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMRectangle(x1, y1, x2, y2) for x1, y1, x2, y2 in rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = (n, 4)).tolist()]
+
 class ADMCircle:
+    __slots__ = ("x", "y", "radius")
     x: float
     y: float
     radius: float
@@ -330,11 +701,24 @@ class ADMCircle:
     def toADM(self) -> str:
         return "{remq}circle({setq}{x},{y} {radius}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, x = self.x, y = self.y, radius = self.radius)
 
+    def toADMString(self) -> str:
+        return "circle(\"{x},{y} {radius}\")".format(x = self.x, y = self.y, radius = self.radius)
+
     @staticmethod
     def generate_rand():
         return ADMCircle(ADMDouble.random_double(), ADMDouble.random_double(), ADMDouble.random_double())
 
+    @staticmethod
+    def generate_text() -> str:
+        return "circle(\"{x},{y} {radius}\")".format(x = ADMDouble.random_double(), y = ADMDouble.random_double(), radius = ADMDouble.random_double())
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMCircle(x, y, radius) for x, y, radius in rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = (n, 3)).tolist()]
+
 class ADMPolygon:
+    __slots__ = ("x_values", "y_values")
+
     def __init__(self, x_values, y_values):
         self.x_values = x_values
         self.y_values = y_values
@@ -347,6 +731,9 @@ class ADMPolygon:
 
         return format_string.format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER)
 
+    def toADMString(self) -> str:
+        return "polygon(\"" + " ".join([str(x) + "," + str(y) for x, y in zip(self.x_values, self.y_values)]) + "\")"
+
     @staticmethod
     def generate_rand(max_points = 6):
         x_values = []
@@ -358,13 +745,35 @@ class ADMPolygon:
 
         return ADMPolygon(x_values, y_values)
 
+    @staticmethod
+    def generate_text(max_points = 6) -> str:
+        return "polygon(\"" + " ".join([str(ADMDouble.random_double()) + "," + str(ADMDouble.random_double()) for _ in range(4 + randbelow(max_points - 3))]) + "\")"
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, max_points = 6) -> list:
+        num_points = rng.integers(4, max_points, endpoint = True, size = n).tolist()
+        coordinates = rng.uniform(ADMFloat.min_val, ADMFloat.max_val, size = (2, sum(num_points))).tolist()
+
+        polygons = []
+        start = 0
+        for length in num_points:
+            polygons.append(ADMPolygon(coordinates[0][start:start + length], coordinates[1][start:start + length]))
+            start += length
+
+        return polygons
+
 class ADMDate:
+    __slots__ = ("val",)
+
     def __init__(self, year, month, day):
         self.val = datetime.date(year, month, day)
 
     def toADM(self) -> str:
         return self.val.strftime("{remq}date({setq}{year:0>4}-%m-%d{setq}){remq}").format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, year = self.val.strftime("%Y"))
 
+    def toADMString(self) -> str:
+        return "date(\"{year:04d}-{month:02d}-{day:02d}\")".format(year = self.val.year, month = self.val.month, day = self.val.day)
+
     def generate_rand(min_year = None, max_year = None):
         if not min_year:
             min_year = datetime.MINYEAR
@@ -377,7 +786,48 @@ class ADMDate:
 
         return ADMDate(year, month, day)
 
+    @staticmethod
+    def generate_text(min_year = None, max_year = None) -> str:
+        if not min_year:
+            min_year = datetime.MINYEAR
+        if not max_year:
+            max_year = datetime.MAXYEAR
+
+        year = min_year + randbelow(max_year - min_year + 1)
+        month = 1 + randbelow(12)
+        day = 1 + randbelow(calendar.monthrange(year, month)[1])
+
+        return "date(\"{year:04d}-{month:02d}-{day:02d}\")".format(year = year, month = month, day = day)
+
+    # the dates of batches are uniformly distributed over the days between min_date and max_date
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None):
+        first_day, last_day = epoch_day_range(min_date, max_date)
+
+        return rng.integers(first_day, last_day, endpoint = True, size = n)
+
+    @staticmethod
+    def format_batch(days) -> list:
+        return format_epoch_days(days, "date(\"", "\")")
+
+    @staticmethod
+    def from_batch_value(day: int):
+        date = ADMDate.__new__(ADMDate)
+        date.val = datetime.date.fromordinal(day + 1)
+
+        return date
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return [ADMDate.from_batch_value(day) for day in ADMDate.draw_batch(rng, n, min_date, max_date).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return ADMDate.format_batch(ADMDate.draw_batch(rng, n, min_date, max_date))
+
 class ADMTime:
+    __slots__ = ("val",)
+
     # For our use case, I think it's ok if we ignore ms and timezone info.
     def __init__(self, hours, minutes, seconds):
         self.val = datetime.time(hours, minutes, seconds)
@@ -385,11 +835,41 @@ class ADMTime:
     def toADM(self) -> str:
         return self.val.strftime("{remq}time({setq}%H:%M:%S{setq}){remq}").format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER)
 
+    def toADMString(self) -> str:
+        return "time(\"{hour:02d}:{minute:02d}:{second:02d}\")".format(hour = self.val.hour, minute = self.val.minute, second = self.val.second)
+
     @staticmethod
     def generate_rand():
         return ADMTime(random.randint(0, 23), random.randint(0, 59), random.randint(0, 59))
 
+    @staticmethod
+    def generate_text() -> str:
+        return "time(\"{hour:02d}:{minute:02d}:{second:02d}\")".format(hour = randbelow(24), minute = randbelow(60), second = randbelow(60))
+
+    # times of batches are drawn as seconds of the day
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int):
+        return rng.integers(0, SECONDS_PER_DAY, size = n)
+
+    @staticmethod
+    def format_batch(seconds) -> list:
+        return format_day_seconds(seconds, "time(\"", "\")")
+
+    @staticmethod
+    def from_batch_value(second: int):
+        return ADMTime(second // 3600, second // 60 % 60, second % 60)
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMTime.from_batch_value(second) for second in ADMTime.draw_batch(rng, n).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int) -> list:
+        return ADMTime.format_batch(ADMTime.draw_batch(rng, n))
+
 class ADMDateTime:
+    __slots__ = ("val",)
+
     # For our use case, I think it's ok if we ignore ms and timezone info.
     def __init__(self, years, months, days, hours, minutes, seconds):
         self.val = datetime.datetime(years, months, days, hours, minutes, seconds)
@@ -400,6 +880,9 @@ class ADMDateTime:
     def toADM(self) -> str:
         return self.val.strftime("{remq}datetime({setq}{year:0>4}-%m-%dT%H:%M:%S{setq}){remq}").format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, year = self.val.strftime("%Y"))
 
+    def toADMString(self) -> str:
+        return "datetime(\"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}\")".format(year = self.val.year, month = self.val.month, day = self.val.day, hour = self.val.hour, minute = self.val.minute, second = self.val.second)
+
     @staticmethod
     def generate_rand(min_year = None, max_year = None):
         if not min_year:
@@ -413,7 +896,53 @@ class ADMDateTime:
 
         return ADMDateTime(year, month, day, random.randint(0, 23), random.randint(0, 59), random.randint(0, 59))
 
+    # returns the year as well, for the end of an interval
+    @staticmethod
+    def generate_text_and_year(min_year = None, max_year = None) -> tuple:
+        if not min_year:
+            min_year = datetime.MINYEAR
+        if not max_year:
+            max_year = datetime.MAXYEAR
+
+        year = min_year + randbelow(max_year - min_year + 1)
+        month = 1 + randbelow(12)
+        day = 1 + randbelow(calendar.monthrange(year, month)[1])
+
+        return "datetime(\"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}\")".format(year = year, month = month, day = day, hour = randbelow(24), minute = randbelow(60), second = randbelow(60)), year
+
+    @staticmethod
+    def generate_text(min_year = None, max_year = None) -> str:
+        return ADMDateTime.generate_text_and_year(min_year, max_year)[0]
+
+    # the datetimes of batches are uniformly distributed over the seconds of the days between min_date and max_date
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None):
+        first_day, last_day = epoch_day_range(min_date, max_date)
+
+        return rng.integers(first_day * SECONDS_PER_DAY, (last_day + 1) * SECONDS_PER_DAY, size = n)
+
+    @staticmethod
+    def format_batch(seconds) -> list:
+        return format_epoch_seconds(seconds, "datetime(\"", "\")")
+
+    @staticmethod
+    def from_batch_value(second: int):
+        value = ADMDateTime.__new__(ADMDateTime)
+        value.val = DATETIME_EPOCH + datetime.timedelta(seconds = second)
+
+        return value
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return [ADMDateTime.from_batch_value(second) for second in ADMDateTime.draw_batch(rng, n, min_date, max_date).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return ADMDateTime.format_batch(ADMDateTime.draw_batch(rng, n, min_date, max_date))
+
 class ADMDuration:
+    __slots__ = ("years", "months", "days", "hours", "minutes", "seconds")
+
     # For our use case, I think it's ok if we ignore ms.
     def __init__(self, years, months, days, hours, minutes, seconds):
         self.years = years
@@ -426,11 +955,42 @@ class ADMDuration:
     def toADM(self) -> str:
         return "{remq}duration({setq}P{years}Y{months}M{days}DT{hours}H{minutes}M{seconds}S{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, years = self.years, months = self.months, days = self.days, hours = self.hours, minutes = self.minutes, seconds = self.seconds)
 
+    def toADMString(self) -> str:
+        return "duration(\"P{years}Y{months}M{days}DT{hours}H{minutes}M{seconds}S\")".format(years = self.years, months = self.months, days = self.days, hours = self.hours, minutes = self.minutes, seconds = self.seconds)
+
     @staticmethod
     def generate_rand():
         return ADMDuration(random.randint(1, 99), random.randint(1, 99), random.randint(1, 9999), random.randint(1, 9999), random.randint(1, 9999), random.randint(1, 9999))
 
+    @staticmethod
+    def generate_text() -> str:
+        return "duration(\"P{years}Y{months}M{days}DT{hours}H{minutes}M{seconds}S\")".format(years = 1 + randbelow(99), months = 1 + randbelow(99), days = 1 + randbelow(9999), hours = 1 + randbelow(9999), minutes = 1 + randbelow(9999), seconds = 1 + randbelow(9999))
+
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int):
+        return rng.integers(1, [99, 99, 9999, 9999, 9999, 9999], endpoint = True, size = (n, 6))
+
+    @staticmethod
+    def format_batch(values) -> list:
+        numbers = TemporalTexts.load().numbers
+
+        return ["duration(\"P" + numbers[years] + "Y" + numbers[months] + "M" + numbers[days] + "DT" + numbers[hours] + "H" + numbers[minutes] + "M" + numbers[seconds] + "S\")" for years, months, days, hours, minutes, seconds in values.tolist()]
+
+    @staticmethod
+    def from_batch_value(values: list):
+        return ADMDuration(*values)
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMDuration(*values) for values in ADMDuration.draw_batch(rng, n).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int) -> list:
+        return ADMDuration.format_batch(ADMDuration.draw_batch(rng, n))
+
 class ADMYearMonthDuration:
+    __slots__ = ("years", "months")
+
     def __init__(self, years, months):
         self.years = years
         self.months = months
@@ -443,11 +1003,48 @@ class ADMYearMonthDuration:
 
         return "{remq}{type_specifier}({setq}P{years}Y{months}M{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, type_specifier = type_specifier, years = self.years, months = self.months)
 
+    def toADMString(self) -> str:
+        if Settings.FOR_FILE_LOAD:
+            type_specifier = "year-month-duration"
+        else:
+            type_specifier = "year_month_duration"
+
+        return "{type_specifier}(\"P{years}Y{months}M\")".format(type_specifier = type_specifier, years = self.years, months = self.months)
+
     @staticmethod
     def generate_rand():
         return ADMYearMonthDuration(random.randint(1, 99), random.randint(1, 99))
 
+    @staticmethod
+    def generate_text() -> str:
+        return "{type_specifier}(\"P{years}Y{months}M\")".format(type_specifier = "year-month-duration" if Settings.FOR_FILE_LOAD else "year_month_duration", years = 1 + randbelow(99), months = 1 + randbelow(99))
+
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int):
+        return rng.integers(1, 99, endpoint = True, size = (n, 2))
+
+    @staticmethod
+    def format_batch(values) -> list:
+        numbers = TemporalTexts.load().numbers
+        prefix = "{type_specifier}(\"P".format(type_specifier = "year-month-duration" if Settings.FOR_FILE_LOAD else "year_month_duration")
+
+        return [prefix + numbers[years] + "Y" + numbers[months] + "M\")" for years, months in values.tolist()]
+
+    @staticmethod
+    def from_batch_value(values: list):
+        return ADMYearMonthDuration(*values)
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMYearMonthDuration(years, months) for years, months in ADMYearMonthDuration.draw_batch(rng, n).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int) -> list:
+        return ADMYearMonthDuration.format_batch(ADMYearMonthDuration.draw_batch(rng, n))
+
 class ADMDayTimeDuration:
+    __slots__ = ("days", "hours", "minutes", "seconds")
+
     # For our use case, I think it's ok if we ignore ms.
     def __init__(self, days, hours, minutes, seconds):
         self.days = days
@@ -462,11 +1059,47 @@ class ADMDayTimeDuration:
             type_specifier = "day_time_duration"
         return "{remq}{type_specifier}({setq}P{days}DT{hours}H{minutes}M{seconds}S{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, type_specifier = type_specifier, days = self.days, hours = self.hours, minutes = self.minutes, seconds = self.seconds)
 
+    def toADMString(self) -> str:
+        if Settings.FOR_FILE_LOAD:
+            type_specifier = "day-time-duration"
+        else:
+            type_specifier = "day_time_duration"
+        return "{type_specifier}(\"P{days}DT{hours}H{minutes}M{seconds}S\")".format(type_specifier = type_specifier, days = self.days, hours = self.hours, minutes = self.minutes, seconds = self.seconds)
+
     @staticmethod
     def generate_rand():
         return ADMDayTimeDuration(random.randint(1, 9999), random.randint(1, 9999), random.randint(1, 9999), random.randint(1, 9999))
 
+    @staticmethod
+    def generate_text() -> str:
+        return "{type_specifier}(\"P{days}DT{hours}H{minutes}M{seconds}S\")".format(type_specifier = "day-time-duration" if Settings.FOR_FILE_LOAD else "day_time_duration", days = 1 + randbelow(9999), hours = 1 + randbelow(9999), minutes = 1 + randbelow(9999), seconds = 1 + randbelow(9999))
+
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int):
+        return rng.integers(1, 9999, endpoint = True, size = (n, 4))
+
+    @staticmethod
+    def format_batch(values) -> list:
+        numbers = TemporalTexts.load().numbers
+        prefix = "{type_specifier}(\"P".format(type_specifier = "day-time-duration" if Settings.FOR_FILE_LOAD else "day_time_duration")
+
+        return [prefix + numbers[days] + "DT" + numbers[hours] + "H" + numbers[minutes] + "M" + numbers[seconds] + "S\")" for days, hours, minutes, seconds in values.tolist()]
+
+    @staticmethod
+    def from_batch_value(values: list):
+        return ADMDayTimeDuration(*values)
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        return [ADMDayTimeDuration(*values) for values in ADMDayTimeDuration.draw_batch(rng, n).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int) -> list:
+        return ADMDayTimeDuration.format_batch(ADMDayTimeDuration.draw_batch(rng, n))
+
 class ADMInterval:
+    __slots__ = ("datetime1", "datetime2")
+
     # We just use datetime for simplicity
     def __init__(self, datetime1: ADMDateTime, datetime2: ADMDateTime):
         self.datetime1 = datetime1
@@ -475,6 +1108,9 @@ class ADMInterval:
     def toADM(self) -> str:
         return "{remq}interval({dt1}, {dt2}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, dt1 = self.datetime1.toADM().replace(REMOVE_QUOTE_ESCAPE_MARKER, ""), dt2 = self.datetime2.toADM().replace(REMOVE_QUOTE_ESCAPE_MARKER, ""))
 
+    def toADMString(self) -> str:
+        return "interval({dt1}, {dt2})".format(dt1 = self.datetime1.toADMString(), dt2 = self.datetime2.toADMString())
+
     @staticmethod
     def generate_rand():
         start = ADMDateTime.generate_rand(max_year = datetime.MAXYEAR - 1)
@@ -482,13 +1118,49 @@ class ADMInterval:
 
         return ADMInterval(start, end)
 
+    @staticmethod
+    def generate_text() -> str:
+        start, year = ADMDateTime.generate_text_and_year(max_year = datetime.MAXYEAR - 1)
+
+        return "interval({dt1}, {dt2})".format(dt1 = start, dt2 = ADMDateTime.generate_text(min_year = year))
+
+    # the intervals of batches start at a second between min_date and max_date and end at a second between their start and max_date
+    @staticmethod
+    def draw_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None):
+        load_numpy()
+        starts = ADMDateTime.draw_batch(rng, n, min_date, max_date)
+        ends = rng.integers(starts, (epoch_day_range(min_date, max_date)[1] + 1) * SECONDS_PER_DAY)
+
+        return numpy.stack([starts, ends], axis = 1)
+
+    @staticmethod
+    def format_batch(values) -> list:
+        return [start + ", " + end for start, end in zip(format_epoch_seconds(values[:, 0], "interval(datetime(\"", "\")"), format_epoch_seconds(values[:, 1], "datetime(\"", "\"))"))]
+
+    @staticmethod
+    def from_batch_value(values: list):
+        return ADMInterval(ADMDateTime.from_batch_value(values[0]), ADMDateTime.from_batch_value(values[1]))
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return [ADMInterval.from_batch_value(values) for values in ADMInterval.draw_batch(rng, n, min_date, max_date).tolist()]
+
+    @staticmethod
+    def generate_text_batch(rng: numpy.random.Generator, n: int, min_date = None, max_date = None) -> list:
+        return ADMInterval.format_batch(ADMInterval.draw_batch(rng, n, min_date, max_date))
+
 class ADMUUID:
+    __slots__ = ("uuid",)
+
     def __init__(self, uuid):
         self.uuid = uuid
 
     def toADM(self) -> str:
         return "{remq}uuid({setq}{uuid}{setq}){remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, setq = SET_QUOTE_ESCAPE_MARKER, uuid = self.uuid)
 
+    def toADMString(self) -> str:
+        return "uuid(\"{uuid}\")".format(uuid = self.uuid)
+
     @staticmethod
     def generate_reproducible_uuid() -> str:
         return str(uuid.UUID(int = random.getrandbits(128)))
@@ -497,6 +1169,125 @@ class ADMUUID:
     def generate_rand():
         return ADMUUID(ADMUUID.generate_reproducible_uuid())
 
+    @staticmethod
+    def generate_text() -> str:
+        digits = "{val:032x}".format(val = random.getrandbits(128)) # same as str(uuid.UUID(int = ...)) without the UUID
+
+        return "uuid(\"{a}-{b}-{c}-{d}-{e}\")".format(a = digits[:8], b = digits[8:12], c = digits[12:16], d = digits[16:20], e = digits[20:])
+
+    @staticmethod
+    def generate_batch(rng: numpy.random.Generator, n: int) -> list:
+        # same as str(uuid.UUID(bytes = ...)) for every 16 bytes but without going through the UUID class
+        digits = rng.bytes(16 * n).hex()
+
+        return [ADMUUID("{a}-{b}-{c}-{d}-{e}".format(a = digits[i:i + 8], b = digits[i + 8:i + 12], c = digits[i + 12:i + 16], d = digits[i + 16:i + 20], e = digits[i + 20:i + 32])) for i in range(0, len(digits), 32)]
+
+# draws distinct values with generate_batch(n) until there are n of them, key maps a value to what makes it distinct
+def generate_distinct_values(generate_batch, n: int, key = lambda value: value.val) -> list:
+    values = {}
+    while len(values) < n:
+        for value in generate_batch(n - len(values)):
+            values.setdefault(key(value), value)
+
+    return list(values.values())[:n]
+
+class Vocabulary:
+    # a fixed list of values that are drawn uniformly or following Zipf's law (the k-th value with a probability proportional to
+    # 1 / k ** exponent), many indices at once
+    def __init__(self, values: list, distribution = "uniform", exponent = 1.0):
+        load_numpy()
+        self.values = values
+        self.texts = None # toADMString() of the values, for ADMTextGenerator
+        self.cdf = None
+        if distribution == "zipf":
+            weights = 1.0 / numpy.arange(1, len(values) + 1, dtype = numpy.float64) ** exponent
+            self.cdf = numpy.cumsum(weights) / weights.sum()
+
+    def draw_indices(self, rng: numpy.random.Generator, n: int) -> list:
+        if self.cdf is None:
+            return rng.integers(0, len(self.values), size = n).tolist()
+
+        return numpy.minimum(numpy.searchsorted(self.cdf, rng.random(size = n), side = "right"), len(self.values) - 1).tolist()
+
+    def text(self, index: int) -> str:
+        if self.texts is None:
+            self.texts = [value.toADMString() for value in self.values]
+
+        return self.texts[index]
+
+class Vocabularies:
+    # the vocabularies that the generators draw values from instead of generating new ones, so that the number of distinct field names,
+    # strings, integers, and dates is bounded (e.g. for benchmarking secondary indexes and joins)
+    # a vocabulary is the same for the whole dataset (it only depends on the seed given to configure), the values are drawn in batches from
+    # a generator that is seeded along with the other random number generators (see seed_draws)
+    # the values are shared by all records, i.e. the strings are interned and the ADM instances are created only once
+    FIELD_NAMES = "field names"
+    # the kinds of vocabularies: FIELD_NAMES for the names of the members of objects, the types of the values otherwise
+    kinds = [FIELD_NAMES, ADMString, ADMTinyInt, ADMSmallInt, ADMInt, ADMBigInt, ADMDate]
+
+    vocabularies = {}
+    config = None
+    draw_seed = None
+    draw_rng = None
+    batch_size = 1024
+    batches = {} # kind -> indices that have been drawn but not used yet (in reverse order)
+
+    # sizes: kind -> number of values, every vocabulary is generated from the seed and its kind alone
+    # the dates are drawn between the bounds of date_range (see ADMDate.generate_batch)
+    @staticmethod
+    def configure(seed: int, sizes: dict, distribution = "uniform", exponent = 1.0, date_range = (None, None)):
+        config = (seed, sorted((Vocabularies.kinds.index(kind), size) for kind, size in sizes.items() if size), distribution, exponent, tuple(date_range))
+        if config == Vocabularies.config:
+            return
+
+        load_numpy()
+        vocabularies = {}
+        for index, size in config[1]:
+            kind = Vocabularies.kinds[index]
+            rng = numpy.random.default_rng([seed, index])
+            if kind == Vocabularies.FIELD_NAMES:
+                values = [sys.intern(name) for name in generate_distinct_values(lambda n: generate_random_strings(rng, n), size, key = lambda name: name)]
+            elif kind is ADMDate:
+                first_day, last_day = epoch_day_range(*date_range)
+                values = generate_distinct_values(lambda n: ADMDate.generate_batch(rng, n, *date_range), min(size, last_day - first_day + 1))
+            elif kind is ADMString:
+                values = [ADMString(sys.intern(val)) for val in generate_distinct_values(lambda n: generate_random_strings(rng, n), size, key = lambda val: val)]
+            else:
+                values = generate_distinct_values(lambda n: kind.generate_batch(rng, n), min(size, kind.max_val - kind.min_val + 1))
+            vocabularies[kind] = Vocabulary(values, distribution, exponent)
+
+        Vocabularies.vocabularies = vocabularies
+        Vocabularies.config = config
+        Vocabularies.seed_draws(Vocabularies.draw_seed)
+
+    # restarts the draws from a seed, the generator is only created once a value is drawn
+    @staticmethod
+    def seed_draws(seed):
+        Vocabularies.draw_seed = seed
+        Vocabularies.draw_rng = None
+        Vocabularies.batches = {}
+
+    @staticmethod
+    def draw_index(kind) -> int:
+        batch = Vocabularies.batches.get(kind)
+        if not batch:
+            if Vocabularies.draw_rng is None:
+                Vocabularies.draw_rng = load_numpy().random.default_rng(Vocabularies.draw_seed)
+            batch = Vocabularies.vocabularies[kind].draw_indices(Vocabularies.draw_rng, Vocabularies.batch_size)
+            batch.reverse()
+            Vocabularies.batches[kind] = batch
+
+        return batch.pop()
+
+    @staticmethod
+    def draw(kind):
+        return Vocabularies.vocabularies[kind].values[Vocabularies.draw_index(kind)]
+
+    # the text of a drawn value, see ADMTextGenerator
+    @staticmethod
+    def draw_text(kind) -> str:
+        return Vocabularies.vocabularies[kind].text(Vocabularies.draw_index(kind))
+
 class RandomPrimitiveTypeGenerator:
     primitive_gen = [
             ADMBoolean.generate_rand,
@@ -523,28 +1314,187 @@ class RandomPrimitiveTypeGenerator:
             ADMUUID.generate_rand
         ]
 
+    # same order as primitive_gen, used to fill the pools
+    primitive_types = [
+            ADMBoolean,
+            ADMString,
+            ADMTinyInt,
+            ADMSmallInt,
+            ADMInt,
+            ADMBigInt,
+            ADMFloat,
+            ADMDouble,
+            ADMBinary,
+            ADMPoint,
+            ADMLine,
+            ADMRectangle,
+            ADMCircle,
+            ADMPolygon,
+            ADMDate,
+            ADMTime,
+            ADMDateTime,
+            ADMDuration,
+            ADMYearMonthDuration,
+            ADMDayTimeDuration,
+            ADMInterval,
+            ADMUUID
+        ]
+
+    # if pool_rng is set, values are taken from per-type pools that are filled with pool_size values at once by generate_batch
+    pool_rng = None
+    pool_size = 1024
+    pools = {}
+
+    # the temporal types are drawn as numbers and formatted in bulk (see format_epoch_days), their pools hold (text, number) pairs, so that
+    # generate_text does not need to create the values and both generate_rand and generate_text take the same values from the same pools
+    text_batch_types = {ADMDate, ADMTime, ADMDateTime, ADMDuration, ADMYearMonthDuration, ADMDayTimeDuration, ADMInterval}
+    # adm type -> keyword arguments of its generate_batch/draw_batch, e.g. the bounds of the dates
+    batch_options = {}
+
+    @staticmethod
+    def use_pools(rng: numpy.random.Generator, pool_size = 1024):
+        RandomPrimitiveTypeGenerator.pool_rng = rng
+        RandomPrimitiveTypeGenerator.pool_size = pool_size
+        RandomPrimitiveTypeGenerator.pools = {}
+
+    # bounds (datetime.date, inclusive) of the dates, datetimes, and intervals in the pools
+    @staticmethod
+    def set_date_range(min_date = None, max_date = None):
+        epoch_day_range(min_date, max_date) # fails if the bounds are swapped
+        options = {"min_date": min_date, "max_date": max_date}
+        RandomPrimitiveTypeGenerator.batch_options = {adm_type: options for adm_type in (ADMDate, ADMDateTime, ADMInterval)} if min_date or max_date else {}
+
+    @staticmethod
+    def fill_pool(adm_type) -> list:
+        options = RandomPrimitiveTypeGenerator.batch_options.get(adm_type, {})
+        if adm_type in RandomPrimitiveTypeGenerator.text_batch_types:
+            values = adm_type.draw_batch(RandomPrimitiveTypeGenerator.pool_rng, RandomPrimitiveTypeGenerator.pool_size, **options)
+            pool = list(zip(adm_type.format_batch(values), values.tolist()))
+        else:
+            pool = adm_type.generate_batch(RandomPrimitiveTypeGenerator.pool_rng, RandomPrimitiveTypeGenerator.pool_size, **options)
+        pool.reverse() # so that popping from the end hands out the values in the order they were generated
+        RandomPrimitiveTypeGenerator.pools[adm_type] = pool
+
+        return pool
+
+    @staticmethod
+    def take_from_pool(adm_type):
+        pool = RandomPrimitiveTypeGenerator.pools.get(adm_type) or RandomPrimitiveTypeGenerator.fill_pool(adm_type)
+        if adm_type in RandomPrimitiveTypeGenerator.text_batch_types:
+            return adm_type.from_batch_value(pool.pop()[1])
+
+        return pool.pop()
+
+    # the text of the value that take_from_pool would return
+    @staticmethod
+    def take_text_from_pool(adm_type) -> str:
+        pool = RandomPrimitiveTypeGenerator.pools.get(adm_type) or RandomPrimitiveTypeGenerator.fill_pool(adm_type)
+        if adm_type in RandomPrimitiveTypeGenerator.text_batch_types:
+            return pool.pop()[0]
+
+        return pool.pop().toADMString()
+
+    # generates a value of the given type, from the vocabulary or the pool of the type if there is one
+    @staticmethod
+    def generate_type(adm_type):
+        if Vocabularies.vocabularies and adm_type in Vocabularies.vocabularies:
+            return Vocabularies.draw(adm_type)
+        if RandomPrimitiveTypeGenerator.pool_rng is not None:
+            return RandomPrimitiveTypeGenerator.take_from_pool(adm_type)
+
+        return adm_type.generate_rand()
+
     @staticmethod
     def generate_rand():
-        return RandomPrimitiveTypeGenerator.primitive_gen[random.randrange(len(RandomPrimitiveTypeGenerator.primitive_gen))]()
+        if TypeWeights.tables:
+            return RandomPrimitiveTypeGenerator.generate_type(TypeWeights.draw(TypeWeights.PRIMITIVE))
+
+        choice = random.randrange(len(RandomPrimitiveTypeGenerator.primitive_gen))
+        if Vocabularies.vocabularies and RandomPrimitiveTypeGenerator.primitive_types[choice] in Vocabularies.vocabularies:
+            return Vocabularies.draw(RandomPrimitiveTypeGenerator.primitive_types[choice])
+        if RandomPrimitiveTypeGenerator.pool_rng is not None:
+            return RandomPrimitiveTypeGenerator.take_from_pool(RandomPrimitiveTypeGenerator.primitive_types[choice])
+
+        return RandomPrimitiveTypeGenerator.primitive_gen[choice]()
+
+    # same order as primitive_gen
+    primitive_text_gen = [
+            ADMBoolean.generate_text,
+            ADMString.generate_text,
+            ADMTinyInt.generate_text,
+            ADMSmallInt.generate_text,
+            ADMInt.generate_text,
+            ADMBigInt.generate_text,
+            ADMFloat.generate_text,
+            ADMDouble.generate_text,
+            ADMBinary.generate_text,
+            ADMPoint.generate_text,
+            ADMLine.generate_text,
+            ADMRectangle.generate_text,
+            ADMCircle.generate_text,
+            ADMPolygon.generate_text,
+            ADMDate.generate_text,
+            ADMTime.generate_text,
+            ADMDateTime.generate_text,
+            ADMDuration.generate_text,
+            ADMYearMonthDuration.generate_text,
+            ADMDayTimeDuration.generate_text,
+            ADMInterval.generate_text,
+            ADMUUID.generate_text
+        ]
+
+    # the text of the value that generate_type would return
+    @staticmethod
+    def generate_type_text(adm_type) -> str:
+        if Vocabularies.vocabularies and adm_type in Vocabularies.vocabularies:
+            return Vocabularies.draw_text(adm_type)
+        if RandomPrimitiveTypeGenerator.pool_rng is not None:
+            return RandomPrimitiveTypeGenerator.take_text_from_pool(adm_type)
+
+        return adm_type.generate_text()
+
+    # the text of the value that generate_rand would return, returns (type of the value, text)
+    @staticmethod
+    def generate_text() -> tuple:
+        if TypeWeights.tables:
+            adm_type = TypeWeights.draw(TypeWeights.PRIMITIVE)
+            return adm_type, RandomPrimitiveTypeGenerator.generate_type_text(adm_type)
+
+        choice = randbelow(len(RandomPrimitiveTypeGenerator.primitive_gen))
+        adm_type = RandomPrimitiveTypeGenerator.primitive_types[choice]
+        if Vocabularies.vocabularies and adm_type in Vocabularies.vocabularies:
+            return adm_type, Vocabularies.draw_text(adm_type)
+        if RandomPrimitiveTypeGenerator.pool_rng is not None:
+            return adm_type, RandomPrimitiveTypeGenerator.take_text_from_pool(adm_type)
+
+        return adm_type, RandomPrimitiveTypeGenerator.primitive_text_gen[choice]()
 
 
 
 class ADMNull:
+    __slots__ = ()
     val = None
 
     def toADM(self) -> None:
         return self.val
 
+    def toADMString(self) -> str:
+        return "null"
+
     @staticmethod
     def generate_rand():
         return ADMNull()
 
 class ADMMissing:
+    __slots__ = ()
     val = "missing"
 
     def toADM(self) -> str:
         return "{remq}{val}{remq}".format(remq = REMOVE_QUOTE_ESCAPE_MARKER, val = self.val)
 
+    def toADMString(self) -> str:
+        return self.val
+
     @staticmethod
     def generate_rand():
         return ADMMissing()
@@ -561,6 +1511,8 @@ class RandomIncompleteInformationTypeGenerator:
 
     @staticmethod
     def generate_rand():
+        if TypeWeights.tables:
+            return TypeWeights.generate(TypeWeights.draw(TypeWeights.INCOMPLETE_INFORMATION))
         if Settings.FOR_FILE_LOAD:
             incomplete_gen = RandomIncompleteInformationTypeGenerator.incomplete_gen_for_file_load
         else:
@@ -568,9 +1520,176 @@ class RandomIncompleteInformationTypeGenerator:
 
         return incomplete_gen[random.randrange(len(incomplete_gen))]()
 
+    # the text of the value that generate_rand would return, returns (type of the value, text)
+    @staticmethod
+    def generate_text() -> tuple:
+        if TypeWeights.tables:
+            adm_type = TypeWeights.draw(TypeWeights.INCOMPLETE_INFORMATION)
+            return adm_type, TypeWeights.incomplete_information_texts[adm_type]
+        if Settings.FOR_FILE_LOAD:
+            randbelow(len(RandomIncompleteInformationTypeGenerator.incomplete_gen_for_file_load)) # only null, but generate_rand draws anyway
+            return ADMNull, "null"
+
+        return (ADMNull, "null") if randbelow(len(RandomIncompleteInformationTypeGenerator.incomplete_gen_for_direct_insertion)) == 0 else (ADMMissing, "missing")
+
+class AliasTable:
+    # Vose's alias method: draws the index i with the probability weights[i] / sum(weights) from a uniform index and a uniform number,
+    # i.e. in constant time however many weights there are
+    def __init__(self, weights: list):
+        load_numpy()
+        scaled = [weight * len(weights) / sum(weights) for weight in weights]
+        probabilities = [1.0] * len(weights) # the last ones only differ from 1 by rounding errors
+        aliases = list(range(len(weights)))
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            i = small.pop()
+            j = large[-1]
+            probabilities[i] = scaled[i]
+            aliases[i] = j
+            scaled[j] -= 1 - scaled[i]
+            if scaled[j] < 1:
+                small.append(large.pop())
+
+        self.probabilities = numpy.array(probabilities)
+        self.aliases = numpy.array(aliases)
+
+    def draw_indices(self, rng: numpy.random.Generator, n: int) -> list:
+        indices = rng.integers(0, len(self.aliases), size = n)
+
+        return numpy.where(rng.random(size = n) < self.probabilities[indices], indices, self.aliases[indices]).tolist()
+
+class TypeWeights:
+    # opt-in weights of the types of the generated values (see configure), without them the types are drawn with random as before
+    # the type of a value is drawn from an alias table with the share of the type's category (primitive, incomplete information, or
+    # derived) at the value's level times the weight of the type within its category, the levels are the record (record_shares) and the
+    # members of derived values at every nesting depth (member_shares, the last shares apply to all deeper levels), members that may not
+    # be derived values anymore (max_depth) are drawn from a table of the same level without the derived types
+    # the types are drawn in batches from a generator that is seeded along with the other random number generators (see seed_draws)
+    PRIMITIVE = "primitive"
+    INCOMPLETE_INFORMATION = "incomplete information"
+    DERIVED = "derived"
+    RECORD = "record"
+
+    incomplete_information_texts = {ADMNull: "null", ADMMissing: "missing"}
+
+    tables = {} # key -> (types, AliasTable), empty without weights
+    member_levels = 0
+    config = None
+    draw_seed = None
+    draw_rng = None
+    batch_size = 1024
+    batches = {} # key -> types that have been drawn but not used yet (in reverse order)
+
+    @staticmethod
+    def categories(for_file_load: bool) -> list:
+        return [RandomPrimitiveTypeGenerator.primitive_types, [ADMNull] if for_file_load else [ADMNull, ADMMissing], RandomDerivedTypeGenerator.derived_types]
+
+    # the table of the types with the given shares of the categories (primitive, incomplete information, derived) and weights within them
+    @staticmethod
+    def build_table(weights: dict, shares, for_file_load: bool) -> tuple:
+        types = []
+        type_weights = []
+        for share, category in zip(shares, TypeWeights.categories(for_file_load)):
+            category_weight = sum(weights.get(adm_type, 1) for adm_type in category)
+            for adm_type in category:
+                if share > 0 and weights.get(adm_type, 1) > 0:
+                    types.append(adm_type)
+                    type_weights.append(share * weights.get(adm_type, 1) / category_weight)
+        if not types:
+            return None
+
+        return types, AliasTable(type_weights)
+
+    # key -> (types, AliasTable) for the weights (adm type -> weight, default: 1), the shares of the record (like --shares) and of the members
+    # (a list of shares per nesting depth, default: the shares of RandomDerivedTypeGenerator), fails if a level has no type to draw
+    @staticmethod
+    def build_tables(weights: dict, record_shares, member_shares = None, for_file_load = True) -> dict:
+        if any(weight < 0 for weight in weights.values()) or any(share < 0 for shares in [record_shares] + list(member_shares or []) for share in shares):
+            raise ADMArgumentException("the weights and shares of the types must not be negative")
+        if not member_shares:
+            member_shares = [(RandomDerivedTypeGenerator.PRIMITIVE_TYPE_SHARE, RandomDerivedTypeGenerator.INCOMPLETE_INFORMATION_TYPE_SHARE, RandomDerivedTypeGenerator.DERIVED_TYPE_SHARE)]
+
+        tables = {
+                TypeWeights.PRIMITIVE: TypeWeights.build_table(weights, (1, 0, 0), for_file_load),
+                TypeWeights.INCOMPLETE_INFORMATION: TypeWeights.build_table(weights, (0, 1, 0), for_file_load),
+                TypeWeights.DERIVED: TypeWeights.build_table(weights, (0, 0, 1), for_file_load),
+                TypeWeights.RECORD: TypeWeights.build_table(weights, record_shares, for_file_load)
+            }
+        if tables[TypeWeights.RECORD] is None:
+            raise ADMArgumentException("no type of the records has a positive share and weight")
+        for level, (primitive_share, incomplete_information_share, derived_share) in enumerate(member_shares, 1):
+            tables[level, True] = TypeWeights.build_table(weights, (primitive_share, incomplete_information_share, derived_share), for_file_load)
+            tables[level, False] = TypeWeights.build_table(weights, (primitive_share, incomplete_information_share, 0), for_file_load)
+            if tables[level, False] is None:
+                raise ADMArgumentException("no primitive or incomplete information type of the members at level {level} has a positive share and weight".format(level = level))
+            if tables[level, True] is None:
+                tables[level, True] = tables[level, False]
+
+        return tables
+
+    # weights None and member_shares None go back to drawing the types with random
+    @staticmethod
+    def configure(weights = None, record_shares = (7, 1, 12), member_shares = None, for_file_load = True):
+        config = None
+        if weights is not None or member_shares is not None:
+            config = (sorted((adm_type.__name__, weight) for adm_type, weight in (weights or {}).items()), tuple(record_shares), tuple(tuple(shares) for shares in member_shares or []), for_file_load)
+        if config == TypeWeights.config:
+            return
+
+        TypeWeights.tables = TypeWeights.build_tables(weights or {}, record_shares, member_shares, for_file_load) if config is not None else {}
+        TypeWeights.member_levels = len(member_shares) if member_shares else 1
+        TypeWeights.config = config
+        TypeWeights.seed_draws(TypeWeights.draw_seed)
+
+    # restarts the draws from a seed, the generator is only created once a type is drawn
+    @staticmethod
+    def seed_draws(seed):
+        TypeWeights.draw_seed = seed
+        TypeWeights.draw_rng = None
+        TypeWeights.batches = {}
+
+    @staticmethod
+    def draw(key):
+        batch = TypeWeights.batches.get(key)
+        if not batch:
+            if TypeWeights.tables.get(key) is None:
+                raise ADMArgumentException("no {key} type has a positive weight".format(key = key))
+            if TypeWeights.draw_rng is None:
+                TypeWeights.draw_rng = load_numpy().random.default_rng(TypeWeights.draw_seed)
+            types, table = TypeWeights.tables[key]
+            batch = [types[i] for i in table.draw_indices(TypeWeights.draw_rng, TypeWeights.batch_size)]
+            batch.reverse()
+            TypeWeights.batches[key] = batch
+
+        return batch.pop()
+
+    # the type of a member of a derived value whose members are at the given level (the members of the record's value are at level 1)
+    @staticmethod
+    def draw_member(level: int, may_be_derived: bool):
+        return TypeWeights.draw((min(level, TypeWeights.member_levels), may_be_derived))
+
+    # generates a value of a drawn primitive or incomplete information type
+    @staticmethod
+    def generate(adm_type):
+        if adm_type is ADMNull or adm_type is ADMMissing:
+            return adm_type.generate_rand()
+
+        return RandomPrimitiveTypeGenerator.generate_type(adm_type)
+
+    @staticmethod
+    def generate_text(adm_type) -> str:
+        text = TypeWeights.incomplete_information_texts.get(adm_type)
+        if text is not None:
+            return text
+
+        return RandomPrimitiveTypeGenerator.generate_type_text(adm_type)
+
 
 
 class ADMObject:
+    __slots__ = ("val",)
+
     def __init__(self, val):
         self.val = val
 
@@ -581,24 +1700,12 @@ class ADMObject:
         self.val.update({key: value})
 
     @staticmethod
-    def generate_rand(min_members = 0, max_members = 7, max_depth = 5):
-        val = {}
-        num_members = random.randint(min_members, max_members)
-
-        for i in range(num_members):
-            derived_type_min_members = random.randint(min_members, max_members)
-            derived_type_max_members = random.randint(derived_type_min_members, max_members)
-            derived_type_max_depth = random.randrange(min(1, 0), max_depth) # next level's max_depth is at least 1 smaller than this level's
-
-            # just using i as a key would be boring so we just apend the
-            # current i to __guarantee__ that we have unique keys for this object
-            key = ADMString.generate_random_string() + str(i)
-            value = RandomDerivedTypeGenerator.generate_rand_derived_type_member(derived_type_min_members, derived_type_max_members, derived_type_max_depth)
-            val.update({key: value})
-
-        return ADMObject(val)
+    def generate_rand(min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None):
+        return RandomDerivedTypeGenerator.build(ADMObject, min_members, max_members, max_depth, max_nodes, max_bytes)
 
 class ADMArray:
+    __slots__ = ("val",)
+
     def __init__(self, val):
         self.val = val
 
@@ -606,20 +1713,12 @@ class ADMArray:
         return self.val
 
     @staticmethod
-    def generate_rand(min_members = 0, max_members = 7, max_depth = 5):
-        val = []
-        num_members = random.randint(min_members, max_members)
-
-        for _ in range(num_members):
-            derived_type_min_members = random.randint(min_members, max_members)
-            derived_type_max_members = random.randint(derived_type_min_members, max_members)
-            derived_type_max_depth = random.randrange(min(1, 0), max_depth) # next level's max_depth is at least 1 smaller than this level's
-
-            val.append(RandomDerivedTypeGenerator.generate_rand_derived_type_member(derived_type_min_members, derived_type_max_members, derived_type_max_depth))
-
-        return ADMArray(val)
+    def generate_rand(min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None):
+        return RandomDerivedTypeGenerator.build(ADMArray, min_members, max_members, max_depth, max_nodes, max_bytes)
 
 class ADMMultiset:
+    __slots__ = ("val",)
+
     def __init__(self, val):
         self.val = val
 
@@ -634,18 +1733,8 @@ class ADMMultiset:
         return copy
 
     @staticmethod
-    def generate_rand(min_members = 0, max_members = 7, max_depth = 5):
-        val = []
-        num_members = random.randint(min_members, max_members)
-
-        for _ in range(num_members):
-            derived_type_min_members = random.randint(min_members, max_members)
-            derived_type_max_members = random.randint(derived_type_min_members, max_members)
-            derived_type_max_depth = random.randrange(min(1, 0), max_depth) # next level's max_depth is at least 1 smaller than this level's
-
-            val.append(RandomDerivedTypeGenerator.generate_rand_derived_type_member(derived_type_min_members, derived_type_max_members, derived_type_max_depth))
-
-        return ADMMultiset(val)
+    def generate_rand(min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None):
+        return RandomDerivedTypeGenerator.build(ADMMultiset, min_members, max_members, max_depth, max_nodes, max_bytes)
 
 class RandomDerivedTypeGenerator:
     # likelihood of type category x: (share of x) / (sum of all category shares)
@@ -655,6 +1744,54 @@ class RandomDerivedTypeGenerator:
     DERIVED_TYPE_SHARE = 7
     SUM_SHARES = SUM_SHARES_NON_DERIVED_TYPE + DERIVED_TYPE_SHARE
     NUM_DERIVED_TYPES = 3
+    # draws of a name from the vocabulary before a name that the object already has gets the member's index appended
+    MAX_KEY_DRAWS = 8
+
+    # same order as derived_type_choice
+    derived_types = [ADMObject, ADMArray, ADMMultiset]
+
+    # type name -> seconds, while set, build charges the time of generating each member (without its own members) to its type
+    timings = None
+
+    # approximate number of characters of a primitive value in the output, used for max_bytes
+    estimated_sizes = {
+            ADMBoolean: 5,
+            ADMTinyInt: 11,
+            ADMSmallInt: 14,
+            ADMInt: 19,
+            ADMBigInt: 28,
+            ADMFloat: 30,
+            ADMDouble: 31,
+            ADMBinary: 47,
+            ADMPoint: 55,
+            ADMLine: 99,
+            ADMRectangle: 99,
+            ADMCircle: 78,
+            ADMDate: 18,
+            ADMTime: 16,
+            ADMDateTime: 31,
+            ADMDuration: 39,
+            ADMYearMonthDuration: 30,
+            ADMDayTimeDuration: 43,
+            ADMInterval: 74,
+            ADMUUID: 44,
+            ADMNull: 4,
+            ADMMissing: 7
+        }
+
+    @staticmethod
+    def estimated_size(adm) -> int:
+        cls = type(adm)
+        if cls is ADMString:
+            return len(adm.val) + 2
+        elif cls is ADMPolygon:
+            return 11 + 46 * len(adm.x_values)
+        elif cls is ADMMultiset:
+            return 4
+        elif cls is ADMObject or cls is ADMArray:
+            return 2
+        else:
+            return RandomDerivedTypeGenerator.estimated_sizes.get(cls, 32)
 
     @staticmethod
     def generate_rand_derived_type_member(derived_type_min_members = 0, derived_type_max_members = 7, derived_type_max_depth = 5):
@@ -670,15 +1807,336 @@ class RandomDerivedTypeGenerator:
         else:
             return RandomDerivedTypeGenerator.generate_rand(derived_type_min_members, derived_type_max_members, derived_type_max_depth)
 
+    # name of the i-th member of an object
+    @staticmethod
+    def generate_key(members: dict, i: int) -> str:
+        vocabulary = Vocabularies.vocabularies.get(Vocabularies.FIELD_NAMES)
+        if vocabulary is not None:
+            if len(members) >= len(vocabulary.values):
+                # more members than names, the names from the vocabulary only consist of letters, so appending i keeps them unique
+                return Vocabularies.draw(Vocabularies.FIELD_NAMES) + str(i)
+            # bounded, with a skewed distribution the names that are still unused may hardly ever be drawn
+            for _ in range(RandomDerivedTypeGenerator.MAX_KEY_DRAWS):
+                key = Vocabularies.draw(Vocabularies.FIELD_NAMES)
+                if key not in members:
+                    return key
+            return key + str(i)
+
+        # just using i as a key would be boring so we just apend the
+        # current i to __guarantee__ that we have unique keys for this object
+        return ADMString.generate_random_string() + str(i)
+
+    # creates an empty derived value of the given type with a random number of members
+    # returns the value and its stack frame for build: [members (dict or list), is object, min_members, max_members, max_depth, number of members,
+    # index of the next member, level of the members (see TypeWeights)]
+    @staticmethod
+    def open_derived(adm_type, min_members, max_members, max_depth, level = 1):
+        num_members = random.randint(min_members, max_members)
+        members = {} if adm_type is ADMObject else []
+
+        return adm_type(members), [members, adm_type is ADMObject, min_members, max_members, max_depth, num_members, 0, level]
+
+    # generates a derived value of the given type with an explicit stack instead of recursion, so the depth is not limited by the recursion limit
+    # without max_nodes and max_bytes, the random numbers are drawn in the same order as by generating every member with
+    # generate_rand_derived_type_member, i.e. the values are the same as the ones of the recursive generator
+    # once another member would exceed max_nodes values or an estimated max_bytes characters in the (compact) output, the value is
+    # cut off there, i.e. none of the derived values that are still open get any more members
+    @staticmethod
+    def build(adm_type, min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None):
+        weighted = bool(TypeWeights.tables)
+        timings = RandomDerivedTypeGenerator.timings
+        root, frame = RandomDerivedTypeGenerator.open_derived(adm_type, min_members, max_members, max_depth)
+        stack = [frame]
+        nodes = 1
+        size = RandomDerivedTypeGenerator.estimated_size(root)
+
+        while stack:
+            frame = stack[-1]
+            members, is_object, min_members, max_members, max_depth, num_members, i, level = frame
+            if i == num_members:
+                stack.pop()
+                continue
+            frame[6] = i + 1
+            if timings is not None:
+                start = time.perf_counter()
+
+            derived_type_min_members = random.randint(min_members, max_members)
+            derived_type_max_members = random.randint(derived_type_min_members, max_members)
+            derived_type_max_depth = random.randrange(min(1, 0), max_depth) # next level's max_depth is at least 1 smaller than this level's
+
+            key = RandomDerivedTypeGenerator.generate_key(members, i) if is_object else None
+
+            child_frame = None
+            if weighted:
+                value_type = TypeWeights.draw_member(level, derived_type_max_depth > 0)
+                if value_type in RandomDerivedTypeGenerator.derived_types:
+                    value, child_frame = RandomDerivedTypeGenerator.open_derived(value_type, derived_type_min_members, derived_type_max_members, derived_type_max_depth, level + 1)
+                else:
+                    value = TypeWeights.generate(value_type)
+            else:
+                # same as generate_rand_derived_type_member, apart from opening derived values instead of generating them recursively
+                if derived_type_max_depth > 0:
+                    choice = random.randint(1, RandomDerivedTypeGenerator.SUM_SHARES)
+                else:
+                    choice = random.randint(1, RandomDerivedTypeGenerator.SUM_SHARES_NON_DERIVED_TYPE)
+
+                if RandomDerivedTypeGenerator.PRIMITIVE_TYPE_SHARE > 0 and choice <= RandomDerivedTypeGenerator.PRIMITIVE_TYPE_SHARE:
+                    value = RandomPrimitiveTypeGenerator.generate_rand()
+                elif choice <= RandomDerivedTypeGenerator.SUM_SHARES_NON_DERIVED_TYPE:
+                    value = RandomIncompleteInformationTypeGenerator.generate_rand()
+                else:
+                    derived_type = RandomDerivedTypeGenerator.derived_types[random.randint(1, RandomDerivedTypeGenerator.NUM_DERIVED_TYPES) - 1]
+                    value, child_frame = RandomDerivedTypeGenerator.open_derived(derived_type, derived_type_min_members, derived_type_max_members, derived_type_max_depth, level + 1)
+
+            if max_nodes is not None or max_bytes is not None:
+                nodes += 1
+                size += RandomDerivedTypeGenerator.estimated_size(value) + 2 + (len(key) + 4 if is_object else 0) # separator and key
+                if (max_nodes is not None and nodes > max_nodes) or (max_bytes is not None and size > max_bytes):
+                    break
+
+            if is_object:
+                members[key] = value
+            else:
+                members.append(value)
+
+            if child_frame is not None:
+                stack.append(child_frame)
+
+            if timings is not None:
+                timings[type(value).__name__] += time.perf_counter() - start
+
+        return root
+
     @staticmethod
-    def generate_rand(min_members = 0, max_members = 7, max_depth = 5):
+    def generate_rand(min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None):
+        if TypeWeights.tables:
+            return RandomDerivedTypeGenerator.build(TypeWeights.draw(TypeWeights.DERIVED), min_members, max_members, max_depth, max_nodes, max_bytes)
+
         derived_type_choice = random.randint(1, RandomDerivedTypeGenerator.NUM_DERIVED_TYPES)
 
-        if derived_type_choice == 1:
-            deriv = ADMObject.generate_rand(min_members, max_members, max_depth)
-        elif derived_type_choice == 2:
-            deriv = ADMArray.generate_rand(min_members, max_members, max_depth)
+        return RandomDerivedTypeGenerator.build(RandomDerivedTypeGenerator.derived_types[derived_type_choice - 1], min_members, max_members, max_depth, max_nodes, max_bytes)
+
+    # same as estimated_size for the value with the given type and text
+    @staticmethod
+    def estimated_text_size(adm_type, text) -> int:
+        if adm_type is ADMString:
+            return len(text) # the generated strings do not need to be escaped
+        elif adm_type is ADMPolygon:
+            return 11 + 46 * (text.count(" ") + 1)
+        elif adm_type is ADMMultiset:
+            return 4
+        elif adm_type is ADMObject or adm_type is ADMArray:
+            return 2
         else:
-            deriv = ADMMultiset.generate_rand(min_members, max_members, max_depth)
+            return RandomDerivedTypeGenerator.estimated_sizes.get(adm_type, 32)
 
-        return deriv
+    derived_type_brackets = {ADMObject: ("{", "}"), ADMArray: ("[", "]"), ADMMultiset: ("{{", "}}")}
+
+    # opens a derived value of the given type in target (the list of parts that its text is written to) like open_derived
+    # returns its stack frame for write_text: [target, index of the opening bracket in target, closing bracket, is object, min_members,
+    # max_members, max_depth, number of members, index of the next member, level, keys (of an object), number of written members, level of the
+    # members (see TypeWeights, the level above is the indentation)]
+    @staticmethod
+    def open_text(adm_type, target: list, writer, level, min_members, max_members, max_depth, member_level = 1) -> list:
+        num_members = min_members + randbelow(max_members - min_members + 1)
+        opening, closing = RandomDerivedTypeGenerator.derived_type_brackets[adm_type]
+        target.append(opening + writer.newline(level + 1) if writer.pretty_print else opening)
+
+        return [target, len(target) - 1, closing, adm_type is ADMObject, min_members, max_members, max_depth, num_members, 0, level, set() if adm_type is ADMObject else None, 0, member_level]
+
+    # closes a derived value opened by open_text, members are (key, text) pairs that are added after the last member
+    @staticmethod
+    def close_text(frame: list, writer, members = None):
+        target, opening_index, closing, level, written = frame[0], frame[1], frame[2], frame[9], frame[11]
+        for key, text in members or ():
+            if written:
+                target.append("," + writer.newline(level + 1) if writer.pretty_print else ", ")
+            target.append(encode_json_string(key) + ": " + text)
+            written += 1
+
+        if written == 0:
+            target[opening_index] = target[opening_index].rstrip() + closing # without the newline of the first member
+        else:
+            target.append(writer.newline(level) + closing if writer.pretty_print else closing)
+
+    # fused version of build: appends the text of the value that build would return straight to parts (see ADMWriter, level is the
+    # indentation level the value starts at) without creating any ADM instances, the random numbers are the same and drawn in the same order
+    # root_members are (key, text) pairs that replace the root object's members with the same keys or are added after its last member, the
+    # same as ADMObject.add_key (in their order) before formatting
+    @staticmethod
+    def write_text(adm_type, parts: list, writer, level = 0, min_members = 0, max_members = 7, max_depth = 5, max_nodes = None, max_bytes = None, root_members = None):
+        pretty_print = writer.pretty_print
+        root_members = dict(root_members) if root_members else None
+        field_names = Vocabularies.vocabularies.get(Vocabularies.FIELD_NAMES)
+        limited = max_nodes is not None or max_bytes is not None
+        weighted = bool(TypeWeights.tables)
+        primitive_share = RandomDerivedTypeGenerator.PRIMITIVE_TYPE_SHARE
+        non_derived_shares = RandomDerivedTypeGenerator.SUM_SHARES_NON_DERIVED_TYPE
+
+        root = RandomDerivedTypeGenerator.open_text(adm_type, parts, writer, level, min_members, max_members, max_depth)
+        stack = [root]
+        nodes = 1
+        size = RandomDerivedTypeGenerator.estimated_text_size(adm_type, None)
+
+        while stack:
+            frame = stack[-1]
+            target, _, _, is_object, min_members, max_members, max_depth, num_members, i, level, keys, written, member_level = frame
+            if i == num_members:
+                RandomDerivedTypeGenerator.close_text(frame, writer, root_members.items() if frame is root and root_members else None)
+                stack.pop()
+                continue
+            frame[8] = i + 1
+
+            derived_type_min_members = min_members + randbelow(max_members - min_members + 1)
+            derived_type_max_members = derived_type_min_members + randbelow(max_members - derived_type_min_members + 1)
+            derived_type_max_depth = randbelow(max_depth)
+
+            key = None
+            if is_object:
+                key = RandomDerivedTypeGenerator.generate_key(keys, i) if field_names is not None else ADMString.generate_random_string_fast() + str(i)
+
+            text = None
+            if weighted:
+                value_type = TypeWeights.draw_member(member_level, derived_type_max_depth > 0)
+                if value_type not in RandomDerivedTypeGenerator.derived_types:
+                    text = TypeWeights.generate_text(value_type)
+            else:
+                if derived_type_max_depth > 0:
+                    choice = 1 + randbelow(RandomDerivedTypeGenerator.SUM_SHARES)
+                else:
+                    choice = 1 + randbelow(non_derived_shares)
+
+                if primitive_share > 0 and choice <= primitive_share:
+                    value_type, text = RandomPrimitiveTypeGenerator.generate_text()
+                elif choice <= non_derived_shares:
+                    value_type, text = RandomIncompleteInformationTypeGenerator.generate_text()
+                else:
+                    value_type = RandomDerivedTypeGenerator.derived_types[randbelow(RandomDerivedTypeGenerator.NUM_DERIVED_TYPES)]
+
+            if limited:
+                nodes += 1
+                size += RandomDerivedTypeGenerator.estimated_text_size(value_type, text) + 2 + (len(key) + 4 if is_object else 0)
+                if (max_nodes is not None and nodes > max_nodes) or (max_bytes is not None and size > max_bytes):
+                    if text is None:
+                        randbelow(derived_type_max_members - derived_type_min_members + 1) # the number of members that open_derived draws
+                    break
+
+            if written:
+                target.append("," + writer.newline(level + 1) if pretty_print else ", ")
+            frame[11] = written + 1
+            value_target = target
+            if is_object:
+                keys.add(key)
+                target.append(encode_json_string(key) + ": ")
+                if frame is root and root_members and key in root_members:
+                    target.append(root_members.pop(key)) # not added again when the root is closed
+                    value_target = [] # the value is generated all the same, but not written
+
+            if text is not None:
+                value_target.append(text)
+            else:
+                stack.append(RandomDerivedTypeGenerator.open_text(value_type, value_target, writer, level + 1, derived_type_min_members, derived_type_max_members, derived_type_max_depth, member_level + 1))
+
+        # cut off, close the values that are still open
+        while stack:
+            frame = stack.pop()
+            RandomDerivedTypeGenerator.close_text(frame, writer, root_members.items() if frame is root and root_members else None)
+
+
+
+class ADMWriter:
+    # writes the final ADM text of a value tree in a single pass
+    # the output is the same as the one of format_with_json_encoder(), i.e. json.dumps' separators and indentation
+    def __init__(self, pretty_print = False, indentation = None):
+        self.pretty_print = pretty_print
+        self.indentation = Settings.ADM_INDENTATION if indentation is None else indentation
+        self.newlines = []
+
+    # writers are stateless apart from their cache of indentations, so format() shares one per configuration
+    instances = {}
+
+    @staticmethod
+    def get(pretty_print = False):
+        key = (pretty_print, Settings.ADM_INDENTATION)
+        writer = ADMWriter.instances.get(key)
+        if writer is None:
+            writer = ADMWriter.instances[key] = ADMWriter(pretty_print)
+
+        return writer
+
+    def newline(self, level) -> str:
+        # "\n" followed by the indentation for the given level, cached since we need the same few levels over and over again
+        while len(self.newlines) <= level:
+            self.newlines.append("\n" + " " * (self.indentation * len(self.newlines)))
+
+        return self.newlines[level]
+
+    def format(self, adm, level = 0) -> str:
+        parts = []
+        self.write(adm, parts, level)
+
+        return "".join(parts)
+
+    def write(self, adm, parts: list, level = 0):
+        cls = type(adm)
+
+        if cls is ADMObject:
+            self.write_members(adm.val, parts, level)
+        elif cls is ADMArray:
+            self.write_sequence(adm.val, "[", "]", parts, level)
+        elif cls is ADMMultiset:
+            self.write_sequence(adm.val, "{{", "}}", parts, level)
+        elif cls.__module__ == __name__:
+            parts.append(adm.toADMString())
+        elif isinstance(adm, dict):
+            self.write_members(adm, parts, level)
+        elif isinstance(adm, (list, tuple)):
+            self.write_sequence(adm, "[", "]", parts, level)
+        else:
+            parts.append(format_json_value(adm))
+
+    def write_members(self, members: dict, parts: list, level):
+        if not members:
+            parts.append("{}")
+            return
+
+        if self.pretty_print:
+            separator = "," + self.newline(level + 1)
+            parts.append("{" + self.newline(level + 1))
+        else:
+            separator = ", "
+            parts.append("{")
+
+        first = True
+        for key, value in members.items():
+            if first:
+                first = False
+            else:
+                parts.append(separator)
+            parts.append(encode_json_string(key if isinstance(key, str) else str(key)))
+            parts.append(": ")
+            self.write(value, parts, level + 1)
+
+        parts.append(self.newline(level) + "}" if self.pretty_print else "}")
+
+    def write_sequence(self, members: list, opening: str, closing: str, parts: list, level):
+        if not members:
+            parts.append(opening + closing)
+            return
+
+        if self.pretty_print:
+            separator = "," + self.newline(level + 1)
+            parts.append(opening + self.newline(level + 1))
+        else:
+            separator = ", "
+            parts.append(opening)
+
+        first = True
+        for value in members:
+            if first:
+                first = False
+            else:
+                parts.append(separator)
+            self.write(value, parts, level + 1)
+
+        parts.append(self.newline(level) + closing if self.pretty_print else closing)
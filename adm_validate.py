@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+
+import re
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import time
+import bisect
+import calendar
+import argparse
+import contextlib
+import adm_output
+import adm_types
+
+# validates ADM records (compact or pretty printed) independently of the code that formatted them: every record has to be an object of
+# well-formed strings, numbers, objects, arrays, multisets ({{ }}), and typed constructors such as int8("42"), point("x, y"), or
+# interval(datetime("..."), datetime("...")), with valid UTF-8 and without any escape marker of the legacy formatter
+# works on bytes, so that the errors can be reported with the exact byte offsets of the bad records
+
+DEFAULT_CHUNK_BYTES = 1 << 24
+DEFAULT_MAX_ERRORS = 100
+
+NUMBER = rb"-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+POINT = NUMBER + rb" ?, ?" + NUMBER
+DATE = rb"(-?[0-9]{4,})-([0-9]{2})-([0-9]{2})"
+TIME = rb"([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.[0-9]{1,3})?(?:Z|[+-][0-9]{2}:[0-9]{2})?"
+YEAR_MONTH = rb"(?:[0-9]+Y)?(?:[0-9]+M)?"
+DAY_TIME = rb"(?:[0-9]+D)?(?:T(?:[0-9]+H)?(?:[0-9]+M)?(?:[0-9]+(?:\.[0-9]+)?S)?)?"
+
+# constructor name -> regex of its literal
+LITERAL_REGEXES = {
+        "point": re.compile(POINT),
+        "line": re.compile(POINT + rb" " + POINT),
+        "rectangle": re.compile(POINT + rb" " + POINT),
+        "circle": re.compile(POINT + rb" " + NUMBER),
+        "polygon": re.compile(POINT + rb"(?: " + POINT + rb"){2,}"),
+        "date": re.compile(DATE),
+        "time": re.compile(TIME),
+        "datetime": re.compile(DATE + rb"T" + TIME),
+        "duration": re.compile(rb"-?P" + YEAR_MONTH + DAY_TIME),
+        "year-month-duration": re.compile(rb"-?P" + YEAR_MONTH),
+        "day-time-duration": re.compile(rb"-?P" + DAY_TIME),
+        "uuid": re.compile(rb"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+        "hex": re.compile(rb"(?:[0-9a-fA-F]{2})*"),
+        "base64": re.compile(rb"(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?"),
+        "string": re.compile(rb"[^\"]*")
+    }
+INTEGER_TYPES = {"int8": adm_types.ADMTinyInt, "int16": adm_types.ADMSmallInt, "int32": adm_types.ADMInt, "int64": adm_types.ADMBigInt}
+FLOATING_POINT_TYPES = {"float": adm_types.ADMFloat, "double": adm_types.ADMDouble}
+SPECIAL_FLOATING_POINT_LITERALS = (b"NaN", b"INF", b"-INF")
+
+# the literals of the fast path of TOKEN_REGEX are already well-formed, only ranges and the days of months are checked afterwards
+FAST_DATE = rb"-?[0-9]{4,}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])"
+FAST_TIME = rb"(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](?:\.[0-9]{1,3})?(?:Z|[+-][0-9]{2}:[0-9]{2})?"
+FAST_LITERALS = [
+        rb"point\(\"" + POINT + rb"\"\)",
+        rb"(?:line|rectangle)\(\"" + POINT + rb" " + POINT + rb"\"\)",
+        rb"circle\(\"" + POINT + rb" " + NUMBER + rb"\"\)",
+        rb"polygon\(\"" + POINT + rb"(?: " + POINT + rb"){2,}\"\)",
+        rb"time\(\"" + FAST_TIME + rb"\"\)",
+        rb"duration\(\"-?P" + YEAR_MONTH + DAY_TIME + rb"\"\)",
+        rb"year[-_]month[-_]duration\(\"-?P" + YEAR_MONTH + rb"\"\)",
+        rb"day[-_]time[-_]duration\(\"-?P" + DAY_TIME + rb"\"\)",
+        rb"uuid\(\"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\"\)",
+        rb"hex\(\"(?:[0-9a-fA-F]{2})*\"\)"
+    ]
+FAST_INTERVAL_BOUNDS = [rb"date\(\"" + FAST_DATE + rb"\"\)", rb"time\(\"" + FAST_TIME + rb"\"\)", rb"datetime\(\"" + FAST_DATE + rb"T" + FAST_TIME + rb"\"\)"]
+STRING = rb"\"[^\"\\\x00-\x1f]*(?:\\(?:[\"\\/bfnrt]|u[0-9a-fA-F]{4})[^\"\\\x00-\x1f]*)*\""
+
+# one token with the comma and the key that may precede it, the alternatives are ordered by how often they occur in generated records
+TOKEN_REGEX = re.compile(rb"[ \t\r\n]*(?P<comma>,[ \t\r\n]*)?(?:(?P<key>" + STRING + rb")[ \t\r\n]*:[ \t\r\n]*)?(?:"
+        + rb"(?P<string>" + STRING + rb")"
+        + rb"|(?P<simple>" + rb"|".join(FAST_LITERALS) + rb")"
+        + rb"|(?P<int>int(?P<int_bits>8|16|32|64)\(\"(?P<int_literal>-?[0-9]+)\"\))"
+        + rb"|(?P<float>(?P<float_type>float|double)\(\"(?P<float_literal>" + NUMBER + rb"|NaN|-?INF)\"\))"
+        + rb"|(?P<date>date\(\"" + FAST_DATE + rb"\"\)|datetime\(\"" + FAST_DATE + rb"T" + FAST_TIME + rb"\"\))"
+        + rb"|(?P<interval>interval\((?:" + rb"|".join(bound + rb", ?" + bound for bound in FAST_INTERVAL_BOUNDS) + rb")\))"
+        + rb"|(?P<keyword>(?:true|false|null|missing)(?![0-9A-Za-z_]))"
+        + rb"|(?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?(?![0-9A-Za-z_.]))"
+        + rb"|(?P<multiset>\{\{)"
+        + rb"|(?P<object>\{)"
+        + rb"|(?P<array>\[)"
+        + rb"|(?P<close>[}\]])"
+        + rb"|(?P<constructor>[a-z][a-z0-9_-]*\()" # anything else that looks like a constructor is checked by check_constructor
+        + rb"|(?P<end>\Z)"
+        + rb")")
+
+DATE_REGEX = re.compile(DATE)
+FIELD_REGEX = re.compile(STRING + rb"[ \t\r\n]*:[ \t\r\n]*")
+CONSTRUCTOR_REGEX = re.compile(rb"([a-z][a-z0-9_-]*)\(\"([^\"\\\x00-\x1f]*)\"\)")
+INTERVAL_REGEX = re.compile(rb"interval\(([a-z]+\(\"[^\"]*\"\)), ?([a-z]+\(\"[^\"]*\"\))\)")
+INTEGER_BOUNDS = {name[len("int"):].encode("ascii"): (adm_type.min_val, adm_type.max_val) for name, adm_type in INTEGER_TYPES.items()}
+FLOATING_POINT_BOUNDS = {name.encode("ascii"): (float(adm_type.min_val), float(adm_type.max_val)) for name, adm_type in FLOATING_POINT_TYPES.items()}
+
+# records start with "{" at the beginning of a line (the lines of pretty printed records are indented, and strings cannot contain newlines)
+RECORD_START_REGEX = re.compile(rb"^\{", re.M)
+ESCAPE_MARKER_REGEX = re.compile(b"|".join(re.escape(marker.encode("utf-8")) for marker in (adm_types.REMOVE_QUOTE_ESCAPE_MARKER, adm_types.SET_QUOTE_ESCAPE_MARKER, adm_types.REPLACE_MULTISET_BRACES_ESCAPE_MARKER)))
+
+DECOMPRESSORS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+def check_date(match, group = 1) -> str:
+    year, month, day = int(match.group(group)), int(match.group(group + 1)), int(match.group(group + 2))
+    if not 1 <= month <= 12:
+        return "invalid month {month}".format(month = month)
+    days = calendar.mdays[month] + (month == 2 and calendar.isleap(year))
+    if not 1 <= day <= days:
+        return "invalid day {day}".format(day = day)
+
+    return None
+
+def check_time(match, group = 1) -> str:
+    hours, minutes, seconds = int(match.group(group)), int(match.group(group + 1)), int(match.group(group + 2))
+    if hours > 23 or minutes > 59 or seconds > 59:
+        return "invalid time of day"
+
+    return None
+
+# checks the days of the months of the dates in a token that passed the fast path
+def check_dates(token: bytes) -> str:
+    for match in DATE_REGEX.finditer(token):
+        if match.group(3) >= b"29":
+            message = check_date(match)
+            if message:
+                return message
+
+    return None
+
+# checks the literal of a typed constructor, returns an error message or None
+# the names can also be the ones of the constructor functions of SQL++ (e.g. day_time_duration instead of day-time-duration, see -d)
+def check_literal(name: bytes, literal: bytes) -> str:
+    name = name.decode("ascii").replace("_", "-")
+
+    if name in INTEGER_TYPES:
+        adm_type = INTEGER_TYPES[name]
+        if not re.fullmatch(rb"-?[0-9]+", literal):
+            return "invalid {name} '{literal}'".format(name = name, literal = literal.decode("utf-8", "replace"))
+        if not adm_type.min_val <= int(literal) <= adm_type.max_val:
+            return "{name} '{literal}' out of range".format(name = name, literal = literal.decode("ascii"))
+        return None
+
+    if name in FLOATING_POINT_TYPES:
+        if literal in SPECIAL_FLOATING_POINT_LITERALS:
+            return None
+        if not re.fullmatch(NUMBER, literal):
+            return "invalid {name} '{literal}'".format(name = name, literal = literal.decode("utf-8", "replace"))
+        adm_type = FLOATING_POINT_TYPES[name]
+        if not float(adm_type.min_val) <= float(literal) <= float(adm_type.max_val):
+            return "{name} '{literal}' out of range".format(name = name, literal = literal.decode("ascii"))
+        return None
+
+    regex = LITERAL_REGEXES.get(name)
+    if regex is None:
+        return "unknown constructor '{name}'".format(name = name)
+    match = regex.fullmatch(literal)
+    if match is None or (name.endswith("duration") and literal.rstrip(b"T").endswith(b"P")):
+        return "invalid {name} '{literal}'".format(name = name, literal = literal.decode("utf-8", "replace"))
+
+    if name == "date":
+        return check_date(match)
+    elif name == "time":
+        return check_time(match)
+    elif name == "datetime":
+        return check_date(match) or check_time(match, 4)
+
+    return None
+
+# the slow path for a constructor at data[offset:] that did not pass the fast path of TOKEN_REGEX, returns (end of the constructor, error message or None)
+def check_constructor(data: bytes, offset: int, end: int) -> tuple:
+    match = INTERVAL_REGEX.match(data, offset, end)
+    if match is not None:
+        bounds = [CONSTRUCTOR_REGEX.fullmatch(bound) for bound in match.groups()]
+        if bounds[0] is None or bounds[1] is None:
+            return match.end(), "invalid interval"
+        if bounds[0].group(1) not in (b"date", b"time", b"datetime") or bounds[0].group(1) != bounds[1].group(1):
+            return match.end(), "the bounds of an interval must be two dates, times, or datetimes"
+        return match.end(), check_literal(*bounds[0].groups()) or check_literal(*bounds[1].groups())
+
+    match = CONSTRUCTOR_REGEX.match(data, offset, end)
+    if match is None:
+        return offset, "invalid constructor '{text}'".format(text = data[offset:min(end, offset + 40)].decode("utf-8", "replace"))
+
+    return match.end(), check_literal(*match.groups())
+
+# the kinds of nested values on the stack of validate_record
+OBJECT, ARRAY, MULTISET = range(3)
+CONTAINERS = {"object": OBJECT, "array": ARRAY, "multiset": MULTISET}
+CHECKED_VALUES = {"int", "float", "date", "interval", "constructor"}
+
+# validates the record in data[start:end], returns None or (offset of the error, message)
+# nested values are tracked with an explicit stack, so arbitrarily deep records do not hit the recursion limit
+def validate_record(data: bytes, start = 0, end = None):
+    end = len(data) if end is None else end
+    match_token = TOKEN_REGEX.match
+
+    stack = [] # (kind, number of members, keys) of the values that contain the current one
+    kind = None # of the innermost object, array, or multiset (None before and after the record)
+    members = 0
+    keys = None
+    done = False
+    position = start
+
+    while True:
+        match = match_token(data, position, end)
+        if match is None:
+            return position, "unexpected '{text}'".format(text = data[position:position + 20].strip().decode("utf-8", "replace"))
+
+        token = match.lastgroup
+        comma, key = match.group("comma", "key")
+        position = match.end()
+
+        if token == "close" or token == "end":
+            offset = match.start(token)
+            if comma is not None or key is not None:
+                return offset, "missing value" if key is not None else "unexpected ','"
+            if token == "end":
+                return None if done else (offset, "incomplete record")
+            if data[offset] == 0x5d: # ]
+                if kind != ARRAY:
+                    return offset, "unexpected ']'"
+            elif kind == MULTISET:
+                if data[position:position + 1] != b"}":
+                    return offset, "multiset not closed with '}}'"
+                position += 1
+            elif kind != OBJECT:
+                return offset, "unexpected '}'"
+            kind, members, keys = stack.pop() if stack else (None, 0, None)
+            done = kind is None
+            members += 1
+            continue
+
+        # everything else is a value, i.e. needs to be at the position of a value
+        if kind == OBJECT:
+            if key is None:
+                field = FIELD_REGEX.match(data, match.start(token), end) # the field name is fine, but its value is not
+                if field is not None:
+                    return field.end(), "invalid value '{text}'".format(text = data[field.end():min(end, field.end() + 20)].decode("utf-8", "replace"))
+                return match.start(token), "missing field name"
+            if key in keys:
+                return match.start("key"), "duplicate field {key}".format(key = key.decode("utf-8", "replace"))
+            keys.add(key)
+        elif key is not None:
+            return match.start("key"), "unexpected field {key}".format(key = key.decode("utf-8", "replace"))
+        elif kind is None:
+            if done:
+                return match.start(token), "unexpected data after the record"
+            if token != "object" or comma is not None:
+                return match.start(token), "a record has to be an object"
+        if (comma is not None) != (members > 0):
+            return match.start(), "missing ','" if members > 0 else "unexpected ','"
+
+        if token in CONTAINERS:
+            stack.append((kind, members, keys))
+            kind = CONTAINERS[token]
+            members = 0
+            keys = set() if kind == OBJECT else None
+            continue
+
+        if token in CHECKED_VALUES:
+            offset = match.start(token)
+            if token == "int":
+                low, high = INTEGER_BOUNDS[match.group("int_bits")]
+                if not low <= int(match.group("int_literal")) <= high:
+                    return offset, "{token} out of range".format(token = match.group("int").decode("ascii"))
+            elif token == "float":
+                literal = match.group("float_literal")
+                if literal not in SPECIAL_FLOATING_POINT_LITERALS:
+                    low, high = FLOATING_POINT_BOUNDS[match.group("float_type")]
+                    if not low <= float(literal) <= high:
+                        return offset, "{token} out of range".format(token = match.group("float").decode("ascii"))
+            elif token == "constructor":
+                position, message = check_constructor(data, offset, end)
+                if message:
+                    return offset, message
+            else:
+                message = check_dates(match.group(token))
+                if message:
+                    return offset, message
+
+        members += 1
+
+# validates the records in data (which starts at a record boundary at offset base in the file)
+# returns (number of records, number of bytes, [(offset of the record, index of the record in data, offset of the error, message)])
+def validate_chunk(data: bytes, base = 0) -> tuple:
+    starts = [match.start() for match in RECORD_START_REGEX.finditer(data)]
+    if not starts or data[:starts[0]].strip():
+        starts.insert(0, 0) # anything before the first record is invalid on its own
+    ends = starts[1:] + [len(data)]
+
+    errors = {}
+    for index, (start, end) in enumerate(zip(starts, ends)):
+        error = validate_record(data, start, end)
+        if error is not None:
+            errors[index] = error
+
+    # text and escape markers can only be checked for the whole chunk at once, their errors are assigned to the records they occur in
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            try:
+                data[start:end].decode("utf-8")
+            except UnicodeDecodeError as e:
+                errors.setdefault(index, (start + e.start, "invalid UTF-8"))
+    for match in ESCAPE_MARKER_REGEX.finditer(data):
+        index = bisect.bisect_right(starts, match.start()) - 1
+        errors.setdefault(index, (match.start(), "escape marker {marker} left over".format(marker = match.group().decode("utf-8"))))
+
+    num_records = sum(1 for start, end in zip(starts, ends) if data[start:end].strip())
+    return num_records, len(data), [(base + starts[index], index, base + offset, message) for index, (offset, message) in sorted(errors.items())]
+
+def validate_file_chunk(chunk) -> tuple:
+    filename, start, end = chunk
+    with open(filename, "rb") as input_file:
+        input_file.seek(start)
+        return validate_chunk(input_file.read(end - start), start)
+
+# splits an uncompressed file into chunks of about chunk_bytes that start at record boundaries
+def chunk_boundaries(filename: str, chunk_bytes = DEFAULT_CHUNK_BYTES) -> list:
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, "rb") as input_file:
+        while boundaries[-1] + chunk_bytes < size:
+            input_file.seek(boundaries[-1] + chunk_bytes)
+            position = input_file.tell()
+            while True:
+                block = input_file.read(1 << 16)
+                found = block.find(b"\n{")
+                if found >= 0:
+                    position += found + 1
+                    break
+                if len(block) < 1 << 16:
+                    position = size
+                    break
+                position += len(block) - 1 # a newline at the end of the block may belong to a boundary
+                input_file.seek(position)
+            if position >= size:
+                break
+            boundaries.append(position)
+
+    return [(filename, start, end) for start, end in zip(boundaries, boundaries[1:] + [size])]
+
+# reads a compressed file in chunks of about chunk_bytes (uncompressed) that start at record boundaries, yields (data, offset)
+def read_compressed_chunks(filename: str, compression: str, chunk_bytes = DEFAULT_CHUNK_BYTES):
+    opener = DECOMPRESSORS[compression]
+    offset = 0
+    rest = b""
+    with opener(filename, "rb") as input_file:
+        while True:
+            block = input_file.read(chunk_bytes)
+            if not block:
+                break
+            data = rest + block
+            boundary = data.rfind(b"\n{") + 1
+            if boundary <= 0:
+                rest = data
+                continue
+            yield data[:boundary], offset
+            offset += boundary
+            rest = data[boundary:]
+    if rest:
+        yield rest, offset
+
+def validate_compressed_chunk(chunk) -> tuple:
+    data, offset = chunk
+    return validate_chunk(data, offset)
+
+class ValidationResult:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.records = 0
+        self.bytes = 0
+        self.invalid_records = 0
+        self.errors = [] # (record number, offset of the record, offset of the error, message), at most max_errors
+
+# validates a file (compressed by extension) in chunks with a pool of worker processes, the errors are collected in the order of the file
+def validate_file(filename: str, workers = None, chunk_bytes = DEFAULT_CHUNK_BYTES, max_errors = DEFAULT_MAX_ERRORS) -> ValidationResult:
+    result = ValidationResult(filename)
+    compression = adm_output.resolve_compression(filename)
+    if compression == "none":
+        chunks, validate = chunk_boundaries(filename, chunk_bytes), validate_file_chunk
+    else:
+        chunks, validate = read_compressed_chunks(filename, compression, chunk_bytes), validate_compressed_chunk
+
+    import multiprocessing
+    with contextlib.ExitStack() as stack:
+        if (workers or os.cpu_count()) == 1:
+            results = map(validate, chunks)
+        else:
+            pool = stack.enter_context(multiprocessing.Pool(workers))
+            results = pool.imap(validate, chunks) # in order, so the record numbers can be counted
+
+        for num_records, num_bytes, errors in results:
+            for record_offset, index, offset, message in errors:
+                result.invalid_records += 1
+                if len(result.errors) < max_errors:
+                    result.errors.append((result.records + index + 1, record_offset, offset, message))
+            result.records += num_records
+            result.bytes += num_bytes
+
+    return result
+
+class ValidatingRecordWriter:
+    # validates the records on their way to the output (e.g. a BufferedRecordWriter) and reports invalid records as soon as they are generated
+    # with their id and offset in the (uncompressed) stream of records, close() raises an ADMOutputException if there were any
+    def __init__(self, output, report_stream = sys.stderr, max_errors = DEFAULT_MAX_ERRORS):
+        self.output = output
+        self.report_stream = report_stream
+        self.max_errors = max_errors
+        self.bytes_validated = 0
+        self.invalid_records = 0
+
+    def validate(self, id: int, record: str):
+        data = record.encode("utf-8")
+        error = validate_record(data)
+        marker = ESCAPE_MARKER_REGEX.search(data)
+        if error is None and marker is not None:
+            error = marker.start(), "escape marker {marker} left over".format(marker = marker.group().decode("utf-8"))
+
+        if error is not None:
+            self.invalid_records += 1
+            if self.invalid_records <= self.max_errors:
+                print("invalid record {id} at offset {record_offset}: {message} (at offset {offset})".format(id = id, record_offset = self.bytes_validated, message = error[1], offset = self.bytes_validated + error[0]), file = self.report_stream, flush = True)
+        self.bytes_validated += len(data)
+
+    def write_record(self, id: int, record: str):
+        self.validate(id, record)
+        return self.output.write_record(id, record)
+
+    def write_records(self, first_id: int, records: list):
+        for id, record in enumerate(records, first_id):
+            self.validate(id, record)
+        return self.output.write_records(first_id, records)
+
+    def close(self):
+        if self.invalid_records:
+            raise adm_output.ADMOutputException("{records} invalid record(s) were generated".format(records = self.invalid_records))
+
+@contextlib.contextmanager
+def open_validation(output, report_stream = sys.stderr):
+    writer = ValidatingRecordWriter(output, report_stream)
+    yield writer
+    writer.close() # only once all records are written, an exception while generating them is not replaced
+
+
+
+argparser = argparse.ArgumentParser(description = "validates ADM files (e.g. written by generator.py) before they are loaded and reports the byte offsets of invalid records")
+argparser.add_argument("files", help = "ADM files (compressed files by their extension, i.e. .gz, .bz2, or .xz)", metavar = "FILE", nargs = "+")
+argparser.add_argument("-w", "--workers", help = "number of worker processes that validate the chunks (default: one per CPU)", type = int, default = None)
+argparser.add_argument("--chunk-bytes", help = "number of bytes per chunk", type = int, default = DEFAULT_CHUNK_BYTES)
+argparser.add_argument("--max-errors", help = "maximum number of invalid records that are reported per file", type = int, default = DEFAULT_MAX_ERRORS)
+
+def main():
+    args = argparser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        argparser.error("argument -w/--workers must be at least 1")
+    if args.chunk_bytes < 1:
+        argparser.error("argument --chunk-bytes must be at least 1")
+
+    valid = True
+    for filename in args.files:
+        start = time.perf_counter()
+        try:
+            result = validate_file(filename, args.workers, args.chunk_bytes, args.max_errors)
+        except OSError as e:
+            argparser.exit(2, "{prog}: error: {error}\n".format(prog = argparser.prog, error = e))
+        elapsed = time.perf_counter() - start
+
+        for record, record_offset, offset, message in result.errors:
+            print("{filename}: record {record} at offset {record_offset}: {message} (at offset {offset})".format(filename = filename, record = record, record_offset = record_offset, message = message, offset = offset))
+        if result.invalid_records > len(result.errors):
+            print("{filename}: ... and {more} more invalid record(s)".format(filename = filename, more = result.invalid_records - len(result.errors)))
+        print("{filename}: {records} records ({mb:.2f} MB), {invalid} invalid, in {seconds:.2f} s | {mb_per_second:.2f} MB/s".format(filename = filename, records = result.records, mb = result.bytes / 1e6, invalid = result.invalid_records, seconds = elapsed, mb_per_second = result.bytes / elapsed / 1e6 if elapsed > 0 else 0.0), file = sys.stderr, flush = True)
+        valid = valid and result.invalid_records == 0
+
+    sys.exit(0 if valid else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+# compares the native ADMWriter (adm_types.format) with the legacy json.dumps + regex formatter (adm_types.format_with_json_encoder)
+
+import os
+import sys
+import time
+import random
+import argparse
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import adm_types
+
+
+
+argparser = argparse.ArgumentParser()
+argparser.add_argument("-n", "--num-values", help = "the number of derived values to be formatted", type = int, default = 5000)
+argparser.add_argument("-s", "--seed", help = "seed for random number generator", type = int, default = 42)
+argparser.add_argument("-r", "--repeat", help = "number of timed repetitions (the best one is reported)", type = int, default = 3)
+args = argparser.parse_args()
+
+random.seed(args.seed)
+numpy.random.seed(int(random.getrandbits(4 * 8)))
+values = [adm_types.RandomDerivedTypeGenerator.generate_rand() for _ in range(args.num_values)]
+
+def bench(format_function, pretty_print):
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        output = [format_function(value, pretty_print) for value in values]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, output
+
+for pretty_print in [False, True]:
+    legacy_time, legacy_output = bench(adm_types.format_with_json_encoder, pretty_print)
+    native_time, native_output = bench(adm_types.format, pretty_print)
+
+    if legacy_output != native_output:
+        sys.exit("output of adm_types.format differs from adm_types.format_with_json_encoder (pretty print: {pp})".format(pp = pretty_print))
+
+    num_bytes = sum(len(s.encode("utf-8")) for s in native_output)
+    print("{mode:>7}: legacy {legacy:8.1f} values/s {legacy_mb:7.2f} MB/s | native {native:8.1f} values/s {native_mb:7.2f} MB/s | speedup {speedup:.2f}x".format(
+        mode = "pretty" if pretty_print else "compact",
+        legacy = args.num_values / legacy_time, legacy_mb = num_bytes / legacy_time / 1e6,
+        native = args.num_values / native_time, native_mb = num_bytes / native_time / 1e6,
+        speedup = legacy_time / native_time))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# measures the memory footprint of generated record trees: allocated blocks and bytes per record and peak memory while
+# generating a batch of records that are all kept alive at the same time
+
+import os
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import adm_types
+
+
+
+argparser = argparse.ArgumentParser()
+argparser.add_argument("-n", "--num-values", help = "the number of derived values to be generated", type = int, default = 5000)
+argparser.add_argument("-s", "--seed", help = "seed for random number generator", type = int, default = 42)
+args = argparser.parse_args()
+
+random.seed(args.seed)
+numpy.random.seed(int(random.getrandbits(4 * 8)))
+adm_types.RandomDerivedTypeGenerator.generate_rand() # warm up caches so that they are not counted
+
+tracemalloc.start()
+before = tracemalloc.take_snapshot()
+values = [adm_types.RandomDerivedTypeGenerator.generate_rand() for _ in range(args.num_values)]
+after = tracemalloc.take_snapshot()
+_, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+statistics = after.compare_to(before, "filename")
+allocated_blocks = sum(statistic.count_diff for statistic in statistics)
+allocated_bytes = sum(statistic.size_diff for statistic in statistics)
+
+json.dump({
+        "values": args.num_values,
+        "blocks_per_value": allocated_blocks / args.num_values,
+        "bytes_per_value": allocated_bytes / args.num_values,
+        "peak_bytes": peak
+    }, sys.stdout, indent = 4)
+sys.stdout.write("\n")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+# benchmark suite for the generation and serialization throughput
+# measures every primitive type's generate_rand and toADMString, adm_types.format (compact and pretty printed),
+# end-to-end runs of generator.py for several shares and numbers of records, and the startup of generator.py
+# writes the results as JSON and optionally compares them with a stored baseline
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, os.pardir)
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+import adm_types
+
+SUITES = ["types", "format", "end_to_end", "startup"]
+END_TO_END_SHARES = {
+        "default": [7, 1, 12],
+        "primitive": [1, 0, 0],
+        "derived": [0, 0, 1]
+    }
+
+
+
+argparser = argparse.ArgumentParser()
+argparser.add_argument("-s", "--suite", help = "run only these suites (default: all)", choices = SUITES, nargs = "+", default = SUITES)
+argparser.add_argument("-n", "--num-values", help = "the number of values per primitive type and the number of derived values to be formatted", type = int, default = 20000)
+argparser.add_argument("--scales", help = "numbers of records for the end-to-end runs", type = int, nargs = "+", default = [1000, 10000])
+argparser.add_argument("--fixture-size", help = "number of records of the small datasets in the startup benchmarks", type = int, default = 100)
+argparser.add_argument("--seed", help = "seed for random number generator", type = int, default = 42)
+argparser.add_argument("-r", "--repeat", help = "number of timed repetitions (the best one is reported)", type = int, default = 3)
+argparser.add_argument("-o", "--output", help = "write the results to this JSON file (stdout if not specified)", type = str)
+argparser.add_argument("-b", "--baseline", help = "compare the results with this JSON file from a previous run", type = str)
+argparser.add_argument("-t", "--tolerance", help = "relative slowdown compared to the baseline that is reported as a regression", type = float, default = 0.1)
+argparser.add_argument("--fail-on-regression", help = "exit with status 1 if there is a regression", action = "store_true")
+
+def seed(seed_value):
+    random.seed(seed_value)
+    numpy.random.seed(int(random.getrandbits(4 * 8)))
+
+# runs function repetitions times and returns the shortest time as well as the result of the last run
+def best_time(function, repetitions):
+    best = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+def throughput(num_values, num_bytes, elapsed) -> dict:
+    return {
+            "values_per_s": num_values / elapsed,
+            "mb_per_s": num_bytes / elapsed / 1e6,
+            "seconds": elapsed
+        }
+
+def bench_types(args) -> dict:
+    results = {}
+
+    for adm_type in adm_types.RandomPrimitiveTypeGenerator.primitive_types:
+        seed(args.seed)
+        generate_time, values = best_time(lambda: [adm_type.generate_rand() for _ in range(args.num_values)], args.repeat)
+        format_time, strings = best_time(lambda: [value.toADMString() for value in values], args.repeat)
+        num_bytes = sum(len(s.encode("utf-8")) for s in strings)
+        batch_time, _ = best_time(lambda: adm_type.generate_batch(numpy.random.default_rng(args.seed), args.num_values), args.repeat)
+
+        results["types.{name}.generate_rand".format(name = adm_type.__name__)] = throughput(args.num_values, num_bytes, generate_time)
+        results["types.{name}.generate_batch".format(name = adm_type.__name__)] = throughput(args.num_values, num_bytes, batch_time)
+        results["types.{name}.toADMString".format(name = adm_type.__name__)] = throughput(args.num_values, num_bytes, format_time)
+
+        # the temporal types can also be drawn and formatted in bulk without creating the values
+        if hasattr(adm_type, "generate_text_batch"):
+            text_batch_time, _ = best_time(lambda: adm_type.generate_text_batch(numpy.random.default_rng(args.seed), args.num_values), args.repeat)
+            results["types.{name}.generate_text_batch".format(name = adm_type.__name__)] = throughput(args.num_values, num_bytes, text_batch_time)
+
+    return results
+
+def bench_format(args) -> dict:
+    results = {}
+
+    seed(args.seed)
+    values = [adm_types.RandomDerivedTypeGenerator.generate_rand() for _ in range(args.num_values)]
+
+    for pretty_print in [False, True]:
+        mode = "pretty" if pretty_print else "compact"
+        for name, format_function in [("format", adm_types.format), ("format_with_json_encoder", adm_types.format_with_json_encoder)]:
+            elapsed, strings = best_time(lambda: [format_function(value, pretty_print) for value in values], args.repeat)
+            num_bytes = sum(len(s.encode("utf-8")) for s in strings)
+            results["format.{name}.{mode}".format(name = name, mode = mode)] = throughput(len(values), num_bytes, elapsed)
+
+    return results
+
+def bench_end_to_end(args) -> dict:
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "output.adm")
+
+        for shares_name, shares in END_TO_END_SHARES.items():
+            for scale in args.scales:
+                command = [sys.executable, os.path.join(REPOSITORY_DIRECTORY, "generator.py"), "-n", str(scale), "-s", str(args.seed), "-c"] + [str(share) for share in shares] + ["-o", output]
+                elapsed, _ = best_time(lambda: subprocess.run(command, check = True), args.repeat)
+                results["end_to_end.{shares}.n{scale}".format(shares = shares_name, scale = scale)] = throughput(scale, os.path.getsize(output), elapsed)
+
+    return results
+
+# startup of the command line tool (a process per dataset) compared with generating the same small dataset in-process with the library API
+def bench_startup(args) -> dict:
+    results = {}
+    generator_path = os.path.join(REPOSITORY_DIRECTORY, "generator.py")
+
+    elapsed, _ = best_time(lambda: subprocess.run([sys.executable, "-c", "import generator"], cwd = REPOSITORY_DIRECTORY, check = True), args.repeat)
+    results["startup.import"] = throughput(1, 0, elapsed)
+    elapsed, _ = best_time(lambda: subprocess.run([sys.executable, generator_path, "-n", "0"], check = True), args.repeat)
+    results["startup.cli.n0"] = throughput(1, 0, elapsed)
+
+    elapsed, output = best_time(lambda: subprocess.run([sys.executable, generator_path, "-n", str(args.fixture_size), "-s", str(args.seed)], check = True, capture_output = True).stdout, args.repeat)
+    results["startup.cli.n{size}".format(size = args.fixture_size)] = throughput(args.fixture_size, len(output), elapsed)
+
+    import generator
+    elapsed, records = best_time(lambda: "".join(generator.generate_records(args.fixture_size, rng = args.seed)), args.repeat)
+    results["startup.library.n{size}".format(size = args.fixture_size)] = throughput(args.fixture_size, len(records.encode("utf-8")), elapsed)
+
+    return results
+
+# compares the values/s of every benchmark that is in both result sets, returns the regressions
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+
+    for name in sorted(set(results) & set(baseline)):
+        ratio = results[name]["values_per_s"] / baseline[name]["values_per_s"]
+        status = "REGRESSION" if ratio < 1 - tolerance else ("improvement" if ratio > 1 + tolerance else "")
+        print("{name:<60} {ratio:6.2f}x {status}".format(name = name, ratio = ratio, status = status), file = sys.stderr)
+
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+
+    return regressions
+
+def main():
+    args = argparser.parse_args()
+
+    results = {}
+    suites = {"types": bench_types, "format": bench_format, "end_to_end": bench_end_to_end, "startup": bench_startup}
+    for suite in args.suite:
+        print("running {suite} benchmarks".format(suite = suite), file = sys.stderr)
+        results.update(suites[suite](args))
+
+    report = {
+            "meta": {
+                    "python": platform.python_version(),
+                    "numpy": numpy.__version__,
+                    "platform": platform.platform(),
+                    "num_values": args.num_values,
+                    "seed": args.seed
+                },
+            "results": results
+        }
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent = 4)
+            output_file.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent = 4)
+        sys.stdout.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file)["results"], args.tolerance)
+
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
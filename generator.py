@@ -2,88 +2,1023 @@
 
 import random
 import adm_types
-import numpy
+import adm_output
+import adm_stats
+import adm_schema
+import adm_query
+import adm_cache
+import adm_keys
 import argparse
-import re
-import sys
+import datetime
+import time
+import hashlib
+import collections
 import contextlib
+import itertools
+import json
+import math
+import io
+import os
+import sys
+import re
+import copy
+import pickle
+
+# adm_feed (asyncio) and multiprocessing are only imported when they are used, importing them would take longer than generating a small dataset
 
 
+SIZE_UNITS = {"": 1, "k": 10 ** 3, "m": 10 ** 6, "g": 10 ** 9, "t": 10 ** 12, "ki": 1 << 10, "mi": 1 << 20, "gi": 1 << 30, "ti": 1 << 40}
+DEFAULT_ESTIMATE_RECORDS = 5000
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+# parses a number of bytes with an optional unit, e.g. "1000", "500MB", "10GiB"
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([kmgt]i?)?b?\s*", text, re.I)
+    if not match:
+        raise argparse.ArgumentTypeError("invalid size '{text}' (e.g. 1000, 500MB, 10GiB)".format(text = text))
+
+    return int(float(match.group(1)) * SIZE_UNITS[(match.group(2) or "").lower()])
 
 argparser = argparse.ArgumentParser()
-argparser.add_argument("-n", "--num-records", help = "the number of records to be generated", type = int, required = True)
+argparser.add_argument("-n", "--num-records", help = "the number of records to be generated", type = int, default = None)
+argparser.add_argument("--target-bytes", help = "generate records until the output has at least this many (uncompressed) bytes, e.g. 10GiB (alternative to --num-records)", metavar = "SIZE", type = parse_size, default = None)
+argparser.add_argument("--estimate", help = "do not write the dataset, but generate SAMPLE records (default: {records}) and print the predicted bytes per record, total size, and generation time as JSON".format(records = DEFAULT_ESTIMATE_RECORDS), metavar = "SAMPLE", type = int, nargs = "?", const = DEFAULT_ESTIMATE_RECORDS, default = None)
 argparser.add_argument("-o", "--output", help = "output file, stdout if not specified", type = str)
+argparser.add_argument("--compress", help = "compress the output (default: chosen by the extension of the output file, i.e. .gz, .bz2, or .xz)", choices = adm_output.COMPRESSIONS, default = None)
+argparser.add_argument("--buffer-size", help = "number of bytes that are collected before they are handed to the (compressing) writer thread", type = int, default = adm_output.DEFAULT_BUFFER_SIZE)
+argparser.add_argument("--partitions", help = "distribute the records over this many files (requires --output), e.g. one per AsterixDB partition", type = int, default = 1)
+argparser.add_argument("--partition-by", help = "how records are assigned to partitions", choices = adm_output.PARTITIONINGS, default = "hash")
+argparser.add_argument("--max-file-bytes", help = "start a new file for a partition once it would exceed this many (uncompressed) bytes (requires --output)", type = int, default = None)
+argparser.add_argument("--manifest", help = "write a manifest with the files, their record counts and sizes, and a LOAD DATASET statement (default: OUTPUT.manifest.json, always written with --partitions or --max-file-bytes)", nargs = "?", const = True, default = None)
+argparser.add_argument("--dataset", help = "name of the dataset in generated statements", type = str, default = "Dataset")
+argparser.add_argument("--socket", help = "stream the records over TCP to this address (e.g. the socket adapter of an AsterixDB feed) instead of writing them to a file", metavar = "HOST:PORT", type = str, default = None)
+argparser.add_argument("--rate", help = "send this many records per second (over all connections) when using --socket (default: as fast as the receiver accepts them)", type = float, default = None)
+argparser.add_argument("--connections", help = "number of TCP connections when using --socket", type = int, default = 1)
+argparser.add_argument("--statements", help = "wrap the records into INSERT or UPSERT statements into --dataset (implies --for-direct-insertion), or write DELETE statements for their ids (requires -i/--add-id)", choices = adm_query.STATEMENTS, default = None)
+argparser.add_argument("--batch-size", help = "number of records per statement when using --statements", type = int, default = adm_query.DEFAULT_BATCH_SIZE)
+argparser.add_argument("--http", help = "post the statements to this query service endpoint instead of writing them to a file (requires --statements)", metavar = "URL", type = str, default = None)
+argparser.add_argument("--http-connections", help = "number of persistent connections (i.e. concurrent requests) when using --http", type = int, default = 1)
+argparser.add_argument("--validate", help = "validate every record on its way to the output and fail the run if any record is invalid (see adm_validate.py)", action = "store_true")
+argparser.add_argument("--append", help = "continue the dataset described by the manifest of a previous run (with the same options and the ids and random numbers after its last record) instead of starting a new one", metavar = "MANIFEST", type = str, default = None)
+argparser.add_argument("--mutate", help = "instead of new records, write new values for a random sample of the ids of the dataset described by the manifest of a previous run (requires -i/--add-id in that run)", metavar = "MANIFEST", type = str, default = None)
+argparser.add_argument("--mutate-fraction", help = "fraction of the ids that are sampled by --mutate", type = float, default = 0.1)
+argparser.add_argument("--mutation", help = "write the sampled ids of --mutate as records with new values (e.g. with --statements upsert) or as records that only contain the id (e.g. with --statements delete)", choices = ["upsert", "delete"], default = "upsert")
+argparser.add_argument("--checkpoint", help = "write a checkpoint of the run to OUTPUT.checkpoint every SECONDS seconds (default: {interval}), i.e. the next id, the size of the output up to it, and the state of the random number generators, so that an interrupted run can be continued with --resume (requires an uncompressed -o/--output)".format(interval = DEFAULT_CHECKPOINT_INTERVAL), metavar = "SECONDS", type = float, nargs = "?", const = DEFAULT_CHECKPOINT_INTERVAL, default = None)
+argparser.add_argument("--resume", help = "continue an interrupted run with the same options from its checkpoint (see --checkpoint): cut off the output after the last record of the checkpoint and generate the remaining records, the output is the same as the one of an uninterrupted run", action = "store_true")
+argparser.add_argument("--cache", help = "serve repeated runs from cached datasets in this directory (a run with more records extends a cached dataset with the same options)", metavar = "DIR", type = str, default = None)
+argparser.add_argument("--cache-size", help = "remove the least recently used datasets from --cache once they take more than SIZE (default: 10GiB)", metavar = "SIZE", type = parse_size, default = adm_cache.DEFAULT_CACHE_SIZE)
+argparser.add_argument("--progress", help = "report records/s, bytes/s, and the ETA on stderr every SECONDS seconds (default: {interval})".format(interval = adm_stats.DEFAULT_PROGRESS_INTERVAL), metavar = "SECONDS", type = float, nargs = "?", const = adm_stats.DEFAULT_PROGRESS_INTERVAL, default = None)
+argparser.add_argument("--stats", help = "write a JSON summary of the run (counts and time per ADM type, nesting depth and record size histograms) to this file (stderr if no file is given)", metavar = "PATH", nargs = "?", const = True, default = None)
+argparser.add_argument("--stats-sample-interval", help = "only time and inspect every n-th record for --stats", type = int, default = adm_stats.DEFAULT_SAMPLE_INTERVAL)
 argparser.add_argument("-d", "--for-direct-insertion", help = "formats type specifiers for direct insertion into datasets (contrary to usage of LOAD DATASET)", action = "store_true")
 argparser.add_argument("-p", "--pretty-print", help = "pretty print generated output", action = "store_true")
 argparser.add_argument("-s", "--seed", help = "seed for random number generator", type = int, default = 42)
 argparser.add_argument("-c", "--shares", help = "approximate share of primitive, incomple information, and derived types in the records respectively", type = int, nargs = 3, default = [7, 1, 12])
+argparser.add_argument("--type-weights", help = "relative weights of individual types within their category (primitive, incomplete information, or derived), e.g. float=10 double=10 string=0, the names are the ones of --schema and null, missing (only with -d), object, array, and multiset, the other types have a weight of 1 (changes the output for a given seed)", metavar = "TYPE=WEIGHT", type = str, nargs = "+", default = None)
+argparser.add_argument("--member-shares", help = "shares of primitive, incomplete information, and derived types in the members of objects, arrays, and multisets per nesting level, i.e. three shares for the members of the records' values, three for their members, and so on, the last three apply to all deeper levels (default: {primitive} {incomplete} {derived}, changes the output for a given seed)".format(primitive = adm_types.RandomDerivedTypeGenerator.PRIMITIVE_TYPE_SHARE, incomplete = adm_types.RandomDerivedTypeGenerator.INCOMPLETE_INFORMATION_TYPE_SHARE, derived = adm_types.RandomDerivedTypeGenerator.DERIVED_TYPE_SHARE), metavar = "SHARE", type = int, nargs = "+", default = None)
+argparser.add_argument("--schema", help = "generate records of a declared type instead of random structures: a file with CREATE TYPE statements or a JSON/YAML spec (.json/.yaml) that can also restrict the values of the fields", type = str, default = None)
+argparser.add_argument("--schema-type", help = "name of the type in --schema that the records are generated from (default: the root of the spec or the last declared type)", type = str, default = None)
+argparser.add_argument("--open-fields", help = "maximum number of additional random fields in records of open types declared in --schema", type = int, default = 0)
+argparser.add_argument("--max-members", help = "maximum number of members of generated objects, arrays, and multisets", type = int, default = 7)
+argparser.add_argument("--max-depth", help = "maximum nesting depth of generated objects, arrays, and multisets (every level's maximum is a random number below the one of the level above)", type = int, default = 5)
+argparser.add_argument("--max-nodes", help = "cut off generated objects, arrays, and multisets once they would contain more than this many values (including nested ones)", type = int, default = None)
+argparser.add_argument("--max-record-bytes", help = "cut off generated objects, arrays, and multisets once their estimated (compact) output would exceed this many bytes", metavar = "SIZE", type = parse_size, default = None)
+argparser.add_argument("--field-names", help = "draw the names of the members of generated objects (and the keys that other values are wrapped with) from a vocabulary of this many names instead of generating new ones", metavar = "N", type = int, default = None)
+argparser.add_argument("--string-values", help = "draw generated strings from a vocabulary of this many strings", metavar = "N", type = int, default = None)
+argparser.add_argument("--int-values", help = "draw generated integers of every size from a vocabulary of (at most) this many values per size", metavar = "N", type = int, default = None)
+argparser.add_argument("--date-values", help = "draw generated dates from a vocabulary of this many dates", metavar = "N", type = int, default = None)
+argparser.add_argument("--vocabulary-distribution", help = "distribution of the values drawn from the vocabularies, zipf makes a few values very frequent", choices = ["uniform", "zipf"], default = "uniform")
+argparser.add_argument("--zipf-exponent", help = "exponent of the Zipf distribution, i.e. the k-th value of a vocabulary is drawn with a probability proportional to 1 / k^S", metavar = "S", type = float, default = 1.0)
 argparser.add_argument("-k", "--has-key", help = "ensures that this key exists in every record", type = str, default = None)
 argparser.add_argument("-i", "--add-id", help = "add numerical id field to each record", type = str, default = None)
+argparser.add_argument("--primary-key", help = "add a field NAME with a primary key that is unique over the whole dataset, TYPE is bigint, string (of {length} letters), or uuid".format(length = adm_keys.STRING_KEY_LENGTH), metavar = "NAME:TYPE", type = str, default = None)
+argparser.add_argument("--primary-key-method", help = "random draws the keys at random and draws a key again if it was already drawn (only for sequential runs), permutation permutes the ids, so the keys are unique without keeping track of them", choices = adm_keys.KEY_METHODS, default = "random")
+argparser.add_argument("--primary-key-memory", help = "memory for keeping track of the random primary keys (about 9 bytes per key), beyond it the keys are spilled to temporary files (default: 256MiB)", metavar = "SIZE", type = parse_size, default = adm_keys.DEFAULT_KEY_MEMORY)
 argparser.add_argument("-l", "--key-length-range", help = "sets the range for the number of characters for the record keys", type = int, nargs = 2, default = [2, 3])
-args = argparser.parse_args()
+argparser.add_argument("--start-id", help = "id of the first record to be generated", type = int, default = 1)
+argparser.add_argument("--end-id", help = "id of the last record to be generated (alternative to --num-records)", type = int, default = None)
+argparser.add_argument("-r", "--random-access", help = "derive every record from the seed and its id alone, so that any slice of ids can be generated without generating the records before it (differs from the output without this option)", action = "store_true")
+argparser.add_argument("-w", "--workers", help = "generate the records in chunks using this many worker processes (chunks are seeded independently, so the output does not depend on the number of workers but differs from the output without this option)", type = int, default = None)
+argparser.add_argument("--chunk-size", help = "number of records per chunk when using --workers", type = int, default = 10000)
+argparser.add_argument("--pool-size", help = "take primitive values from pools of this many pre-generated values per type that are filled in batches with numpy's Generator API (faster, but changes the output for a given seed)", type = int, default = None)
+argparser.add_argument("--min-date", help = "earliest date of the dates, datetimes, and intervals generated in batches, i.e. with --pool-size or --date-values (default: 0001-01-01)", metavar = "YYYY-MM-DD", type = str, default = None)
+argparser.add_argument("--max-date", help = "latest date of the dates, datetimes, and intervals generated in batches, i.e. with --pool-size or --date-values (default: 9999-12-31)", metavar = "YYYY-MM-DD", type = str, default = None)
+argparser.add_argument("--fused", help = "generate the text of the records directly instead of building ADM objects and formatting them (same output, faster, not with --schema)", action = "store_true")
+argparser.add_argument("--max-pending-chunks", help = "maximum number of generated chunks that may wait to be written when using --workers (default: 2 * workers)", type = int, default = None)
+
+# derives a seed for a part of the dataset (e.g. a chunk) from the seed of the whole dataset
+# independent of the process that generates the part and stable across Python versions (contrary to hash())
+def derive_seed(seed: int, *path) -> int:
+    key = ":".join(str(part) for part in (seed,) + path)
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "little")
+
+def seed_random(seed: int, pool_size = None):
+    random.seed(seed)
+    adm_types.seed_numpy(int(random.getrandbits(4 * 8)))
+    adm_types.Vocabularies.seed_draws(seed) # does not draw from random, so the records without vocabularies stay the same
+    adm_types.TypeWeights.seed_draws(derive_seed(seed, "types")) # independent of the draws from the vocabularies
+
+    if pool_size:
+        adm_types.RandomPrimitiveTypeGenerator.use_pools(adm_types.load_numpy().random.default_rng(random.getrandbits(64)), pool_size)
+    else:
+        adm_types.RandomPrimitiveTypeGenerator.use_pools(None)
+
+# names of the types in --type-weights
+WEIGHTED_TYPES = dict(adm_schema.PRIMITIVE_TYPES, null = adm_types.ADMNull, missing = adm_types.ADMMissing, object = adm_types.ADMObject, array = adm_types.ADMArray, multiset = adm_types.ADMMultiset)
+
+# --type-weights as adm type -> weight (None if not given)
+def type_weights(args) -> dict:
+    if args.type_weights is None:
+        return None
 
-if args.has_key == "id" and args.add_key:
-    argparser.error("argument --add-id already implies --has-key \"id\"")
+    weights = {}
+    for assignment in args.type_weights:
+        name, _, weight = assignment.partition("=")
+        if name.lower() not in WEIGHTED_TYPES:
+            raise GeneratorConfigException("argument --type-weights: unknown type '{name}'".format(name = name))
+        try:
+            weights[WEIGHTED_TYPES[name.lower()]] = float(weight)
+        except ValueError:
+            raise GeneratorConfigException("argument --type-weights: invalid weight in '{assignment}' (e.g. float=10)".format(assignment = assignment))
 
-if args.for_direct_insertion:
-    adm_types.Settings.set_for_file_load(False)
+    return weights
 
-random.seed(args.seed)
-numpy.random.seed(int(random.getrandbits(4 * 8))) # TODO: legacy (see https://numpy.org/doc/stable/reference/random/generated/numpy.random.seed.html)
+# --member-shares as a list of (primitive, incomplete information, derived) shares per level (None if not given)
+def member_shares(args) -> list:
+    if args.member_shares is None:
+        return None
 
-PRIMITIVE_TYPE_SHARE = args.shares[0]
-INCOMPLETE_INFORMATION_TYPE_SHARE = args.shares[1]
-DERIVED_TYPE_SHARE = args.shares[2]
-SUM_SHARES_NON_DERIVED_TYPE = PRIMITIVE_TYPE_SHARE + INCOMPLETE_INFORMATION_TYPE_SHARE
-SUM_SHARES = SUM_SHARES_NON_DERIVED_TYPE + DERIVED_TYPE_SHARE
+    return [tuple(args.member_shares[i:i + 3]) for i in range(0, len(args.member_shares), 3)]
 
-def encapsulate_value(val: str, pretty_print: bool, key = None, id = None) -> str:
+# --min-date and --max-date as datetime.date (None if not given)
+def date_range(args) -> tuple:
+    return tuple(datetime.date.fromisoformat(date) if date else None for date in (args.min_date, args.max_date))
+
+# picks the key that a value which is not an object is wrapped with: the requested key or a random one that differs from the id's key
+def choose_record_key(key = None, id = None, key_length_range = (2, 3)) -> str:
     if not key:
         key = list(id)[0] if id else None
+        if adm_types.Vocabularies.FIELD_NAMES in adm_types.Vocabularies.vocabularies:
+            key = adm_types.Vocabularies.draw(adm_types.Vocabularies.FIELD_NAMES) # only the first try, the vocabulary might consist of the id's key
         while key == list(id)[0] if id else None:
-            key = adm_types.ADMString.generate_random_string(args.key_length_range[0], args.key_length_range[1]) # TODO: maybe set possible string lengths depending on args.num_records
+            key = adm_types.ADMString.generate_random_string(key_length_range[0], key_length_range[1]) # TODO: maybe set possible string lengths depending on args.num_records
 
-    if id:
-        return "{{{pp1}\"{id_key}\": {id_val},{pp2}\"{key}\": {val}{pp3}}}\n".format(key = key, val = val, pp1 = "\n" + " " * adm_types.Settings.ADM_INDENTATION if pretty_print else "", id_key = list(id)[0], id_val = id[list(id)[0]], pp2 = "\n" + " " * adm_types.Settings.ADM_INDENTATION if pretty_print else " ", pp3 = "\n" if pretty_print else "")
-    else:
-        return "{{{pp1}\"{key}\": {val}{pp2}}}\n".format(key = key, val = val, pp1 = "\n" + " " * adm_types.Settings.ADM_INDENTATION if pretty_print else "", pp2 = "\n" if pretty_print else "")
+    return str(key)
+
+class RecordGenerator:
+    def __init__(self, args, stats = None):
+        self.args = args
+        self.stats = stats
+
+        # the vocabularies are generated once per process and are the same for all records
+        adm_types.Vocabularies.configure(derive_seed(args.seed, "vocabulary"), {
+                adm_types.Vocabularies.FIELD_NAMES: args.field_names,
+                adm_types.ADMString: args.string_values,
+                adm_types.ADMTinyInt: args.int_values,
+                adm_types.ADMSmallInt: args.int_values,
+                adm_types.ADMInt: args.int_values,
+                adm_types.ADMBigInt: args.int_values,
+                adm_types.ADMDate: args.date_values
+            }, args.vocabulary_distribution, args.zipf_exponent, date_range(args))
+        adm_types.RandomPrimitiveTypeGenerator.set_date_range(*date_range(args))
+        adm_types.TypeWeights.configure(type_weights(args), args.shares, member_shares(args), not args.for_direct_insertion)
+
+        self.primary_key = None
+        if args.primary_key:
+            name, key_type = adm_keys.parse_primary_key(args.primary_key)
+            capacity = args.end_id - args.start_id + 1 if args.end_id is not None else None
+            self.primary_key = adm_keys.PrimaryKeyGenerator(name, key_type, args.primary_key_method, derive_seed(args.seed, "primary-key"), capacity, args.primary_key_memory)
+
+        self.schema_generator = None
+        self.fused = args.fused
+        if args.schema:
+            types, root = adm_schema.load_schema(args.schema)
+            self.schema_generator = adm_schema.compile_schema(types, args.schema_type or root, args.open_fields)
+
+        self.PRIMITIVE_TYPE_SHARE = args.shares[0]
+        self.INCOMPLETE_INFORMATION_TYPE_SHARE = args.shares[1]
+        self.DERIVED_TYPE_SHARE = args.shares[2]
+        self.SUM_SHARES_NON_DERIVED_TYPE = self.PRIMITIVE_TYPE_SHARE + self.INCOMPLETE_INFORMATION_TYPE_SHARE
+        self.SUM_SHARES = self.SUM_SHARES_NON_DERIVED_TYPE + self.DERIVED_TYPE_SHARE
+
+    # generates the value of a record from the current state of the random number generators
+    def generate_value(self):
+        if self.schema_generator is not None:
+            return self.schema_generator()
+
+        if adm_types.TypeWeights.tables:
+            value_type = adm_types.TypeWeights.draw(adm_types.TypeWeights.RECORD)
+            if value_type in adm_types.RandomDerivedTypeGenerator.derived_types:
+                return adm_types.RandomDerivedTypeGenerator.build(value_type, 0, self.args.max_members, self.args.max_depth, self.args.max_nodes, self.args.max_record_bytes)
+            return adm_types.TypeWeights.generate(value_type)
+
+        type_choice = random.randint(1, self.SUM_SHARES)
+
+        if type_choice <= self.SUM_SHARES_NON_DERIVED_TYPE:
+            if self.PRIMITIVE_TYPE_SHARE > 0 and type_choice <= self.PRIMITIVE_TYPE_SHARE:
+                return adm_types.RandomPrimitiveTypeGenerator.generate_rand()
+            else:
+                return adm_types.RandomIncompleteInformationTypeGenerator.generate_rand()
+        else:
+            return adm_types.RandomDerivedTypeGenerator.generate_rand(0, self.args.max_members, self.args.max_depth, self.args.max_nodes, self.args.max_record_bytes)
+
+    # fused version of generate_value and format_record: generates the text of the record without building its value
+    # the random numbers are drawn in the same order as by format_record(id, generate_value()), so the record is the same
+    def generate_text(self, id) -> str:
+        args = self.args
+        key_field = self.key_field(id)
+
+        text = None
+        derived_type = None
+        if adm_types.TypeWeights.tables:
+            value_type = adm_types.TypeWeights.draw(adm_types.TypeWeights.RECORD)
+            if value_type in adm_types.RandomDerivedTypeGenerator.derived_types:
+                derived_type = value_type
+            else:
+                text = adm_types.TypeWeights.generate_text(value_type)
+        else:
+            type_choice = 1 + adm_types.randbelow(self.SUM_SHARES)
+            if type_choice <= self.SUM_SHARES_NON_DERIVED_TYPE:
+                if self.PRIMITIVE_TYPE_SHARE > 0 and type_choice <= self.PRIMITIVE_TYPE_SHARE:
+                    text = adm_types.RandomPrimitiveTypeGenerator.generate_text()[1]
+                else:
+                    text = adm_types.RandomIncompleteInformationTypeGenerator.generate_text()[1]
+            else:
+                derived_type = adm_types.RandomDerivedTypeGenerator.derived_types[adm_types.randbelow(adm_types.RandomDerivedTypeGenerator.NUM_DERIVED_TYPES)]
+
+        if derived_type is not None:
+            writer = adm_types.ADMWriter.get(args.pretty_print)
+            parts = []
+            if derived_type is adm_types.ADMObject and not args.has_key:
+                root_members = [(args.add_id, adm_types.format_json_value(id))] if args.add_id else []
+                if key_field:
+                    root_members.append((key_field[0], key_field[1].toADMString()))
+                adm_types.RandomDerivedTypeGenerator.write_text(derived_type, parts, writer, 0, 0, args.max_members, args.max_depth, args.max_nodes, args.max_record_bytes, root_members)
+                parts.append("\n")
+                return "".join(parts)
+
+            adm_types.RandomDerivedTypeGenerator.write_text(derived_type, parts, writer, 1, 0, args.max_members, args.max_depth, args.max_nodes, args.max_record_bytes)
+            text = "".join(parts)
+
+        return adm_types.format_record_text(text, args.pretty_print, self.record_key(id), (args.add_id, id) if args.add_id else None, key_field)
+
+    # (name, value) of the primary key of the record with the given id (None without --primary-key)
+    def key_field(self, id) -> tuple:
+        if self.primary_key is None:
+            return None
+
+        return self.primary_key.name, self.primary_key.generate(id)
+
+    # the key that a value which is not an object is wrapped with, which must not be the one of the primary key either
+    def record_key(self, id) -> str:
+        args = self.args
+        key = choose_record_key(args.has_key, {args.add_id: id} if args.add_id else None, args.key_length_range)
+        while self.primary_key is not None and key == self.primary_key.name:
+            key = adm_types.ADMString.generate_random_string(args.key_length_range[0], args.key_length_range[1])
+
+        return key
+
+    # formats the value of the record with the given id into the record (including the trailing newline)
+    # values that are not objects (or all values if we need a specific key) are encapsulated into an object with a random key
+    def format_record(self, id, record_val) -> str:
+        args = self.args
+        key_field = self.key_field(id)
+
+        if isinstance(record_val, adm_types.ADMObject) and not args.has_key:
+            if args.add_id:
+                record_val.add_key(args.add_id, id)
+            if key_field:
+                record_val.add_key(key_field[0], key_field[1])
+            return adm_types.format_record(record_val, args.pretty_print)
+        else:
+            return adm_types.format_record(record_val, args.pretty_print, self.record_key(id), (args.add_id, id) if args.add_id else None, key_field)
+
+    # generates the record with the given id (including the trailing newline) from the current state of the random number generators
+    def generate(self, id) -> str:
+        if self.stats is not None and self.stats.should_sample():
+            timings = collections.Counter()
+            adm_types.RandomDerivedTypeGenerator.timings = timings
+            start = time.perf_counter()
+            try:
+                record_val = self.generate_value()
+            finally:
+                adm_types.RandomDerivedTypeGenerator.timings = None
+            # the time outside of build (the record's type, a record value that is not derived) goes to the record's type
+            timings[type(record_val).__name__] += max(0.0, time.perf_counter() - start - sum(timings.values()))
+
+            # walk the value before format_record adds the id and the primary key to it
+            primitive_seconds = self.stats.add_sample(record_val, timings)
+            start = time.perf_counter()
+            record = self.format_record(id, record_val)
+            self.stats.add_formatting_time(time.perf_counter() - start, primitive_seconds)
+
+            return record
+
+        if self.fused:
+            return self.generate_text(id)
+
+        return self.format_record(id, self.generate_value())
+
+    # generates the record with the given id from (seed, id) alone, i.e. independent of all other records
+    def generate_random_access(self, id) -> str:
+        seed_random(derive_seed(self.args.seed, "record", id), self.args.pool_size)
+
+        return self.generate(id)
+
+# splits the ids [first_id, last_id] into chunks of chunk_size records, the chunk index determines the seed of a chunk
+# chunks are aligned to id 1 so that a slice of ids contains the same records as the whole dataset
+# yields (chunk index, first id of the chunk, first id to be written, last id to be written)
+def chunk_ranges(first_id: int, last_id: int, chunk_size: int):
+    chunk_index = (first_id - 1) // chunk_size
+    while chunk_index * chunk_size + 1 <= last_id:
+        chunk_start = chunk_index * chunk_size + 1
+        yield chunk_index, chunk_start, max(chunk_start, first_id), min(chunk_start + chunk_size - 1, last_id)
+        chunk_index += 1
+
+# state of a worker process, set up once per process by init_worker
+worker_record_generator = None
+
+def init_worker(args):
+    global worker_record_generator
+
+    adm_types.Settings.set_for_file_load(not args.for_direct_insertion)
+    worker_record_generator = RecordGenerator(args)
+
+def generate_chunk(chunk) -> list:
+    chunk_index, chunk_start, first_id, last_id = chunk
+    args = worker_record_generator.args
+
+    if args.random_access:
+        return [worker_record_generator.generate_random_access(id) for id in range(first_id, last_id + 1)]
+
+    seed_random(derive_seed(args.seed, "chunk", chunk_index), args.pool_size)
+    # the records of the chunk before first_id still need to be generated to get to the right random state
+    records = [worker_record_generator.generate(id) for id in range(chunk_start, last_id + 1)]
+
+    return records[first_id - chunk_start:]
+
+# number of records (at most len(records)) that are needed to write at least target_bytes bytes
+def records_until_target(records: list, target_bytes: int) -> int:
+    num_bytes = 0
+    for i, record in enumerate(records):
+        num_bytes += adm_output.encoded_length(record)
+        if num_bytes >= target_bytes:
+            return i + 1
+
+    return len(records)
+
+def write_chunks_parallel(args, output_file, stats = None, checkpoints = None):
+    max_pending_chunks = args.max_pending_chunks or 2 * args.workers
+    # with --target-bytes, chunks are generated until enough bytes have been written
+    chunks = chunk_ranges(args.start_id, args.end_id if args.end_id is not None else sys.maxsize, args.chunk_size)
+    bytes_written = 0
+
+    import multiprocessing
+    with multiprocessing.Pool(args.workers, initializer = init_worker, initargs = (args,)) as pool:
+        # only a bounded number of chunks may be in flight (i.e. being generated or waiting to be written)
+        # so that memory usage does not depend on the number of records if writing is slower than generating
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(generate_chunk, (chunk,))))
+            if len(pending) >= max_pending_chunks:
+                break
+
+        while pending:
+            (_, _, first_id, _), result = pending.popleft()
+            records = result.get()
+            if args.target_bytes is not None:
+                records = records[:records_until_target(records, args.target_bytes - bytes_written)]
+
+            output_file.write_records(first_id, records)
+            for record in records:
+                num_bytes = adm_output.encoded_length(record)
+                bytes_written += num_bytes
+                if stats is not None:
+                    stats.add_record(num_bytes)
+            if checkpoints is not None:
+                checkpoints.update(first_id + len(records))
+
+            if args.target_bytes is not None and bytes_written >= args.target_bytes:
+                break # the remaining chunks are discarded when the pool is terminated
+
+            chunk = next(chunks, None)
+            if chunk:
+                pending.append((chunk, pool.apply_async(generate_chunk, (chunk,))))
 
-# https://stackoverflow.com/a/17603000
 @contextlib.contextmanager
-def opt_stdout_open(filename = None, mode = "w"):
-    if filename:
-        fd = open(filename, mode)
+def open_statement_output(args):
+    if args.http:
+        output = adm_query.open_query_service(args.http, args.http_connections)
+    else:
+        output = adm_output.open_output(args.output, args.compress, args.buffer_size)
+
+    with output as output_file, adm_query.open_statements(output_file, args.statements, args.dataset, args.batch_size, args.add_id) as statement_file:
+        yield statement_file
+
+def open_output(args, offset = None):
+    if args.statements:
+        return open_statement_output(args)
+    elif args.socket:
+        import adm_feed
+        return adm_feed.open_feed(args.socket, args.connections, args.rate)
+    elif args.partitions > 1 or args.max_file_bytes or args.manifest:
+        return adm_output.open_partitioned_output(args.output, args.partitions, args.partition_by, args.max_file_bytes, args.compress, args.buffer_size, args.manifest if isinstance(args.manifest, str) else None, args.dataset)
+    else:
+        return adm_output.open_output(args.output, args.compress, args.buffer_size, offset = offset)
+
+# generates the records sequentially in this process and yields (id, record)
+# random_state (see adm_types.get_random_state) continues the sequential stream from there instead of starting at the seed
+def iterate_records(args, stats = None, random_state = None):
+    record_generator = RecordGenerator(args, stats)
+
+    if args.random_access:
+        generate = record_generator.generate_random_access
+    elif random_state is not None:
+        adm_types.set_random_state(random_state)
+        generate = record_generator.generate
+    else:
+        # the sequential stream always starts at the seed, --start-id only shifts the ids
+        seed_random(args.seed, args.pool_size)
+        generate = record_generator.generate
+
+    if args.target_bytes is None:
+        for id in range(args.start_id, args.end_id + 1):
+            yield id, generate(id)
+    else:
+        # stops at the first record boundary at or past the target
+        num_bytes = 0
+        for id in itertools.count(args.start_id):
+            record = generate(id)
+            yield id, record
+            num_bytes += adm_output.encoded_length(record)
+            if num_bytes >= args.target_bytes:
+                return
+
+# options that do not change the records, i.e. that are neither part of the key of a cached dataset nor continued by --append
+OUTPUT_OPTIONS = ["num_records", "end_id", "target_bytes", "estimate", "output", "compress", "buffer_size", "partitions", "partition_by", "max_file_bytes", "manifest", "dataset", "socket", "rate", "connections", "statements", "batch_size", "http", "http_connections", "validate", "append", "mutate", "mutate_fraction", "mutation", "checkpoint", "resume", "cache", "cache_size", "primary_key_memory", "fused", "progress", "stats", "stats_sample_interval", "max_pending_chunks", "workers"]
+
+def record_options(args) -> dict:
+    options = {name: value for name, value in vars(args).items() if name not in OUTPUT_OPTIONS}
+    options["workers"] = args.workers is not None # the chunks are seeded independently, but the number of workers does not matter
+
+    return options
+
+# the records depend on the options and on the code that generates them (and the schema)
+def cache_key(args) -> str:
+    options = record_options(args)
+    filenames = [adm_types.__file__, adm_schema.__file__, adm_keys.__file__, __file__]
+    if args.schema:
+        filenames.append(args.schema)
+
+    return adm_cache.cache_key(options, filenames)
+
+def write_records_cached(args, stats = None):
+    cache = adm_cache.DatasetCache(args.cache, args.cache_size)
+    key = cache_key(args)
+    num_records = args.end_id - args.start_id + 1
+
+    with cache.lock(key):
+        entry = cache.entry(key)
+        cached = min(entry.records, num_records)
+        sequential = not args.random_access and not args.workers
+        if cached < num_records and sequential and entry.records > 0 and not entry.has_state:
+            # the sequential stream cannot be continued without the state of the random number generators
+            entry.reset()
+            cached = 0
+
+        if entry.records == num_records and args.output and adm_output.resolve_compression(args.output, args.compress) == "none" and entry.is_complete_file():
+            # copy instead of a hard link, so that changing the output does not change the cached dataset
+            entry.copy_file(args.output)
+        else:
+            with open_output(args) as output_file:
+                entry.copy_to(output_file, cached)
+
+                if cached < num_records:
+                    # only the records after the cached ones are generated
+                    remaining_args = copy.copy(args)
+                    remaining_args.start_id = args.start_id + cached
+                    cache_writer = entry.append()
+                    try:
+                        tee = adm_cache.TeeRecordWriter(output_file, cache_writer)
+                        if args.workers:
+                            write_chunks_parallel(remaining_args, tee, stats)
+                        else:
+                            for id, record in iterate_records(remaining_args, stats, entry.load_state() if cached > 0 and sequential else None):
+                                num_bytes = tee.write_record(id, record)
+                                if stats is not None:
+                                    stats.add_record(num_bytes)
+                    finally:
+                        cache_writer.close()
+                    cache_writer.commit(adm_types.get_random_state() if sequential else None)
+
+        entry.touch()
+        cache.evict(keep = key)
+
+# reads the description of a dataset from the manifest of the run that generated it (see generation_info)
+def read_generation(manifest_filename: str) -> dict:
+    try:
+        with open(manifest_filename) as manifest_file:
+            generation = json.load(manifest_file)["generation"]
+    except (OSError, ValueError) as e:
+        raise GeneratorConfigException("cannot read the manifest '{filename}': {error}".format(filename = manifest_filename, error = e))
+    except KeyError:
+        raise GeneratorConfigException("the manifest '{filename}' does not describe a complete run".format(filename = manifest_filename))
+
+    if generation["random_state"] is not None:
+        # relative to the manifest, so that the manifest and its state can be moved together
+        generation["random_state"] = os.path.join(os.path.dirname(manifest_filename), generation["random_state"])
+
+    return generation
+
+def load_random_state(generation: dict):
+    with open(generation["random_state"], "rb") as state_file:
+        return pickle.load(state_file)
+
+# the state of the random number generators after the last record of the dataset that --append continues (None if the records do not depend on it)
+# previous is the generation of the manifest if it was already read
+def continued_random_state(args, previous = None):
+    if not args.append or args.random_access or args.workers:
+        return None
+
+    generation = previous or read_generation(args.append)
+    if generation["random_state"] is None:
+        return None # generated with --workers or -r, the records do not depend on it
+
+    return load_random_state(generation)
+
+# describes the dataset in the manifest, so that later runs can continue it (--append) or mutate it (--mutate) without reading its files
+# in the sequential mode, the state of the random number generators after the last record is saved next to the manifest
+def generation_info(args, output_file, previous = None) -> dict:
+    if args.mutate:
+        first_id, last_id, mutations = previous["first_id"], previous["last_id"], previous["mutations"] + 1
     else:
-        fd = sys.stdout
+        first_id = previous["first_id"] if previous else args.start_id
+        last_id = args.start_id + output_file.records_written - 1
+        mutations = previous["mutations"] if previous else 0
+
+    options = record_options(args)
+    state_filename = None
+    if args.mutate:
+        # a mutation does not add records, so the dataset still continues after the same record (and with or without --workers)
+        options["workers"] = previous["options"]["workers"]
+        if previous["random_state"] is not None:
+            state_filename = os.path.splitext(output_file.manifest_filename)[0] + ".state"
+            with open(previous["random_state"], "rb") as state_file:
+                adm_cache.write_atomically(state_filename, state_file.read())
+    elif not args.random_access and not args.workers:
+        state_filename = os.path.splitext(output_file.manifest_filename)[0] + ".state"
+        adm_cache.write_atomically(state_filename, pickle.dumps(adm_types.get_random_state()))
+
+    return {
+            "first_id": first_id,
+            "last_id": last_id,
+            "mutations": mutations,
+            "options": options,
+            "random_state": os.path.basename(state_filename) if state_filename else None
+        }
 
+# writes new values (or only the ids) for a random sample of the ids of an existing dataset, in the order of the ids
+# every mutation of a dataset samples different ids (and values)
+def write_mutations(args, output_file, previous: dict, stats = None):
+    first_id, last_id = previous["first_id"], previous["last_id"]
+    seed_random(derive_seed(args.seed, "mutation", previous["mutations"]), args.pool_size)
+    ids = sorted(random.sample(range(first_id, last_id + 1), round(args.mutate_fraction * (last_id - first_id + 1))))
+
+    record_generator = RecordGenerator(args, stats)
+    for id in ids:
+        if args.mutation == "delete":
+            record_val = adm_types.ADMObject({args.add_id: id})
+            key_field = record_generator.key_field(id)
+            if key_field:
+                record_val.add_key(key_field[0], key_field[1])
+            record = adm_types.format_record(record_val, args.pretty_print)
+        else:
+            record = record_generator.generate(id)
+
+        num_bytes = output_file.write_record(id, record)
+        if stats is not None:
+            stats.add_record(num_bytes)
+
+def checkpoint_filename(args) -> str:
+    return args.output + ".checkpoint"
+
+# reads the checkpoint that --resume continues from and checks that it belongs to a run with the same options and to its output
+def read_checkpoint(args) -> dict:
+    filename = checkpoint_filename(args)
     try:
-        yield fd
-    finally:
-        if fd is not sys.stdout:
-            fd.close()
-
-with opt_stdout_open(args.output, "w") as output_file:
-    for id in range(1, args.num_records + 1):
-        type_choice = random.randint(1, SUM_SHARES)
-
-        if type_choice <= SUM_SHARES_NON_DERIVED_TYPE:
-            if PRIMITIVE_TYPE_SHARE > 0 and type_choice <= PRIMITIVE_TYPE_SHARE:
-                record_val = adm_types.RandomPrimitiveTypeGenerator.generate_rand()
-            else:
-                record_val = adm_types.RandomIncompleteInformationTypeGenerator.generate_rand()
+        with open(filename, "rb") as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+        output_bytes = os.path.getsize(args.output)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        raise GeneratorConfigException("argument --resume: cannot read the checkpoint '{filename}' (or its output): {error}".format(filename = filename, error = e))
+
+    if checkpoint["options"] != record_options(args):
+        raise GeneratorConfigException("argument --resume: the checkpoint '{filename}' belongs to a run with other options".format(filename = filename))
+    if output_bytes < checkpoint["bytes"]:
+        raise GeneratorConfigException("argument --resume: the output '{output}' is shorter than its checkpoint".format(output = args.output))
+
+    return checkpoint
+
+class Checkpointer:
+    # writes a checkpoint to OUTPUT.checkpoint every interval seconds (at the next record or chunk): the id of the next record, the size of
+    # the output up to it, and, for the sequential stream, the state of the random number generators after the record before it
+    # the output is synced to disk first, so that a checkpoint never refers to records that are not in the file
+    def __init__(self, args, output, checkpoint = None):
+        self.filename = checkpoint_filename(args)
+        self.interval = args.checkpoint
+        self.options = record_options(args)
+        self.sequential = not args.random_access and not args.workers
+        self.output = output
+        self.offset = checkpoint["bytes"] if checkpoint else 0 # of the records before this run
+        self.next_time = time.monotonic() + self.interval
+
+        if checkpoint is None:
+            self.remove() # the one of an earlier run does not describe this output
+
+    def update(self, next_id: int):
+        if time.monotonic() >= self.next_time:
+            self.write(next_id)
+
+    def write(self, next_id: int):
+        self.output.sync()
+        checkpoint = {
+                "next_id": next_id,
+                "bytes": self.offset + self.output.bytes_written,
+                "options": self.options,
+                "random_state": adm_types.get_random_state() if self.sequential else None
+            }
+        adm_cache.write_atomically(self.filename, pickle.dumps(checkpoint))
+        self.next_time = time.monotonic() + self.interval
 
-            record = encapsulate_value(adm_types.format(record_val, args.pretty_print), args.pretty_print, args.has_key, {args.add_id: id} if args.add_id else None)
-            output_file.write(record)
+    # once the run is complete, there is nothing to resume
+    def remove(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.filename)
+
+def write_records(args, stats = None):
+    if args.cache:
+        write_records_cached(args, stats)
+        return
+
+    previous = read_generation(args.append or args.mutate) if args.append or args.mutate else None
+    random_state = continued_random_state(args, previous) # --mutate reseeds in write_mutations
+
+    checkpoint = read_checkpoint(args) if args.resume else None
+    remaining_args = args
+    finished = False
+    if checkpoint is not None:
+        # the records after the checkpoint, continuing the sequential stream from its random state
+        remaining_args = copy.copy(args)
+        remaining_args.start_id = checkpoint["next_id"]
+        if args.target_bytes is not None:
+            remaining_args.target_bytes = args.target_bytes - checkpoint["bytes"]
+            finished = remaining_args.target_bytes <= 0
         else:
-            record_val = adm_types.RandomDerivedTypeGenerator.generate_rand()
+            finished = remaining_args.start_id > args.end_id
+        random_state = checkpoint["random_state"]
 
-            if isinstance(record_val, adm_types.ADMObject) and not args.has_key:
-                if args.add_id:
-                    record_val.add_key(args.add_id, id)
-                output_file.write(adm_types.format(record_val, args.pretty_print) + "\n")
-            else:
-                record_val_str = adm_types.format(record_val, args.pretty_print)
-                if args.pretty_print:
-                    record_val_str = re.sub(r"\n(\s*)", r"\n{indent}\g<1>".format(indent = " " * adm_types.Settings.ADM_INDENTATION), record_val_str)
+    validation = contextlib.nullcontext
+    if args.validate:
+        import adm_validate
+        validation = adm_validate.open_validation
+
+    with open_output(args, checkpoint["bytes"] if checkpoint else None) as output, validation(output) as output_file:
+        checkpoints = Checkpointer(args, output, checkpoint) if args.checkpoint is not None else None
+
+        if args.mutate:
+            write_mutations(args, output_file, previous, stats)
+        elif finished:
+            pass # interrupted after its last record
+        elif args.statements == "delete" and remaining_args.target_bytes is None and not args.validate:
+            # the statements only contain the ids, so the records are not generated (unless their size or validity matters)
+            for id in range(remaining_args.start_id, remaining_args.end_id + 1):
+                num_bytes = output_file.write_id(id)
+                if stats is not None:
+                    stats.add_record(num_bytes)
+        elif args.workers:
+            # the worker processes do not sample their records, so we only get sizes and throughput in this case
+            write_chunks_parallel(remaining_args, output_file, stats, checkpoints)
+        else:
+            for id, record in iterate_records(remaining_args, stats, random_state):
+                num_bytes = output_file.write_record(id, record)
+                if stats is not None:
+                    stats.add_record(num_bytes)
+                if checkpoints is not None:
+                    checkpoints.update(id + 1)
+
+        if isinstance(output, adm_output.PartitionedRecordWriter):
+            output.generation = generation_info(args, output, previous)
+
+    if checkpoints is not None:
+        checkpoints.remove()
+
+class GeneratorConfigException(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+# checks the options (from the command line or make_config) and completes them, i.e. computes --end-id from --num-records
+def check_config(args):
+    if args.append and args.mutate:
+        raise GeneratorConfigException("argument --append not allowed with argument --mutate")
+    if (args.append or args.mutate) and (args.cache or args.estimate is not None):
+        raise GeneratorConfigException("arguments --append and --mutate not allowed with arguments --cache and --estimate")
+    if args.append or args.mutate:
+        # the records of the dataset depend on the options of the run that started it
+        previous = read_generation(args.append or args.mutate)
+        for name, value in previous["options"].items():
+            if name != "workers":
+                setattr(args, name, value)
+
+        if args.append:
+            if previous["options"]["workers"] != bool(args.workers):
+                raise GeneratorConfigException("argument --append: the dataset was generated {with_or_without} --workers, so it can only be continued {with_or_without} --workers".format(with_or_without = "with" if previous["options"]["workers"] else "without"))
+            args.start_id = previous["last_id"] + 1
+        else:
+            if args.num_records is not None or args.end_id is not None or args.target_bytes is not None or args.workers:
+                raise GeneratorConfigException("argument --mutate not allowed with arguments -n/--num-records, --end-id, --target-bytes, and --workers")
+            if not args.add_id:
+                raise GeneratorConfigException("argument --mutate: the records of the dataset do not have ids (-i/--add-id)")
+            if not 0 <= args.mutate_fraction <= 1:
+                raise GeneratorConfigException("argument --mutate-fraction must be between 0 and 1")
+
+        if args.output and args.manifest is None and not args.statements:
+            # so that the next run can continue from this one
+            args.manifest = True
+
+    if args.mutate is None and args.num_records is None and args.end_id is None and args.target_bytes is None:
+        raise GeneratorConfigException("one of the arguments -n/--num-records --end-id --target-bytes is required")
+    if sum(option is not None for option in (args.num_records, args.end_id, args.target_bytes)) > 1:
+        raise GeneratorConfigException("only one of the arguments -n/--num-records --end-id --target-bytes is allowed")
+    if args.start_id < 1:
+        raise GeneratorConfigException("argument --start-id must be at least 1")
+    if args.num_records is not None:
+        args.end_id = args.start_id + args.num_records - 1
+    if args.end_id is not None and args.end_id < args.start_id - 1:
+        raise GeneratorConfigException("argument --end-id must not be smaller than --start-id")
+    if args.target_bytes is not None and args.target_bytes < 1:
+        raise GeneratorConfigException("argument --target-bytes must be at least 1")
+    if args.estimate is not None and args.estimate < 1:
+        raise GeneratorConfigException("argument --estimate must be at least 1")
+
+    if args.has_key and args.has_key == args.add_id:
+        raise GeneratorConfigException("argument --add-id already adds the field \"{name}\" of argument --has-key".format(name = args.add_id))
+    if args.primary_key:
+        try:
+            name, _ = adm_keys.parse_primary_key(args.primary_key)
+        except adm_keys.ADMKeyException as e:
+            raise GeneratorConfigException("argument --primary-key: {error}".format(error = e))
+        if name in (args.add_id, args.has_key):
+            raise GeneratorConfigException("argument --primary-key needs a field of its own (not the one of -i/--add-id or -k/--has-key)")
+        if args.primary_key_method == "random" and (args.workers or args.random_access or args.append or args.mutate or args.cache or args.checkpoint is not None or args.resume):
+            # the random keys of a record depend on the ones of all the records before it
+            raise GeneratorConfigException("argument --primary-key-method random not allowed with arguments --workers, -r/--random-access, --append, --mutate, --cache, --checkpoint, and --resume (use --primary-key-method permutation)")
+    if args.primary_key_memory < 1:
+        raise GeneratorConfigException("argument --primary-key-memory must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        raise GeneratorConfigException("argument --workers must be at least 1")
+    if args.chunk_size < 1:
+        raise GeneratorConfigException("argument --chunk-size must be at least 1")
+    if args.pool_size is not None and args.pool_size < 1:
+        raise GeneratorConfigException("argument --pool-size must be at least 1")
+    if args.pool_size and args.random_access:
+        # every record is seeded on its own, so it would refill whole pools for the few values it takes from them
+        raise GeneratorConfigException("argument --pool-size not allowed with argument -r/--random-access")
+    if args.buffer_size < 1:
+        raise GeneratorConfigException("argument --buffer-size must be at least 1")
+    if args.partitions < 1:
+        raise GeneratorConfigException("argument --partitions must be at least 1")
+    if args.max_file_bytes is not None and args.max_file_bytes < 1:
+        raise GeneratorConfigException("argument --max-file-bytes must be at least 1")
+    if (args.partitions > 1 or args.max_file_bytes or args.manifest) and not args.output:
+        raise GeneratorConfigException("arguments --partitions, --max-file-bytes, and --manifest require --output")
+    if args.socket and (args.output or args.compress):
+        raise GeneratorConfigException("argument --socket not allowed with arguments -o/--output and --compress")
+    if args.rate is not None and args.rate <= 0:
+        raise GeneratorConfigException("argument --rate must be positive")
+    if args.connections < 1:
+        raise GeneratorConfigException("argument --connections must be at least 1")
+    if (args.rate is not None or args.connections > 1) and not args.socket:
+        raise GeneratorConfigException("arguments --rate and --connections require --socket")
+    if args.statements and (args.socket or args.partitions > 1 or args.max_file_bytes or args.manifest):
+        raise GeneratorConfigException("argument --statements not allowed with arguments --socket, --partitions, --max-file-bytes, and --manifest")
+    if args.batch_size < 1:
+        raise GeneratorConfigException("argument --batch-size must be at least 1")
+    if args.http and not args.statements:
+        raise GeneratorConfigException("argument --http requires --statements")
+    if args.http and (args.output or args.compress):
+        raise GeneratorConfigException("argument --http not allowed with arguments -o/--output and --compress")
+    if args.http_connections < 1:
+        raise GeneratorConfigException("argument --http-connections must be at least 1")
+    if args.statements == "delete" and not args.add_id:
+        raise GeneratorConfigException("argument --statements delete requires -i/--add-id")
+    if args.statements:
+        # the statements are queries, so they need the literals of direct insertion
+        args.for_direct_insertion = True
+    if args.socket:
+        try:
+            adm_output.parse_address(args.socket)
+        except adm_output.ADMOutputException as e:
+            raise GeneratorConfigException("argument --socket: {error}".format(error = e))
+
+    if args.resume and args.checkpoint is None:
+        args.checkpoint = DEFAULT_CHECKPOINT_INTERVAL # a resumed run can be interrupted as well
+    if args.checkpoint is not None:
+        if args.checkpoint < 0:
+            raise GeneratorConfigException("argument --checkpoint must not be negative")
+        if not args.output or args.partitions > 1 or args.max_file_bytes or args.manifest or args.statements or args.append or args.mutate or args.cache or args.estimate is not None:
+            raise GeneratorConfigException("arguments --checkpoint and --resume require -o/--output and are not allowed with arguments --partitions, --max-file-bytes, --manifest, --statements, --append, --mutate, --cache, and --estimate")
+        if adm_output.resolve_compression(args.output, args.compress) != "none":
+            # the output is cut off at the byte offset of the checkpoint
+            raise GeneratorConfigException("arguments --checkpoint and --resume require an uncompressed output")
+    if args.resume:
+        read_checkpoint(args)
+
+    if args.cache and (args.partitions > 1 or args.max_file_bytes or args.manifest or args.socket or args.statements or args.target_bytes is not None or args.estimate is not None):
+        raise GeneratorConfigException("argument --cache not allowed with arguments --partitions, --max-file-bytes, --manifest, --socket, --statements, --target-bytes, and --estimate")
+    if args.cache and args.validate:
+        raise GeneratorConfigException("argument --validate not allowed with argument --cache (validate the cached output with adm_validate.py instead)")
+    if args.cache_size < 1:
+        raise GeneratorConfigException("argument --cache-size must be at least 1")
+
+    if args.stats_sample_interval < 1:
+        raise GeneratorConfigException("argument --stats-sample-interval must be at least 1")
+    if args.field_names is not None and args.field_names < 1:
+        raise GeneratorConfigException("argument --field-names must be at least 1")
+    if args.string_values is not None and args.string_values < 1:
+        raise GeneratorConfigException("argument --string-values must be at least 1")
+    if args.int_values is not None and args.int_values < 1:
+        raise GeneratorConfigException("argument --int-values must be at least 1")
+    if args.date_values is not None and args.date_values < 1:
+        raise GeneratorConfigException("argument --date-values must be at least 1")
+    if args.zipf_exponent < 0:
+        raise GeneratorConfigException("argument --zipf-exponent must not be negative")
+    try:
+        min_date, max_date = date_range(args)
+    except (TypeError, ValueError) as e:
+        raise GeneratorConfigException("arguments --min-date and --max-date must be dates like 2024-01-31: {error}".format(error = e))
+    if min_date and max_date and min_date > max_date:
+        raise GeneratorConfigException("argument --min-date must not be after --max-date")
+    if (min_date or max_date) and not (args.pool_size or args.date_values):
+        raise GeneratorConfigException("arguments --min-date and --max-date require --pool-size or --date-values")
+    if any(share < 0 for share in args.shares) or sum(args.shares) < 1:
+        raise GeneratorConfigException("argument -c/--shares must not be negative and needs at least one positive share")
+    if (args.type_weights or args.member_shares) and args.schema:
+        raise GeneratorConfigException("arguments --type-weights and --member-shares not allowed with argument --schema")
+    if args.member_shares is not None and len(args.member_shares) % 3 != 0:
+        raise GeneratorConfigException("argument --member-shares needs three shares (primitive, incomplete information, derived) per level")
+    if args.type_weights is not None or args.member_shares is not None:
+        try:
+            adm_types.TypeWeights.build_tables(type_weights(args) or {}, args.shares, member_shares(args), not args.for_direct_insertion)
+        except adm_types.ADMArgumentException as e:
+            raise GeneratorConfigException("arguments --type-weights, --member-shares, and --shares: {error}".format(error = e))
+    if args.fused and args.schema:
+        raise GeneratorConfigException("argument --fused not allowed with argument --schema")
+    if args.max_members < 0:
+        raise GeneratorConfigException("argument --max-members must not be negative")
+    if args.max_depth < 1:
+        raise GeneratorConfigException("argument --max-depth must be at least 1")
+    if args.max_nodes is not None and args.max_nodes < 1:
+        raise GeneratorConfigException("argument --max-nodes must be at least 1")
+    if args.max_record_bytes is not None and args.max_record_bytes < 1:
+        raise GeneratorConfigException("argument --max-record-bytes must be at least 1")
+    if args.open_fields < 0:
+        raise GeneratorConfigException("argument --open-fields must not be negative")
+    if args.schema:
+        try:
+            # compiled again in every process that generates records, this only reports errors early
+            types, root = adm_schema.load_schema(args.schema)
+            adm_schema.compile_schema(types, args.schema_type or root, args.open_fields)
+        except (OSError, ValueError, adm_schema.ADMSchemaException) as e:
+            raise GeneratorConfigException("argument --schema: {error}".format(error = e))
+
+
+# library API, e.g. for generating many small datasets in the same process instead of paying the startup of a process per dataset
+# config holds the same options as the command line, e.g. make_config(shares = [1, 0, 0], add_id = "id")
+def make_config(**options):
+    config = argparser.parse_args([])
+    for name, value in options.items():
+        if not hasattr(config, name):
+            raise GeneratorConfigException("unknown option '{name}'".format(name = name))
+        setattr(config, name, value)
+
+    return config
+
+# n replaces --num-records (None keeps --num-records, --end-id, or --target-bytes of config)
+# rng replaces --seed: either a seed or a random.Random that the seed is drawn from
+def complete_config(n = None, config = None, rng = None, **options):
+    config = copy.copy(config) if config is not None else make_config()
+    for name, value in options.items():
+        setattr(config, name, value)
+    if n is not None:
+        config.num_records = n
+    if isinstance(rng, random.Random):
+        config.seed = rng.getrandbits(64)
+    elif rng is not None:
+        config.seed = rng
+
+    check_config(config)
+    adm_types.Settings.set_for_file_load(not config.for_direct_insertion)
+
+    return config
+
+# yields the records (including their trailing newlines), the same ones that generator.py writes with the same options
+# the records come from the global state of random (and numpy), so only one of these iterators should be consumed at a time
+# --workers and the output options are ignored, --mutate is not supported
+def generate_records(n = None, config = None, rng = None):
+    config = complete_config(n, config, rng)
+    if config.mutate:
+        raise GeneratorConfigException("generate_records does not support --mutate, use write_dataset")
+    for _, record in iterate_records(config, random_state = continued_random_state(config)):
+        yield record
+
+# writes a dataset like generator.py does, output is a file name (stdout if None)
+def write_dataset(output = None, n = None, config = None, rng = None):
+    write_records(complete_config(n, config, rng, output = output))
+
+# generates a sample of records with the current settings (without writing them) and extrapolates their size and generation time
+def estimate(args, sample_size: int) -> dict:
+    num_records = args.end_id - args.start_id + 1 if args.end_id is not None else None
+    if num_records is not None:
+        sample_size = min(sample_size, num_records)
+
+    record_generator = RecordGenerator(args)
+    if args.random_access:
+        generate = record_generator.generate_random_access
+    else:
+        seed_random(args.seed, args.pool_size)
+        generate = record_generator.generate
+
+    start = time.perf_counter()
+    records = [generate(id) for id in range(args.start_id, args.start_id + sample_size)]
+    seconds_per_record = (time.perf_counter() - start) / sample_size if sample_size else 0.0
+
+    sizes = [adm_output.encoded_length(record) for record in records]
+    mean = sum(sizes) / sample_size if sample_size else 0.0
+    deviation = math.sqrt(sum((size - mean) ** 2 for size in sizes) / (sample_size - 1)) if sample_size > 1 else 0.0
+
+    if num_records is None:
+        num_records = math.ceil(args.target_bytes / mean) if mean > 0 else 0
+
+    # the records are independent, so the total is approximately normally distributed, its variance is the one of the num_records records
+    # around the true mean plus the one of the mean estimated from the sample, scaled up to num_records records
+    margin = 1.96 * deviation * math.sqrt(num_records + num_records ** 2 / sample_size) if sample_size else 0.0
+
+    result = {
+            "sampled_records": sample_size,
+            "bytes_per_record": mean,
+            "bytes_per_record_stddev": deviation,
+            "min_record_bytes": min(sizes, default = 0),
+            "max_record_bytes": max(sizes, default = 0),
+            "records": num_records,
+            "bytes": round(mean * num_records),
+            "bytes_95_percent_interval": [max(0, round(mean * num_records - margin)), round(mean * num_records + margin)],
+            "seconds_per_record": seconds_per_record,
+            # assumes that the workers scale linearly and that writing is not the bottleneck
+            "seconds": seconds_per_record * num_records / (args.workers or 1)
+        }
+
+    compression = adm_output.resolve_compression(args.output, args.compress)
+    if compression != "none" and sizes:
+        with io.BytesIO() as raw:
+            with adm_output.open_compressed(raw, compression) as sink:
+                sink.write("".join(records).encode("utf-8"))
+            ratio = len(raw.getvalue()) / sum(sizes)
+        result["compression"] = compression
+        result["compressed_bytes"] = round(mean * num_records * ratio)
+
+    return result
+
+def main():
+    args = argparser.parse_args()
+
+    try:
+        check_config(args)
+    except GeneratorConfigException as e:
+        argparser.error(e.message)
+
+    adm_types.Settings.set_for_file_load(not args.for_direct_insertion)
+
+    if args.estimate is not None:
+        json.dump(estimate(args, args.estimate), sys.stdout, indent = 4)
+        sys.stdout.write("\n")
+        return
+
+    stats = None
+    if args.stats or args.progress:
+        num_records = args.end_id - args.start_id + 1 if args.end_id is not None else None
+        stats = adm_stats.GenerationStats(num_records, args.stats_sample_interval, args.progress, total_bytes = args.target_bytes)
+
+    try:
+        write_records(args, stats)
+    except adm_output.ADMOutputException as e:
+        argparser.exit(1, "{prog}: error: {error}\n".format(prog = argparser.prog, error = e))
+
+    if stats is not None:
+        if args.progress:
+            stats.report_progress()
+        if args.stats:
+            stats.write_summary(args.stats if isinstance(args.stats, str) else None)
 
-                output_file.write(encapsulate_value(record_val_str, args.pretty_print, args.has_key, {args.add_id: id} if args.add_id else None))
+if __name__ == "__main__":
+    main()